@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class AssignmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'assignments'
\ No newline at end of file
+    name = 'assignments'
+    
+    def ready(self):
+        import assignments.signals
@@ -0,0 +1,99 @@
+"""
+Streaming ZIP archive of all submissions for an assignment.
+
+The archive is written with the standard zipfile module into a buffer that
+is emptied after every block, so the response starts immediately and memory
+stays constant no matter how large the archive grows. Files are stored
+without compression (uploads are mostly already compressed documents) and
+ZIP64 is forced so archives and entries may exceed 4 GB.
+"""
+import csv
+import io
+import os
+import zipfile
+
+from django.utils import timezone
+from django.utils.text import get_valid_filename
+
+BLOCK_SIZE = 64 * 1024
+
+
+class ZipStream:
+    """Write-only, unseekable sink whose contents are drained after each write"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _zip_info(name, when, compress_type=zipfile.ZIP_STORED):
+    when = timezone.localtime(when) if when else timezone.localtime()
+    info = zipfile.ZipInfo(name, date_time=when.timetuple()[:6])
+    info.compress_type = compress_type
+    info.external_attr = 0o644 << 16
+    return info
+
+
+def _folder_name(submission):
+    student = submission.student
+    full_name = student.get_full_name() or student.username
+    return get_valid_filename(f'{full_name} ({student.username})')
+
+
+def iter_submission_archive(assignment, submissions):
+    """Yield the bytes of a ZIP with one folder per student plus an index.csv"""
+    stream = ZipStream()
+    index = io.StringIO()
+    index_writer = csv.writer(index)
+    index_writer.writerow(['Student', 'Username', 'Submitted At', 'Late', 'Status', 'Grade', 'File'])
+    
+    with zipfile.ZipFile(stream, mode='w', allowZip64=True) as archive:
+        for submission in submissions:
+            folder = _folder_name(submission)
+            file_name = ''
+            
+            if submission.submission_text:
+                archive.writestr(
+                    _zip_info(f'{folder}/submission.txt', submission.submitted_at, zipfile.ZIP_DEFLATED),
+                    submission.submission_text,
+                )
+                yield stream.drain()
+            
+            if submission.submission_file:
+                file_name = get_valid_filename(os.path.basename(submission.submission_file.name))
+                info = _zip_info(f'{folder}/{file_name}', submission.submitted_at)
+                with submission.submission_file.open('rb') as source, \
+                        archive.open(info, mode='w', force_zip64=True) as target:
+                    for block in iter(lambda: source.read(BLOCK_SIZE), b''):
+                        target.write(block)
+                        yield stream.drain()
+                yield stream.drain()
+            
+            index_writer.writerow([
+                submission.student.get_full_name(),
+                submission.student.username,
+                timezone.localtime(submission.submitted_at).strftime('%Y-%m-%d %H:%M'),
+                'yes' if submission.submitted_at > assignment.due_date else 'no',
+                submission.get_status_display(),
+                submission.grade if submission.grade is not None else '',
+                file_name,
+            ])
+        
+        archive.writestr(_zip_info('index.csv', None, zipfile.ZIP_DEFLATED), index.getvalue())
+    # Closing the archive writes the central directory
+    yield stream.drain()
+
+
+def archive_filename(assignment):
+    return get_valid_filename(f'{assignment.title} submissions.zip')
@@ -0,0 +1,104 @@
+"""
+Responses for content-addressed assignment files.
+
+The SHA-256 digest is a strong ETag and the body never changes, so clients
+may cache indefinitely. When ASSIGNMENT_FILE_SENDFILE is set the web server
+streams the file (and answers Range requests) via X-Sendfile or
+X-Accel-Redirect; otherwise single byte ranges are served from Python.
+"""
+import mimetypes
+import os
+import re
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+
+from .storage import BLOCK_SIZE, blob_storage
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CACHE_CONTROL = 'private, max-age=31536000, immutable'
+
+
+def parse_range(header, size):
+    """
+    Return (start, end) for a single satisfiable byte range, None when the
+    header is absent or not understood (serve the whole file), or False
+    when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match((header or '').strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        return False
+    return start, end
+
+
+def _read_range(path, start, end):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            block = f.read(min(BLOCK_SIZE, remaining))
+            if not block:
+                break
+            remaining -= len(block)
+            yield block
+
+
+def _etag_matches(header, etag):
+    return header is not None and (header.strip() == '*' or etag in [tag.strip() for tag in header.split(',')])
+
+
+def blob_response(request, blob, filename):
+    etag = f'"{blob.digest}"'
+    if _etag_matches(request.META.get('HTTP_IF_NONE_MATCH'), etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        return response
+    
+    path = blob_storage.blob_path(blob.digest)
+    content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+    sendfile = getattr(settings, 'ASSIGNMENT_FILE_SENDFILE', None)
+    
+    if sendfile == 'X-Accel-Redirect':
+        response = HttpResponse(content_type=content_type)
+        prefix = getattr(settings, 'ASSIGNMENT_FILE_ACCEL_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix + os.path.relpath(path, blob_storage.location).replace(os.sep, '/')
+    elif sendfile == 'X-Sendfile':
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = path
+    else:
+        byte_range = None
+        if_range = request.META.get('HTTP_IF_RANGE')
+        if if_range is None or if_range.strip() == etag:
+            byte_range = parse_range(request.META.get('HTTP_RANGE'), blob.size)
+        
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{blob.size}'
+            return response
+        
+        start, end = byte_range or (0, blob.size - 1)
+        response = StreamingHttpResponse(_read_range(path, start, end), content_type=content_type)
+        response['Content-Length'] = str(end - start + 1)
+        if byte_range:
+            response.status_code = 206
+            response['Content-Range'] = f'bytes {start}-{end}/{blob.size}'
+    
+    response['ETag'] = etag
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = CACHE_CONTROL
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    response['X-Content-Type-Options'] = 'nosniff'
+    return response
@@ -0,0 +1,186 @@
+"""
+Batch grading of assignment submissions.
+
+A batch of (submission_id, grade, feedback) entries is validated as a whole
+and written with one bulk_update inside a transaction. The late penalty is
+worked out for the whole batch in one pass: late_penalty_percent is taken
+off for every started day a submission came in after the due date, capped
+at the full grade. Scores can optionally be mirrored into the gradebook as
+Grade rows, which keeps final grades and class ranks current.
+"""
+import math
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django.db import transaction
+from django.utils import timezone
+
+from grades.models import Grade
+from grades.policies import recompute_final_grades
+from users.portal import touch_students
+from .models import AssignmentSubmission
+
+HUNDRED = Decimal(100)
+CENT = Decimal('0.01')
+SECONDS_PER_DAY = 24 * 60 * 60
+GRADED_STATUSES = {'graded', 'returned'}
+
+
+class GradingError(Exception):
+    """Raised with a list of entry errors when a batch cannot be applied"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} invalid entr{'y' if len(errors) == 1 else 'ies'}")
+
+
+def days_late(submitted_at, due_date):
+    """Started days between the due date and the submission, 0 if on time"""
+    seconds = (submitted_at - due_date).total_seconds()
+    return math.ceil(seconds / SECONDS_PER_DAY) if seconds > 0 else 0
+
+
+def penalty_factors(assignment, submitted_times):
+    """Multiplier per submission time for the assignment's late penalty"""
+    per_day = Decimal(assignment.late_penalty_percent)
+    return [
+        max(HUNDRED - per_day * days_late(submitted_at, assignment.due_date), Decimal(0)) / HUNDRED
+        for submitted_at in submitted_times
+    ]
+
+
+def _to_decimal(value):
+    try:
+        number = Decimal(str(value).strip())
+    except (InvalidOperation, ValueError):
+        return None
+    return number if number.is_finite() else None
+
+
+def _to_id(value):
+    # bool is an int subclass, and 1.5 or "1.5" must not become submission 1
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdigit():
+        return int(value)
+    return None
+
+
+def grade_submissions(assignment, grader, entries, apply_late_penalty=True,
+                      record_grades=False, status='graded'):
+    """
+    Grade many submissions of one assignment at once. Returns the updated
+    submissions. Raises GradingError without writing anything if any entry
+    is invalid.
+    """
+    if status not in GRADED_STATUSES:
+        raise GradingError([{'entry': None, 'error': f'Invalid status "{status}".'}])
+    if not isinstance(entries, list):
+        raise GradingError([{'entry': None, 'error': 'grades must be a list of entries.'}])
+    
+    errors = []
+    submission_ids = []
+    for number, entry in enumerate(entries, start=1):
+        submission_id = _to_id(entry.get('submission_id')) if isinstance(entry, dict) else None
+        if not isinstance(entry, dict):
+            errors.append({'entry': number, 'error': 'Each entry must be an object.'})
+        elif submission_id is None:
+            errors.append({'entry': number, 'error': 'submission_id must be an integer.'})
+        submission_ids.append(submission_id)
+    if errors:
+        raise GradingError(errors)
+    
+    submissions = {
+        submission.id: submission
+        for submission in AssignmentSubmission.objects.filter(assignment=assignment, id__in=submission_ids)
+    }
+    
+    graded = []
+    raw_grades = []
+    seen = set()
+    max_points = Decimal(assignment.max_points)
+    for number, (entry, submission_id) in enumerate(zip(entries, submission_ids), start=1):
+        submission = submissions.get(submission_id)
+        grade = _to_decimal(entry.get('grade'))
+        if submission is None:
+            errors.append({'entry': number, 'error': f'Submission {submission_id} is not part of this assignment.'})
+        elif submission.id in seen:
+            errors.append({'entry': number, 'error': f'Submission {submission.id} appears more than once.'})
+        if grade is None or grade < 0 or grade > max_points:
+            errors.append({'entry': number, 'error': f'grade must be between 0 and {assignment.max_points}.'})
+        if submission is None or grade is None or submission.id in seen:
+            continue
+        seen.add(submission.id)
+        submission.feedback = str(entry.get('feedback') or '').strip()
+        graded.append(submission)
+        raw_grades.append(grade)
+    
+    if errors:
+        raise GradingError(errors)
+    
+    if apply_late_penalty:
+        factors = penalty_factors(assignment, [submission.submitted_at for submission in graded])
+    else:
+        factors = [Decimal(1)] * len(graded)
+    
+    now = timezone.now()
+    for submission, grade, factor in zip(graded, raw_grades, factors):
+        submission.grade = (grade * factor).quantize(CENT, rounding=ROUND_HALF_UP)
+        submission.status = status
+        submission.graded_at = now
+        submission.graded_by = grader
+    
+    with transaction.atomic():
+        AssignmentSubmission.objects.bulk_update(
+            graded, ['grade', 'feedback', 'status', 'graded_at', 'graded_by'],
+        )
+        if record_grades:
+            record_in_gradebook(assignment, grader, graded)
+        # bulk_update skips the submission signals
+        touch_students([submission.student_id for submission in graded])
+    return graded
+
+
+def record_in_gradebook(assignment, teacher, submissions):
+    """
+    Mirror submission scores into grades.Grade. A student's existing grade
+    for this assignment is updated in place.
+    """
+    existing = {
+        grade.student_id: grade
+        for grade in Grade.objects.filter(
+            assignment=assignment,
+            student_id__in=[submission.student_id for submission in submissions],
+        )
+    }
+    points_possible = Decimal(assignment.max_points)
+    scale = HUNDRED / points_possible if points_possible else Decimal(0)
+    
+    to_create = []
+    to_update = []
+    for submission in submissions:
+        grade = existing.get(submission.student_id)
+        if grade is None:
+            grade = Grade(
+                student_id=submission.student_id,
+                subject_id=assignment.subject_id,
+                assignment=assignment,
+                title=assignment.title,
+                grade_type='assignment',
+                date_assigned=timezone.localdate(assignment.created_at),
+                date_due=timezone.localdate(assignment.due_date),
+            )
+            to_create.append(grade)
+        else:
+            to_update.append(grade)
+        grade.teacher = teacher
+        grade.points_earned = submission.grade
+        grade.points_possible = points_possible
+        grade.percentage = (submission.grade * scale).quantize(CENT, rounding=ROUND_HALF_UP)
+        grade.comments = submission.feedback
+    
+    Grade.objects.bulk_create(to_create)
+    Grade.objects.bulk_update(to_update, ['teacher', 'points_earned', 'points_possible', 'percentage', 'comments'])
+    # bulk writes skip the Grade signals, so refresh the cached final grades here
+    recompute_final_grades(assignment.subject_id, [submission.student_id for submission in submissions])
@@ -0,0 +1,37 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from assignments.models import AssignmentSubmission
+from assignments.storage import blob_storage, parse_blob_name
+from teacher.models import Assignment as LegacyAssignment
+
+
+class Command(BaseCommand):
+    help = 'Move assignment files stored before blob storage into deduplicated storage'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-originals', action='store_true', help='Do not delete the old files')
+
+    def handle(self, *args, **options):
+        moved = 0
+        missing = 0
+        for model, field_name in [(AssignmentSubmission, 'submission_file'), (LegacyAssignment, 'file')]:
+            rows = model.objects.exclude(**{field_name: ''}).values_list('pk', field_name)
+            for pk, name in rows.iterator():
+                if parse_blob_name(name):
+                    continue
+                if not blob_storage.exists(name):
+                    missing += 1
+                    continue
+                with blob_storage.open(name) as original:
+                    new_name = blob_storage.save(name, original)
+                # update() skips the signals that would release the new reference
+                model.objects.filter(pk=pk).update(**{field_name: new_name})
+                if not options['keep_originals']:
+                    os.remove(blob_storage.path(name))
+                moved += 1
+
+        if missing:
+            self.stdout.write(self.style.WARNING(f'⚠️ {missing} files referenced in the database were not found'))
+        self.stdout.write(self.style.SUCCESS(f'✅ Moved {moved} files into blob storage'))
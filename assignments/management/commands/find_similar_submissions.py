@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from assignments.models import Assignment
+from assignments.similarity import DEFAULT_THRESHOLD, build_missing_signatures, find_similar_submissions
+
+
+class Command(BaseCommand):
+    help = 'List near-duplicate submission texts for an assignment'
+
+    def add_arguments(self, parser):
+        parser.add_argument('assignment_id', type=int)
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help='Minimum estimated similarity (0-1)')
+
+    def handle(self, *args, **options):
+        try:
+            assignment = Assignment.objects.get(pk=options['assignment_id'])
+        except Assignment.DoesNotExist:
+            raise CommandError(f"Assignment {options['assignment_id']} does not exist")
+
+        built = build_missing_signatures(assignment)
+        if built:
+            self.stdout.write(f'Built {built} missing signatures')
+
+        pairs = find_similar_submissions(assignment, options['threshold'])
+        for pair in pairs:
+            first, second = pair['submission_ids']
+            self.stdout.write(f"Submissions {first} and {second}: {pair['similarity']:.0%} similar")
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Found {len(pairs)} near-duplicate pairs'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from assignments.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = 'Remove abandoned chunked submission uploads and their part files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age-hours', type=int, default=24, help='Idle time before an upload is abandoned')
+
+    def handle(self, *args, **options):
+        removed = purge_stale_uploads(options['max_age_hours'])
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Removed {removed} stale uploads'))
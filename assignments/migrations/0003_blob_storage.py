@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:28
+
+import assignments.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0002_submissionupload'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StoredBlob',
+            fields=[
+                ('digest', models.CharField(help_text='SHA-256 of the content', max_length=64, primary_key=True, serialize=False)),
+                ('size', models.PositiveBigIntegerField()),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='assignmentsubmission',
+            name='submission_file',
+            field=models.FileField(blank=True, storage=assignments.storage.get_blob_storage, upload_to='assignments/'),
+        ),
+    ]
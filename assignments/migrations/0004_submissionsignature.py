@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:32
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0003_blob_storage'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SubmissionSignature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text_digest', models.CharField(help_text='SHA-1 of the normalized text', max_length=40)),
+                ('shingle_count', models.PositiveIntegerField()),
+                ('minhashes', models.BinaryField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='signatures', to='assignments.assignment')),
+                ('submission', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='signature', to='assignments.assignmentsubmission')),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0004_submissionsignature'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['classroom', 'status', 'due_date'], name='assignment_class_due_idx'),
+        ),
+    ]
@@ -1,7 +1,10 @@
+import uuid
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from subject.models import Subject
 from classroom.models import Classroom
+from .storage import get_blob_storage
 
 User = get_user_model()
 
@@ -41,6 +44,10 @@ class Assignment(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Published assignments of a classroom by due date (student timelines)
+            models.Index(fields=['classroom', 'status', 'due_date'], name='assignment_class_due_idx'),
+        ]
 
 class AssignmentSubmission(models.Model):
     STATUS_CHOICES = [
@@ -53,7 +60,7 @@ class AssignmentSubmission(models.Model):
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='assignment_submissions')
     
     submission_text = models.TextField(blank=True)
-    submission_file = models.FileField(upload_to='assignments/', blank=True)
+    submission_file = models.FileField(upload_to='assignments/', storage=get_blob_storage, blank=True)
     submitted_at = models.DateTimeField(auto_now_add=True)
     
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='submitted')
@@ -67,4 +74,49 @@ class AssignmentSubmission(models.Model):
     
     class Meta:
         unique_together = ['assignment', 'student']
-        ordering = ['-submitted_at']
\ No newline at end of file
+        ordering = ['-submitted_at']
+
+class SubmissionUpload(models.Model):
+    """In-progress chunked upload of a submission file, removed once completed"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name='uploads')
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='submission_uploads')
+    
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    checksum = models.CharField(max_length=64, help_text='Expected SHA-256 of the whole file')
+    received_size = models.PositiveBigIntegerField(default=0)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.filename} ({self.received_size}/{self.total_size})"
+    
+    class Meta:
+        ordering = ['-created_at']
+
+
+class StoredBlob(models.Model):
+    """A deduplicated file body in content-addressed storage"""
+    digest = models.CharField(max_length=64, primary_key=True, help_text='SHA-256 of the content')
+    size = models.PositiveBigIntegerField()
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.digest[:12]} ({self.ref_count} refs)"
+
+
+class SubmissionSignature(models.Model):
+    """MinHash signature of a submission's text for near-duplicate detection"""
+    submission = models.OneToOneField(AssignmentSubmission, on_delete=models.CASCADE, related_name='signature')
+    assignment = models.ForeignKey(Assignment, on_delete=models.CASCADE, related_name='signatures')
+    
+    text_digest = models.CharField(max_length=40, help_text='SHA-1 of the normalized text')
+    shingle_count = models.PositiveIntegerField()
+    minhashes = models.BinaryField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Signature for submission {self.submission_id}"
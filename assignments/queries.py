@@ -0,0 +1,97 @@
+"""
+Reusable annotated querysets for assignment listings.
+
+Submission state is attached to each Assignment row in the same query,
+so listing pages never touch AssignmentSubmission per row.
+"""
+from django.db.models import (BooleanField, Case, Count, F, FilteredRelation, IntegerField,
+                              Min, OuterRef, Q, Subquery, Value, When)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from users.models import StudentProfile
+from .models import Assignment
+
+GRADED_STATUSES = ['graded', 'returned']
+
+
+def with_student_submission(assignments, student, now=None):
+    """
+    Annotate assignments with one student's submission: submission_id,
+    submission_status, submission_grade, submission_submitted_at and
+    is_overdue (past due with nothing submitted).
+    """
+    now = now or timezone.now()
+    # (assignment, student) is unique, so this LEFT JOIN adds at most one row
+    return assignments.annotate(
+        student_submission=FilteredRelation('submissions', condition=Q(submissions__student=student)),
+    ).annotate(
+        submission_id=F('student_submission__id'),
+        submission_status=F('student_submission__status'),
+        submission_grade=F('student_submission__grade'),
+        submission_submitted_at=F('student_submission__submitted_at'),
+    ).annotate(
+        is_overdue=Case(
+            When(Q(due_date__lt=now) & Q(submission_id__isnull=True), then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        ),
+    )
+
+
+def student_assignment_queryset(student, classroom, now=None):
+    """Published assignments of a classroom with the student's submission state"""
+    assignments = Assignment.objects.filter(
+        classroom=classroom,
+        status='published',
+    ).select_related('subject').order_by('-due_date')
+    return with_student_submission(assignments, student, now)
+
+
+def submission_summary(assignment):
+    """Lightweight stand-in for the submission, built from the annotations"""
+    if assignment.submission_id is None:
+        return None
+    return {
+        'id': assignment.submission_id,
+        'status': assignment.submission_status,
+        'grade': assignment.submission_grade,
+        'submitted_at': assignment.submission_submitted_at,
+    }
+
+
+def with_submission_progress(assignments, now=None):
+    """
+    Annotate assignments with submission and grading progress relative to the
+    classroom size: classroom_size, submitted_count, graded_count,
+    ungraded_count, late_count, missing_count (past due, not submitted) and
+    oldest_ungraded_at.
+    """
+    now = now or timezone.now()
+    classroom_size = (
+        StudentProfile.objects.filter(classroom=OuterRef('classroom'))
+        .order_by().values('classroom').annotate(size=Count('id')).values('size')
+    )
+    ungraded = Q(submissions__status='submitted')
+    return assignments.annotate(
+        classroom_size=Coalesce(Subquery(classroom_size, output_field=IntegerField()), 0),
+        submitted_count=Count('submissions'),
+        graded_count=Count('submissions', filter=Q(submissions__status__in=GRADED_STATUSES)),
+        ungraded_count=Count('submissions', filter=ungraded),
+        late_count=Count('submissions', filter=Q(submissions__submitted_at__gt=F('due_date'))),
+        oldest_ungraded_at=Min('submissions__submitted_at', filter=ungraded),
+    ).annotate(
+        missing_count=Case(
+            When(Q(due_date__lt=now) & Q(classroom_size__gt=F('submitted_count')),
+                 then=F('classroom_size') - F('submitted_count')),
+            default=Value(0),
+            output_field=IntegerField(),
+        ),
+    )
+
+
+def grading_queue(assignments, now=None):
+    """Assignments with ungraded submissions, oldest waiting submission first"""
+    return with_submission_progress(assignments, now).filter(
+        ungraded_count__gt=0,
+    ).order_by('oldest_ungraded_at')
@@ -0,0 +1,24 @@
+from django.db.models.signals import post_init, post_save
+from django.dispatch import receiver
+
+from .models import AssignmentSubmission
+from .similarity import update_signature
+from .storage import track_blob_references
+from teacher.models import Assignment as LegacyAssignment
+
+# Both file fields share the content-addressed blob storage
+track_blob_references(AssignmentSubmission, 'submission_file')
+track_blob_references(LegacyAssignment, 'file')
+
+
+@receiver(post_init, sender=AssignmentSubmission)
+def remember_submission_text(sender, instance, **kwargs):
+    instance._loaded_text = instance.__dict__.get('submission_text')
+
+
+@receiver(post_save, sender=AssignmentSubmission)
+def refresh_submission_signature(sender, instance, created, **kwargs):
+    """Keep the near-duplicate signature in step with the submission text"""
+    if created or instance.submission_text != instance._loaded_text:
+        update_signature(instance)
+        instance._loaded_text = instance.submission_text
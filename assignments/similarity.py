@@ -0,0 +1,158 @@
+"""
+Near-duplicate detection for submission texts.
+
+Each submission text is reduced to a set of word shingles and summarized
+by a fixed-size MinHash signature, stored when the submission is saved.
+Checking an assignment buckets the signatures with locality-sensitive
+hashing (bands of rows), so only submissions that collide in at least one
+band are compared. This grows roughly linearly with the class size instead
+of comparing every pair. Everything runs locally with the standard library.
+"""
+import hashlib
+import random
+import re
+import struct
+from array import array
+from itertools import combinations
+
+NUM_PERM = 128
+BANDS = 32
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 5
+DEFAULT_THRESHOLD = 0.8
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+WORD_RE = re.compile(r'\w+')
+
+# Fixed seed: signatures stored in the database must stay comparable
+_rng = random.Random(20240229)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def normalize(text):
+    return WORD_RE.findall((text or '').lower())
+
+
+def text_digest(words):
+    return hashlib.sha1(' '.join(words).encode()).hexdigest()
+
+
+def shingles(words, size=SHINGLE_SIZE):
+    """Hashed word n-grams; short texts fall back to a single shingle"""
+    if not words:
+        return set()
+    if len(words) < size:
+        grams = [' '.join(words)]
+    else:
+        grams = (' '.join(words[i:i + size]) for i in range(len(words) - size + 1))
+    return {
+        struct.unpack('<I', hashlib.blake2b(gram.encode(), digest_size=4).digest())[0]
+        for gram in grams
+    }
+
+
+def minhash(shingle_hashes):
+    """MinHash signature as array('I') of NUM_PERM values"""
+    signature = array('I', [MAX_HASH] * NUM_PERM)
+    for value in shingle_hashes:
+        for i, (a, b) in enumerate(PERMUTATIONS):
+            hashed = ((a * value + b) % MERSENNE_PRIME) & MAX_HASH
+            if hashed < signature[i]:
+                signature[i] = hashed
+    return signature
+
+
+def estimate_similarity(first, second):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(first, second) if x == y) / NUM_PERM
+
+
+def candidate_pairs(signatures):
+    """Pairs of keys whose signatures share at least one LSH band"""
+    pairs = set()
+    for band in range(BANDS):
+        buckets = {}
+        start = band * ROWS
+        for key, signature in signatures.items():
+            buckets.setdefault(signature[start:start + ROWS].tobytes(), []).append(key)
+        for members in buckets.values():
+            if len(members) > 1:
+                pairs.update(combinations(sorted(members), 2))
+    return pairs
+
+
+def similar_pairs(signatures, threshold=DEFAULT_THRESHOLD):
+    """[(key_a, key_b, similarity)] above the threshold, most similar first"""
+    results = []
+    for first, second in candidate_pairs(signatures):
+        similarity = estimate_similarity(signatures[first], signatures[second])
+        if similarity >= threshold:
+            results.append((first, second, similarity))
+    results.sort(key=lambda pair: (-pair[2], pair[0], pair[1]))
+    return results
+
+
+def _load(data):
+    signature = array('I')
+    signature.frombytes(bytes(data))
+    return signature
+
+
+def update_signature(submission):
+    """Store (or drop) the signature of a submission after its text changed"""
+    from .models import SubmissionSignature
+    
+    words = normalize(submission.submission_text)
+    if not words:
+        SubmissionSignature.objects.filter(submission=submission).delete()
+        return None
+    
+    digest = text_digest(words)
+    existing = SubmissionSignature.objects.filter(submission=submission).only('text_digest').first()
+    if existing is not None and existing.text_digest == digest:
+        return existing
+    
+    shingle_hashes = shingles(words)
+    signature, _ = SubmissionSignature.objects.update_or_create(
+        submission=submission,
+        defaults={
+            'assignment_id': submission.assignment_id,
+            'text_digest': digest,
+            'shingle_count': len(shingle_hashes),
+            'minhashes': minhash(shingle_hashes).tobytes(),
+        },
+    )
+    return signature
+
+
+def build_missing_signatures(assignment):
+    """Backfill signatures for submissions saved before detection existed"""
+    missing = assignment.submissions.filter(signature__isnull=True).exclude(submission_text='')
+    count = 0
+    for submission in missing.only('id', 'assignment_id', 'submission_text').iterator():
+        if update_signature(submission) is not None:
+            count += 1
+    return count
+
+
+def find_similar_submissions(assignment, threshold=DEFAULT_THRESHOLD):
+    """
+    Near-duplicate submission pairs of an assignment as dicts with both
+    submission ids and the estimated similarity.
+    """
+    from .models import SubmissionSignature
+    
+    signatures = {
+        submission_id: _load(data)
+        for submission_id, data in SubmissionSignature.objects.filter(
+            assignment=assignment
+        ).values_list('submission_id', 'minhashes')
+    }
+    return [
+        {'submission_ids': [first, second], 'similarity': round(similarity, 3)}
+        for first, second, similarity in similar_pairs(signatures, threshold)
+    ]
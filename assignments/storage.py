@@ -0,0 +1,168 @@
+"""
+Content-addressed, deduplicated storage for assignment files.
+
+Uploads are hashed while they are streamed to disk and each distinct body
+is stored once under cas/objects/<aa>/<sha256>. The name kept in the
+FileField is cas/<sha256>/<original filename>, so every reference keeps its
+own file name while sharing the blob. StoredBlob counts references; the
+blob is removed when the last one is released. Names from before this
+storage (e.g. assignments/report.pdf) keep resolving to their old files.
+"""
+import hashlib
+import os
+import re
+import tempfile
+
+from django.core.files.move import file_move_safe
+from django.core.files.storage import FileSystemStorage
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_init, post_save, post_delete
+from django.urls import reverse
+
+BLOB_PREFIX = 'cas'
+BLOCK_SIZE = 64 * 1024
+BLOB_NAME_RE = re.compile(r'^cas/([0-9a-f]{64})/([^/]+)$')
+
+
+def parse_blob_name(name):
+    """Return (digest, filename) for a content-addressed name, else None"""
+    match = BLOB_NAME_RE.match(name or '')
+    return match.groups() if match else None
+
+
+def _acquire(digest, size):
+    from .models import StoredBlob
+    
+    with transaction.atomic():
+        if StoredBlob.objects.filter(pk=digest).update(ref_count=F('ref_count') + 1):
+            return
+        try:
+            with transaction.atomic():
+                StoredBlob.objects.create(digest=digest, size=size, ref_count=1)
+        except IntegrityError:
+            StoredBlob.objects.filter(pk=digest).update(ref_count=F('ref_count') + 1)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage that stores each distinct file body once"""
+
+    def blob_path(self, digest):
+        return super().path(os.path.join(BLOB_PREFIX, 'objects', digest[:2], digest))
+
+    def path(self, name):
+        parsed = parse_blob_name(name)
+        if parsed:
+            return self.blob_path(parsed[0])
+        return super().path(name)
+
+    def url(self, name):
+        parsed = parse_blob_name(name)
+        if parsed:
+            return reverse('assignments:download_blob', args=parsed)
+        return super().url(name)
+
+    def get_available_name(self, name, max_length=None):
+        # Blob names are derived from the content, never from what exists
+        return name
+
+    def _hash_into_temp(self, content, directory):
+        digest = hashlib.sha256()
+        size = 0
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.upload')
+        with os.fdopen(fd, 'wb') as temp:
+            for chunk in content.chunks(BLOCK_SIZE):
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                digest.update(chunk)
+                temp.write(chunk)
+                size += len(chunk)
+        return digest.hexdigest(), size, temp_path
+
+    def _save(self, name, content):
+        tmp_dir = super().path(os.path.join(BLOB_PREFIX, 'tmp'))
+        os.makedirs(tmp_dir, exist_ok=True)
+        
+        # Chunked uploads arrive already verified and on disk: just move them
+        digest = getattr(content, 'sha256', None)
+        if digest and hasattr(content, 'temporary_file_path'):
+            source = content.temporary_file_path()
+            size = os.path.getsize(source)
+            owned = False
+        else:
+            digest, size, source = self._hash_into_temp(content, tmp_dir)
+            owned = True
+        
+        target = self.blob_path(digest)
+        if os.path.exists(target):
+            if owned:
+                os.remove(source)
+        else:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            file_move_safe(source, target, allow_overwrite=True)
+            if self.file_permissions_mode is not None:
+                os.chmod(target, self.file_permissions_mode)
+        
+        _acquire(digest, size)
+        filename = os.path.basename(name) or digest
+        return f'{BLOB_PREFIX}/{digest}/{filename}'
+
+    def delete(self, name):
+        """Release one reference; the blob goes away with the last one"""
+        parsed = parse_blob_name(name)
+        if not parsed:
+            return super().delete(name)
+        
+        from .models import StoredBlob
+        digest = parsed[0]
+        with transaction.atomic():
+            StoredBlob.objects.filter(pk=digest, ref_count__gt=0).update(ref_count=F('ref_count') - 1)
+            orphaned = StoredBlob.objects.filter(pk=digest, ref_count=0).delete()[0]
+        if orphaned:
+            try:
+                os.remove(self.blob_path(digest))
+            except FileNotFoundError:
+                pass
+
+
+blob_storage = ContentAddressedStorage()
+
+
+def get_blob_storage():
+    return blob_storage
+
+
+def _file_name(instance, field_name):
+    # Read the raw value so deferred fields are not loaded just for this
+    value = instance.__dict__.get(field_name)
+    return getattr(value, 'name', value) or None
+
+
+def track_blob_references(model, field_name):
+    """
+    Release blob references when a row's file is replaced or the row is
+    deleted; FileField never deletes files on its own. Re-saving identical
+    content under the same name keeps an extra reference, which only delays
+    removing a blob that is still in use.
+    """
+    loaded_attr = f'_loaded_{field_name}'
+
+    def remember_loaded_file(sender, instance, **kwargs):
+        setattr(instance, loaded_attr, _file_name(instance, field_name))
+
+    def release_replaced_file(sender, instance, **kwargs):
+        old_name = getattr(instance, loaded_attr, None)
+        new_name = _file_name(instance, field_name)
+        setattr(instance, loaded_attr, new_name)
+        if old_name != new_name and parse_blob_name(old_name):
+            transaction.on_commit(lambda: blob_storage.delete(old_name))
+
+    def release_deleted_file(sender, instance, **kwargs):
+        name = _file_name(instance, field_name)
+        if parse_blob_name(name):
+            transaction.on_commit(lambda: blob_storage.delete(name))
+
+    uid = f'{model._meta.label_lower}.{field_name}'
+    post_init.connect(remember_loaded_file, sender=model, weak=False, dispatch_uid=f'{uid}.post_init')
+    post_save.connect(release_replaced_file, sender=model, weak=False, dispatch_uid=f'{uid}.post_save')
+    post_delete.connect(release_deleted_file, sender=model, weak=False, dispatch_uid=f'{uid}.post_delete')
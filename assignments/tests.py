@@ -0,0 +1,376 @@
+from datetime import timedelta
+from decimal import Decimal
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from users.models import CustomUser
+from classroom.models import Classroom
+from subject.models import Subject
+from .models import Assignment, AssignmentSubmission, SubmissionUpload, StoredBlob
+from .grading import days_late
+from .similarity import minhash, estimate_similarity, shingles, normalize
+from .queries import student_assignment_queryset, with_submission_progress, grading_queue
+from .storage import parse_blob_name
+
+
+class AssignmentsTestCase(TestCase):
+    def setUp(self):
+        self.teacher = CustomUser.objects.create_user(username='teacher', password='Testpass123', role='teacher')
+        self.student = CustomUser.objects.create_user(username='student', password='Testpass123', role='student')
+        self.classroom = Classroom.objects.create(name='10A', grade='10', teacher=self.teacher)
+        self.student.student_profile.classroom = self.classroom
+        self.student.student_profile.save()
+        self.subject = Subject.objects.create(name='Math')
+
+    def add_assignment(self, title, due_in_days, status='published'):
+        return Assignment.objects.create(
+            title=title,
+            description=title,
+            subject=self.subject,
+            classroom=self.classroom,
+            teacher=self.teacher,
+            due_date=timezone.now() + timedelta(days=due_in_days),
+            status=status,
+        )
+
+
+class StudentAssignmentsTest(AssignmentsTestCase):
+    def test_submission_state_in_one_query(self):
+        done = self.add_assignment('Done', -2)
+        missed = self.add_assignment('Missed', -1)
+        upcoming = self.add_assignment('Upcoming', 3)
+        self.add_assignment('Draft', 3, status='draft')
+        AssignmentSubmission.objects.create(assignment=done, student=self.student, status='graded', grade=8)
+
+        with self.assertNumQueries(1):
+            rows = {a.id: a for a in student_assignment_queryset(self.student, self.classroom)}
+            subject_names = {a.subject.name for a in rows.values()}
+
+        self.assertEqual(set(rows), {done.id, missed.id, upcoming.id})
+        self.assertEqual(subject_names, {'Math'})
+        self.assertEqual(rows[done.id].submission_status, 'graded')
+        self.assertFalse(rows[done.id].is_overdue)
+        self.assertTrue(rows[missed.id].is_overdue)
+        self.assertIsNone(rows[upcoming.id].submission_id)
+        self.assertFalse(rows[upcoming.id].is_overdue)
+
+    def test_student_list_view(self):
+        self.add_assignment('Upcoming', 3)
+        self.client.login(username='student', password='Testpass123')
+        response = self.client.get(reverse('assignments:student_assignments'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['assignment_data']), 1)
+
+
+class GradingProgressTest(AssignmentsTestCase):
+    def test_progress_counts_and_queue(self):
+        classmate = CustomUser.objects.create_user(username='classmate', password='Testpass123', role='student')
+        classmate.student_profile.classroom = self.classroom
+        classmate.student_profile.save()
+        past = self.add_assignment('Past', -1)
+        recent = self.add_assignment('Recent', 2)
+        self.add_assignment('Untouched', 2)
+        late = AssignmentSubmission.objects.create(assignment=past, student=self.student, status='submitted')
+        AssignmentSubmission.objects.filter(pk=late.pk).update(submitted_at=past.due_date + timedelta(hours=1))
+        AssignmentSubmission.objects.create(assignment=recent, student=self.student, status='submitted')
+        AssignmentSubmission.objects.create(assignment=recent, student=classmate, status='graded', grade=9)
+
+        with self.assertNumQueries(1):
+            rows = {a.id: a for a in with_submission_progress(Assignment.objects.all())}
+
+        self.assertEqual(rows[past.id].classroom_size, 2)
+        self.assertEqual(rows[past.id].late_count, 1)
+        self.assertEqual(rows[past.id].missing_count, 1)
+        self.assertEqual(rows[recent.id].submitted_count, 2)
+        self.assertEqual(rows[recent.id].graded_count, 1)
+        self.assertEqual(rows[recent.id].missing_count, 0)
+
+        queue = list(grading_queue(Assignment.objects.all()))
+        # the late submission on the past assignment has waited longest
+        self.assertEqual([a.id for a in queue], [past.id, recent.id])
+
+        self.client.login(username='teacher', password='Testpass123')
+        response = self.client.get(reverse('assignments:teacher_grading_queue'))
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Recent')
+        response = self.client.get(reverse('assignments:teacher_assignments'))
+        self.assertContains(response, '2/2 submitted')
+
+
+class MediaTestCase(AssignmentsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.tmp,
+            ASSIGNMENT_UPLOAD_DIR=f'{self.tmp}/parts',
+            ASSIGNMENT_UPLOAD_CHUNK_SIZE=4,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+
+class ChunkedUploadTest(MediaTestCase):
+    def put_chunk(self, upload_id, data, start, total):
+        return self.client.put(
+            reverse('assignments:submission_upload', args=[upload_id]),
+            data=data,
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(data) - 1}/{total}',
+        )
+
+    def test_resumable_upload_is_verified_and_attached(self):
+        assignment = self.add_assignment('Essay', 3)
+        content = b'hello world'
+        self.client.login(username='student', password='Testpass123')
+        response = self.client.post(
+            reverse('assignments:start_submission_upload', args=[assignment.id]),
+            {'filename': 'essay.txt', 'size': len(content), 'sha256': hashlib.sha256(content).hexdigest()},
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 201)
+        upload_id = response.json()['upload_id']
+
+        self.assertEqual(self.put_chunk(upload_id, content[:4], 0, len(content)).json()['received'], 4)
+        # Replaying the first chunk is rejected with the offset to resume from
+        response = self.put_chunk(upload_id, content[:4], 0, len(content))
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['received'], 4)
+        self.assertEqual(self.put_chunk(upload_id, content[4:11], 4, len(content)).status_code, 413)
+
+        complete_url = reverse('assignments:complete_submission_upload', args=[upload_id])
+        self.assertEqual(self.client.post(complete_url).status_code, 409)
+        self.put_chunk(upload_id, content[4:8], 4, len(content))
+        self.put_chunk(upload_id, content[8:], 8, len(content))
+
+        response = self.client.post(complete_url, {'submission_text': 'See attached'})
+        self.assertTrue(response.json()['success'])
+        submission = AssignmentSubmission.objects.get(assignment=assignment, student=self.student)
+        self.assertEqual(submission.submission_text, 'See attached')
+        with submission.submission_file.open('rb') as f:
+            self.assertEqual(f.read(), content)
+        self.assertEqual(StoredBlob.objects.get().digest, hashlib.sha256(content).hexdigest())
+        self.assertFalse(SubmissionUpload.objects.exists())
+
+    def test_checksum_mismatch_discards_upload(self):
+        assignment = self.add_assignment('Essay', 3)
+        self.client.login(username='student', password='Testpass123')
+        response = self.client.post(
+            reverse('assignments:start_submission_upload', args=[assignment.id]),
+            {'filename': 'essay.txt', 'size': 3, 'sha256': '0' * 64},
+            content_type='application/json',
+        )
+        upload_id = response.json()['upload_id']
+        self.put_chunk(upload_id, b'abc', 0, 3)
+        response = self.client.post(reverse('assignments:complete_submission_upload', args=[upload_id]))
+        self.assertEqual(response.status_code, 422)
+        self.assertFalse(SubmissionUpload.objects.exists())
+        self.assertFalse(AssignmentSubmission.objects.exists())
+
+
+class BlobStorageTest(MediaTestCase):
+    def submit(self, student, assignment, content, filename='report.pdf'):
+        submission = AssignmentSubmission(assignment=assignment, student=student)
+        submission.submission_file.save(filename, ContentFile(content))
+        return submission
+
+    def test_identical_files_share_one_blob(self):
+        classmate = CustomUser.objects.create_user(username='classmate', password='Testpass123', role='student')
+        assignment = self.add_assignment('Report', 3)
+        content = b'%PDF-1.4 same report'
+        digest = hashlib.sha256(content).hexdigest()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first = self.submit(self.student, assignment, content)
+            second = self.submit(classmate, assignment, content, filename='copy.pdf')
+        self.assertEqual(first.submission_file.name, f'cas/{digest}/report.pdf')
+        self.assertEqual(second.submission_file.name, f'cas/{digest}/copy.pdf')
+        self.assertEqual(StoredBlob.objects.get().ref_count, 2)
+        blob_path = first.submission_file.path
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.submission_file.save('report.pdf', ContentFile(b'revised report'))
+        self.assertEqual(StoredBlob.objects.get(pk=digest).ref_count, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(StoredBlob.objects.filter(pk=digest).exists())
+        self.assertFalse(os.path.exists(blob_path))
+
+    def test_download_etag_and_range(self):
+        assignment = self.add_assignment('Report', 3)
+        submission = self.submit(self.student, assignment, b'0123456789')
+        self.client.login(username='teacher', password='Testpass123')
+        url = submission.submission_file.url
+
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        response = self.client.get(url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        self.assertEqual(self.client.get(url, HTTP_RANGE='bytes=20-').status_code, 416)
+
+        with self.settings(ASSIGNMENT_FILE_SENDFILE='X-Accel-Redirect'):
+            response = self.client.get(url)
+        self.assertTrue(response['X-Accel-Redirect'].startswith('/protected-media/cas/objects/'))
+
+    def test_download_requires_access_to_a_referencing_submission(self):
+        CustomUser.objects.create_user(username='classmate', password='Testpass123', role='student')
+        assignment = self.add_assignment('Report', 3)
+        submission = self.submit(self.student, assignment, b'<script>alert(1)</script>', filename='report.txt')
+        digest = parse_blob_name(submission.submission_file.name)[0]
+        renamed = reverse('assignments:download_blob', args=[digest, 'report.html'])
+
+        self.client.login(username='classmate', password='Testpass123')
+        self.assertEqual(self.client.get(submission.submission_file.url).status_code, 404)
+
+        self.client.login(username='student', password='Testpass123')
+        response = self.client.get(renamed)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/plain')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="report.txt"')
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+
+class SubmissionArchiveTest(MediaTestCase):
+    def test_archive_streams_files_text_and_index(self):
+        assignment = self.add_assignment('Report', 3)
+        submission = AssignmentSubmission(assignment=assignment, student=self.student, submission_text='My notes')
+        submission.submission_file.save('report.pdf', ContentFile(b'x' * 200000))
+
+        self.client.login(username='teacher', password='Testpass123')
+        response = self.client.get(reverse('assignments:download_submissions_archive', args=[assignment.id]))
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 3)
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(chunks)))
+        names = archive.namelist()
+        self.assertIn('index.csv', names)
+        folder = names[0].split('/')[0]
+        self.assertEqual(archive.read(f'{folder}/report.pdf'), b'x' * 200000)
+        self.assertEqual(archive.read(f'{folder}/submission.txt'), b'My notes')
+        self.assertIn('student', archive.read('index.csv').decode())
+
+
+class BatchGradingTest(AssignmentsTestCase):
+    def test_batch_grading_with_late_penalty_and_gradebook(self):
+        from grades.models import FinalGrade, Grade
+
+        classmate = CustomUser.objects.create_user(username='classmate', password='Testpass123', role='student')
+        assignment = self.add_assignment('Essay', -3)
+        on_time = AssignmentSubmission.objects.create(assignment=assignment, student=self.student)
+        late = AssignmentSubmission.objects.create(assignment=assignment, student=classmate)
+        AssignmentSubmission.objects.filter(pk=on_time.pk).update(submitted_at=assignment.due_date - timedelta(hours=1))
+        AssignmentSubmission.objects.filter(pk=late.pk).update(submitted_at=assignment.due_date + timedelta(hours=30))
+        self.assertEqual(days_late(assignment.due_date + timedelta(hours=30), assignment.due_date), 2)
+
+        self.client.login(username='teacher', password='Testpass123')
+        url = reverse('assignments:batch_grade_submissions', args=[assignment.id])
+        response = self.client.post(url, {'grades': [
+            {'submission_id': on_time.id, 'grade': 90},
+            {'submission_id': late.id, 'grade': 101},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['entry'], 2)
+
+        response = self.client.post(url, {'record_grades': True, 'grades': [
+            {'submission_id': on_time.id, 'grade': 90, 'feedback': 'Well done'},
+            {'submission_id': late.id, 'grade': 90},
+        ]}, content_type='application/json')
+        self.assertEqual(response.json()['graded'], 2)
+
+        on_time.refresh_from_db()
+        late.refresh_from_db()
+        self.assertEqual(on_time.grade, Decimal('90.00'))
+        self.assertEqual(on_time.feedback, 'Well done')
+        self.assertEqual(on_time.graded_by, self.teacher)
+        # two started days late at 10% per day
+        self.assertEqual(late.grade, Decimal('72.00'))
+        self.assertEqual(Grade.objects.get(student=classmate).percentage, Decimal('72.00'))
+        self.assertEqual(FinalGrade.objects.get(student=self.student).final_percentage, Decimal('90.00'))
+
+        # Regrading updates the mirrored grade instead of adding another
+        self.client.post(url, {'record_grades': True, 'apply_late_penalty': False, 'grades': [
+            {'submission_id': late.id, 'grade': 80},
+        ]}, content_type='application/json')
+        self.assertEqual(Grade.objects.get(student=classmate).points_earned, Decimal('80.00'))
+
+    def test_malformed_entries_and_same_titled_assignments(self):
+        from grades.models import Grade
+
+        first = self.add_assignment('Essay', 3)
+        second = self.add_assignment('Essay', 10)
+        submissions = [
+            AssignmentSubmission.objects.create(assignment=assignment, student=self.student)
+            for assignment in (first, second)
+        ]
+        self.client.login(username='teacher', password='Testpass123')
+
+        url = reverse('assignments:batch_grade_submissions', args=[first.id])
+        response = self.client.post(url, {'grades': [
+            ['not', 'a', 'dict'], {'submission_id': 'abc', 'grade': 50}, {'submission_id': 1.5, 'grade': 50},
+        ]}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['entry'] for error in response.json()['errors']], [1, 2, 3])
+
+        for assignment, submission, grade in zip((first, second), submissions, (60, 80)):
+            url = reverse('assignments:batch_grade_submissions', args=[assignment.id])
+            self.client.post(url, {'record_grades': True, 'grades': [
+                {'submission_id': submission.id, 'grade': grade},
+            ]}, content_type='application/json')
+        self.assertEqual(
+            dict(Grade.objects.filter(student=self.student).values_list('assignment_id', 'points_earned')),
+            {first.id: Decimal('60.00'), second.id: Decimal('80.00')},
+        )
+
+
+class SimilarityTest(AssignmentsTestCase):
+    ESSAY = (
+        'The industrial revolution changed how people lived and worked, moving families from farms '
+        'into crowded cities where factories offered steady wages but long hours and dangerous conditions '
+        'for adults and children alike, which eventually led to the first labour laws.'
+    )
+
+    def test_signatures_and_near_duplicate_pairs(self):
+        copier = CustomUser.objects.create_user(username='copier', password='Testpass123', role='student')
+        honest = CustomUser.objects.create_user(username='honest', password='Testpass123', role='student')
+        assignment = self.add_assignment('Essay', 3)
+        original = AssignmentSubmission.objects.create(assignment=assignment, student=self.student, submission_text=self.ESSAY)
+        copy = AssignmentSubmission.objects.create(
+            assignment=assignment, student=copier,
+            submission_text=self.ESSAY.upper().replace('eventually', 'finally'),
+        )
+        AssignmentSubmission.objects.create(
+            assignment=assignment, student=honest,
+            submission_text='Photosynthesis lets plants turn sunlight, water and carbon dioxide into sugar and oxygen.',
+        )
+        self.assertEqual(assignment.signatures.count(), 3)
+
+        first = minhash(shingles(normalize(self.ESSAY)))
+        self.assertEqual(estimate_similarity(first, first), 1.0)
+
+        self.client.login(username='teacher', password='Testpass123')
+        url = reverse('assignments:submission_similarity', args=[assignment.id])
+        pairs = self.client.get(url, {'threshold': 0.5}).json()['pairs']
+        self.assertEqual(len(pairs), 1)
+        self.assertEqual(pairs[0]['submission_ids'], sorted([original.id, copy.id]))
+        self.assertEqual(set(pairs[0]['students']), {'student', 'copier'})
+
+        copy.submission_text = 'Something entirely different about volcanoes erupting in Iceland last spring.'
+        copy.save()
+        self.assertEqual(self.client.get(url, {'threshold': 0.5}).json()['pairs'], [])
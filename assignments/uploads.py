@@ -0,0 +1,196 @@
+"""
+Chunked, resumable uploads for assignment submission files.
+
+A client starts an upload with the file name, size and SHA-256, then sends
+the file as consecutive chunks. Each chunk is streamed from the request to
+a part file on disk in small blocks, so a request never holds more than one
+block in memory. An interrupted upload resumes from `received_size`. On
+completion the part file is hashed from disk, verified against the declared
+checksum and moved into storage without being copied.
+"""
+import hashlib
+import os
+import re
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import AssignmentSubmission, SubmissionUpload
+
+DEFAULT_CHUNK_SIZE = 5 * 1024 * 1024
+DEFAULT_MAX_SIZE = 100 * 1024 * 1024
+BLOCK_SIZE = 64 * 1024
+
+CONTENT_RANGE_RE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+class UploadError(Exception):
+    """Raised with an HTTP status when an upload request cannot be applied"""
+
+    def __init__(self, message, status=400, **extra):
+        self.status = status
+        self.extra = extra
+        super().__init__(message)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def get_upload_dir():
+    path = _setting('ASSIGNMENT_UPLOAD_DIR', None)
+    if path is None:
+        path = os.path.join(settings.BASE_DIR, 'var', 'uploads')
+    os.makedirs(path, exist_ok=True)
+    return str(path)
+
+
+def chunk_size():
+    return _setting('ASSIGNMENT_UPLOAD_CHUNK_SIZE', DEFAULT_CHUNK_SIZE)
+
+
+def part_path(upload):
+    return os.path.join(get_upload_dir(), f'{upload.pk}.part')
+
+
+def start_upload(assignment, student, filename, total_size, checksum):
+    """Validate the declared file and register a new upload"""
+    filename = os.path.basename((filename or '').strip())
+    checksum = (checksum or '').strip().lower()
+    try:
+        total_size = int(total_size)
+    except (TypeError, ValueError):
+        raise UploadError('size must be an integer')
+    
+    if not filename:
+        raise UploadError('filename is required')
+    if total_size <= 0:
+        raise UploadError('size must be positive')
+    if total_size > _setting('ASSIGNMENT_UPLOAD_MAX_SIZE', DEFAULT_MAX_SIZE):
+        raise UploadError('File is too large', status=413)
+    if not SHA256_RE.match(checksum):
+        raise UploadError('sha256 must be a hex SHA-256 digest')
+    
+    upload = SubmissionUpload.objects.create(
+        assignment=assignment,
+        student=student,
+        filename=filename,
+        total_size=total_size,
+        checksum=checksum,
+    )
+    # Create the part file up front so chunks can always open it for update
+    open(part_path(upload), 'wb').close()
+    return upload
+
+
+def parse_content_range(header, total_size):
+    """Return (start, end) from a 'bytes start-end/total' header"""
+    match = CONTENT_RANGE_RE.match(header or '')
+    if not match:
+        raise UploadError('Content-Range header is required')
+    start, end, total = (int(value) for value in match.groups())
+    if total != total_size or start > end or end >= total_size:
+        raise UploadError('Content-Range does not match the upload', status=416)
+    return start, end
+
+
+def write_chunk(upload_id, stream, content_range):
+    """
+    Append one chunk read from `stream` to the part file. The chunk must
+    start where the previous one stopped; a short read (client went away)
+    still records the bytes received so the next attempt resumes from there.
+    """
+    with transaction.atomic():
+        upload = SubmissionUpload.objects.select_for_update().get(pk=upload_id)
+        start, end = parse_content_range(content_range, upload.total_size)
+        if start != upload.received_size:
+            raise UploadError('Chunk does not continue the upload', status=409,
+                              received=upload.received_size)
+        length = end - start + 1
+        if length > chunk_size():
+            raise UploadError('Chunk is too large', status=413)
+        
+        written = 0
+        with open(part_path(upload), 'r+b') as part:
+            part.seek(start)
+            part.truncate()
+            while written < length:
+                block = stream.read(min(BLOCK_SIZE, length - written))
+                if not block:
+                    break
+                part.write(block)
+                written += len(block)
+        
+        upload.received_size = start + written
+        upload.save(update_fields=['received_size', 'updated_at'])
+    return upload
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class AssembledFile(File):
+    """Part file handed to storage; FileSystemStorage moves it instead of copying"""
+
+    def __init__(self, path, name):
+        super().__init__(open(path, 'rb'), name=name)
+        self.path = path
+
+    def temporary_file_path(self):
+        return self.path
+
+
+def discard_upload(upload):
+    try:
+        os.remove(part_path(upload))
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def complete_upload(upload, submission_text=None):
+    """Verify the assembled file and attach it to the student's submission"""
+    if upload.received_size != upload.total_size:
+        raise UploadError('Upload is incomplete', status=409, received=upload.received_size)
+    
+    path = part_path(upload)
+    if file_sha256(path) != upload.checksum:
+        discard_upload(upload)
+        raise UploadError('Checksum mismatch, the upload has been discarded', status=422)
+    
+    with transaction.atomic():
+        submission, _ = AssignmentSubmission.objects.get_or_create(
+            assignment=upload.assignment,
+            student=upload.student,
+        )
+        if submission_text is not None:
+            submission.submission_text = submission_text
+        assembled = AssembledFile(path, upload.filename)
+        # Already verified, so blob storage can move it without hashing again
+        assembled.sha256 = upload.checksum
+        try:
+            submission.submission_file.save(upload.filename, assembled, save=False)
+        finally:
+            assembled.close()
+        submission.submitted_at = timezone.now()
+        submission.save()
+        discard_upload(upload)
+    return submission
+
+
+def purge_stale_uploads(max_age_hours=24):
+    """Remove uploads that have not received a chunk for `max_age_hours`"""
+    cutoff = timezone.now() - timedelta(hours=max_age_hours)
+    stale = list(SubmissionUpload.objects.filter(updated_at__lt=cutoff))
+    for upload in stale:
+        discard_upload(upload)
+    return len(stale)
@@ -11,9 +11,17 @@ urlpatterns = [
     path('student/', views.student_assignments, name='student_assignments'),
     path('<int:assignment_id>/', views.assignment_detail, name='assignment_detail'),
     path('<int:assignment_id>/submit/', views.submit_assignment, name='submit_assignment'),
+    path('<int:assignment_id>/uploads/', views.start_submission_upload, name='start_submission_upload'),
+    path('uploads/<uuid:upload_id>/', views.submission_upload, name='submission_upload'),
+    path('uploads/<uuid:upload_id>/complete/', views.complete_submission_upload, name='complete_submission_upload'),
+    path('files/<str:digest>/<str:filename>', views.download_blob, name='download_blob'),
     
     # Teacher views
     path('teacher/', views.teacher_assignments, name='teacher_assignments'),
+    path('teacher/grading-queue/', views.teacher_grading_queue, name='teacher_grading_queue'),
     path('create/', views.create_assignment, name='create_assignment'),
     path('<int:assignment_id>/submissions/', views.assignment_submissions, name='assignment_submissions'),
+    path('<int:assignment_id>/submissions/archive/', views.download_submissions_archive, name='download_submissions_archive'),
+    path('<int:assignment_id>/submissions/grade/', views.batch_grade_submissions, name='batch_grade_submissions'),
+    path('<int:assignment_id>/submissions/similarity/', views.submission_similarity, name='submission_similarity'),
 ]
\ No newline at end of file
@@ -3,10 +3,23 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.utils import timezone
 from django.core.paginator import Paginator
-from .models import Assignment, AssignmentSubmission
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils.http import content_disposition_header
+from django.views.decorators.http import require_http_methods
+import json
+from .models import Assignment, AssignmentSubmission, SubmissionUpload, StoredBlob
+from .downloads import blob_response
+from .storage import parse_blob_name
+from .archive import archive_filename, iter_submission_archive
+from .grading import GradingError, grade_submissions
+from .similarity import DEFAULT_THRESHOLD, find_similar_submissions
+from .uploads import UploadError, chunk_size, start_upload, write_chunk, complete_upload
+from .queries import (student_assignment_queryset, submission_summary,
+                      with_submission_progress, grading_queue)
 from users.models import CustomUser
 from classroom.models import Classroom
 from subject.models import Subject
+from teacher.models import Assignment as LegacyAssignment
 
 @login_required
 def assignments_router(request):
@@ -26,33 +39,32 @@ def student_assignments(request):
         messages.error(request, 'Access denied.')
         return redirect('dashboard')
     
-    # Get student's classroom assignments
+    # Get student's classroom assignments with submission state in one query
     student_profile = request.user.student_profile
-    if not student_profile.classroom:
-        assignments = []
+    if not student_profile.classroom_id:
+        assignments = Assignment.objects.none()
     else:
-        assignments = Assignment.objects.filter(
-            classroom=student_profile.classroom,
-            status='published'
-        ).order_by('-due_date')
+        assignments = student_assignment_queryset(request.user, student_profile.classroom_id)
     
-    # Get submissions for this student
-    submissions = AssignmentSubmission.objects.filter(student=request.user)
-    submission_dict = {sub.assignment.id: sub for sub in submissions}
+    # Pagination
+    paginator = Paginator(assignments, 20)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
     
     # Combine assignments with submission status
     assignment_data = []
-    for assignment in assignments:
-        submission = submission_dict.get(assignment.id)
+    for assignment in page_obj:
+        submission = submission_summary(assignment)
         assignment_data.append({
             'assignment': assignment,
             'submission': submission,
-            'status': submission.status if submission else 'not_submitted',
-            'is_overdue': assignment.due_date < timezone.now() and not submission,
+            'status': submission['status'] if submission else 'not_submitted',
+            'is_overdue': assignment.is_overdue,
         })
     
     context = {
         'assignment_data': assignment_data,
+        'page_obj': page_obj,
         'student': request.user,
     }
     return render(request, 'assignments/student_list.html', context)
@@ -137,6 +149,113 @@ def submit_assignment(request, assignment_id):
     }
     return render(request, 'assignments/submit.html', context)
 
+def _upload_error(error):
+    return JsonResponse({'success': False, 'message': str(error), **error.extra}, status=error.status)
+
+def _upload_status(upload):
+    return {
+        'success': True,
+        'upload_id': str(upload.pk),
+        'filename': upload.filename,
+        'size': upload.total_size,
+        'received': upload.received_size,
+        'chunk_size': chunk_size(),
+    }
+
+@login_required
+@require_http_methods(["POST"])
+def start_submission_upload(request, assignment_id):
+    """
+    Start a chunked upload of a submission file. Expects JSON
+    {"filename", "size", "sha256"}; chunks are then PUT to the upload URL.
+    """
+    assignment = get_object_or_404(Assignment, id=assignment_id)
+    profile = getattr(request.user, 'student_profile', None) if request.user.role == 'student' else None
+    if profile is None or profile.classroom_id != assignment.classroom_id:
+        return JsonResponse({'success': False, 'message': 'You cannot submit to this assignment.'}, status=403)
+    
+    try:
+        data = json.loads(request.body)
+        upload = start_upload(assignment, request.user, data.get('filename'), data.get('size'), data.get('sha256'))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid JSON'}, status=400)
+    except UploadError as e:
+        return _upload_error(e)
+    
+    return JsonResponse(_upload_status(upload), status=201)
+
+@login_required
+@require_http_methods(["GET", "PUT"])
+def submission_upload(request, upload_id):
+    """
+    GET reports how many bytes were received so a client can resume; PUT
+    appends the raw request body at the offset given by Content-Range.
+    """
+    upload = get_object_or_404(SubmissionUpload, pk=upload_id, student=request.user)
+    if request.method == 'GET':
+        return JsonResponse(_upload_status(upload))
+    
+    try:
+        # Read the body as a stream; request.body would buffer the whole chunk
+        upload = write_chunk(upload.pk, request, request.META.get('HTTP_CONTENT_RANGE'))
+    except UploadError as e:
+        return _upload_error(e)
+    
+    return JsonResponse(_upload_status(upload))
+
+@login_required
+@require_http_methods(["POST"])
+def complete_submission_upload(request, upload_id):
+    """Verify the checksum and attach the assembled file to the submission"""
+    upload = get_object_or_404(
+        SubmissionUpload.objects.select_related('assignment', 'student'),
+        pk=upload_id,
+        student=request.user,
+    )
+    try:
+        submission = complete_upload(upload, request.POST.get('submission_text'))
+    except UploadError as e:
+        return _upload_error(e)
+    
+    return JsonResponse({
+        'success': True,
+        'submission_id': submission.id,
+        'file': submission.submission_file.name,
+    })
+
+@login_required
+@require_http_methods(["GET", "HEAD"])
+def download_blob(request, digest, filename):
+    """Serve an assignment file from blob storage with ETag and Range support"""
+    blob = get_object_or_404(StoredBlob, digest=digest, ref_count__gt=0)
+    stored_name = _accessible_blob_name(request.user, digest, filename)
+    if stored_name is None:
+        raise Http404
+    return blob_response(request, blob, parse_blob_name(stored_name)[1])
+
+def _accessible_blob_name(user, digest, filename):
+    """Stored name of a submission or assignment file with this digest that `user` may see"""
+    prefix = f'cas/{digest}/'
+    submissions = AssignmentSubmission.objects.filter(submission_file__startswith=prefix)
+    assignments = LegacyAssignment.objects.filter(file__startswith=prefix)
+    if user.role == 'teacher':
+        submissions = submissions.filter(assignment__teacher=user)
+        assignments = assignments.filter(classroom__teacher=user)
+    elif user.role == 'student':
+        submissions = submissions.filter(student=user)
+        profile = getattr(user, 'student_profile', None)
+        if profile and profile.classroom_id:
+            assignments = assignments.filter(classroom_id=profile.classroom_id)
+        else:
+            assignments = assignments.none()
+    elif user.role != 'admin':
+        return None
+
+    names = list(submissions.values_list('submission_file', flat=True)[:20])
+    names += assignments.values_list('file', flat=True)[:20]
+    # The same content may be stored under several names; prefer the one in the URL
+    return next((name for name in names if name == f'{prefix}{filename}'), names[0] if names else None)
+
 @login_required
 def teacher_assignments(request):
     """View assignments for teachers"""
@@ -151,6 +270,7 @@ def teacher_assignments(request):
         assignments = Assignment.objects.all()
     
     assignments = assignments.select_related('classroom', 'subject').order_by('-created_at')
+    assignments = with_submission_progress(assignments)
     
     # Pagination
     paginator = Paginator(assignments, 10)
@@ -160,9 +280,34 @@ def teacher_assignments(request):
     context = {
         'page_obj': page_obj,
         'assignments': assignments,
+        'now': timezone.now(),
     }
     return render(request, 'assignments/teacher_list.html', context)
 
+@login_required
+def teacher_grading_queue(request):
+    """Assignments waiting for grading, oldest ungraded submission first"""
+    if request.user.role not in ['teacher', 'admin']:
+        messages.error(request, 'Access denied.')
+        return redirect('dashboard')
+    
+    if request.user.role == 'teacher':
+        assignments = Assignment.objects.filter(teacher=request.user)
+    else:
+        assignments = Assignment.objects.all()
+    
+    queue = grading_queue(assignments.select_related('classroom', 'subject'))
+    
+    paginator = Paginator(queue, 20)
+    page_number = request.GET.get('page')
+    page_obj = paginator.get_page(page_number)
+    
+    context = {
+        'page_obj': page_obj,
+        'now': timezone.now(),
+    }
+    return render(request, 'assignments/grading_queue.html', context)
+
 @login_required
 def create_assignment(request):
     """Create new assignment"""
@@ -225,4 +370,92 @@ def assignment_submissions(request, assignment_id):
         'assignment': assignment,
         'submissions': submissions,
     }
-    return render(request, 'assignments/submissions.html', context)
\ No newline at end of file
+    return render(request, 'assignments/submissions.html', context)
+
+@login_required
+def download_submissions_archive(request, assignment_id):
+    """Stream a ZIP of every submission's file and text for an assignment"""
+    assignment = get_object_or_404(Assignment, id=assignment_id)
+    
+    if request.user.role not in ['teacher', 'admin'] or (
+        request.user.role == 'teacher' and assignment.teacher_id != request.user.id
+    ):
+        messages.error(request, 'You can only download submissions for your own assignments.')
+        return redirect('assignments:teacher_assignments')
+    
+    submissions = (
+        AssignmentSubmission.objects.filter(assignment=assignment)
+        .select_related('student')
+        .order_by('student__last_name', 'student__first_name', 'student__username')
+    )
+    response = StreamingHttpResponse(
+        iter_submission_archive(assignment, submissions.iterator()),
+        content_type='application/zip',
+    )
+    response['Content-Disposition'] = content_disposition_header(True, archive_filename(assignment))
+    return response
+
+
+@login_required
+@require_http_methods(["POST"])
+def batch_grade_submissions(request, assignment_id):
+    """
+    Grade many submissions at once from a JSON body:
+    {"grades": [{"submission_id", "grade", "feedback"}, ...],
+     "apply_late_penalty": true, "record_grades": false, "status": "graded"}
+    """
+    assignment = get_object_or_404(Assignment, id=assignment_id)
+    if request.user.role not in ['teacher', 'admin'] or (
+        request.user.role == 'teacher' and assignment.teacher_id != request.user.id
+    ):
+        return JsonResponse({'success': False, 'message': 'Permission denied'}, status=403)
+    
+    try:
+        data = json.loads(request.body)
+        entries = data['grades']
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'success': False, 'message': 'Invalid grading data'}, status=400)
+    
+    try:
+        graded = grade_submissions(
+            assignment,
+            request.user,
+            entries,
+            apply_late_penalty=data.get('apply_late_penalty', True),
+            record_grades=data.get('record_grades', False),
+            status=data.get('status', 'graded'),
+        )
+    except GradingError as e:
+        return JsonResponse({'success': False, 'message': str(e), 'errors': e.errors}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'graded': len(graded),
+        'grades': {submission.id: str(submission.grade) for submission in graded},
+    })
+
+
+@login_required
+def submission_similarity(request, assignment_id):
+    """Near-duplicate submission texts of an assignment, most similar first"""
+    assignment = get_object_or_404(Assignment, id=assignment_id)
+    if request.user.role not in ['teacher', 'admin'] or (
+        request.user.role == 'teacher' and assignment.teacher_id != request.user.id
+    ):
+        return JsonResponse({'success': False, 'message': 'Permission denied'}, status=403)
+    
+    try:
+        threshold = float(request.GET.get('threshold', DEFAULT_THRESHOLD))
+    except ValueError:
+        return JsonResponse({'success': False, 'message': 'Invalid threshold'}, status=400)
+    
+    pairs = find_similar_submissions(assignment, threshold)
+    students = dict(
+        AssignmentSubmission.objects.filter(
+            id__in={submission_id for pair in pairs for submission_id in pair['submission_ids']}
+        ).values_list('id', 'student__username')
+    )
+    for pair in pairs:
+        pair['students'] = [students.get(submission_id) for submission_id in pair['submission_ids']]
+    
+    return JsonResponse({'success': True, 'threshold': threshold, 'pairs': pairs})
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_studentcustomattendance'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancesession',
+            index=models.Index(fields=['classroom', 'start_time'], name='attendance_class_start_idx'),
+        ),
+    ]
@@ -50,6 +50,10 @@ class AttendanceSession(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Sessions of a classroom in a time range (student timelines)
+            models.Index(fields=['classroom', 'start_time'], name='attendance_class_start_idx'),
+        ]
         
     def __str__(self):
         return f"{self.title} - {self.classroom.name}"
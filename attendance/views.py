@@ -6,6 +6,7 @@ from django.views.decorators.http import require_http_methods
 from django.utils import timezone
 from django.db.models import Q, Count
 from django.core.paginator import Paginator
+from smart_classroom.pagination import KeysetPaginator
 from .models import AttendanceSession, AttendanceRecord, AttendanceReport, StudentTotalSessions, StudentCustomAttendance
 from classroom.models import Classroom
 from subject.models import Subject
@@ -166,9 +167,8 @@ def attendance_sessions_list(request):
         sessions = sessions.filter(start_time__date=date_filter)
     
     # Pagination
-    paginator = Paginator(sessions, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(sessions, 10, ordering=('-created_at', '-id'))
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     # Get filter options
     classrooms = Classroom.objects.all()
@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 import uuid
+from users.ids import next_id, CLASSROOM
 
 class Classroom(models.Model):
     classroom_id = models.CharField(max_length=20, unique=True, blank=True, null=True)
@@ -10,9 +11,7 @@ class Classroom(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.classroom_id:
-            # Generate unique classroom ID
-            import random
-            self.classroom_id = f"CLS{random.randint(10000000, 99999999)}"
+            self.classroom_id = next_id(CLASSROOM)
         super().save(*args, **kwargs)
 
     def __str__(self):
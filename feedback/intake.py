@@ -0,0 +1,195 @@
+"""
+Buffered intake for public/anonymous feedback sessions.
+
+Validated responses are appended to a local SQLite spool file instead of
+being written to the main database one INSERT at a time. The spool is
+drained in batches with bulk_create, either by the request that fills a
+batch, once the oldest entry is older than FEEDBACK_INTAKE_MAX_DELAY, or
+by the flush_feedback_intake management command.
+"""
+from contextlib import contextmanager
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+
+from django.conf import settings
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_MAX_DELAY_SECONDS = 30
+# Claims older than this belong to a flusher that died and can be retaken
+CLAIM_TIMEOUT_SECONDS = 300
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def get_spool_path():
+    path = _setting('FEEDBACK_INTAKE_SPOOL', None)
+    if path is None:
+        path = os.path.join(settings.BASE_DIR, 'var', 'feedback_intake.sqlite3')
+    return str(path)
+
+
+def is_buffered_session(session):
+    """Public sessions that accept anonymous responses go through the spool"""
+    return session.visibility == 'public' and session.allow_anonymous
+
+
+class FeedbackSpool:
+    """Durable local queue of pending FeedbackResponse rows"""
+
+    def __init__(self, path=None):
+        self.path = path or get_spool_path()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS spool ('
+                ' id INTEGER PRIMARY KEY AUTOINCREMENT,'
+                ' session_id INTEGER NOT NULL,'
+                ' payload TEXT NOT NULL,'
+                ' created_at REAL NOT NULL,'
+                ' claimed_by TEXT,'
+                ' claimed_at REAL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS spool_claimed ON spool (claimed_by, id)')
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute('PRAGMA synchronous=NORMAL')
+            yield conn
+        finally:
+            conn.close()
+
+    def enqueue(self, session_id, payload):
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO spool (session_id, payload, created_at) VALUES (?, ?, ?)',
+                (session_id, json.dumps(payload), time.time()),
+            )
+
+    def pending_stats(self):
+        """Return (pending entries, age in seconds of the oldest one)"""
+        with self._connect() as conn:
+            count, oldest = conn.execute(
+                'SELECT COUNT(*), MIN(created_at) FROM spool WHERE claimed_by IS NULL'
+            ).fetchone()
+        return count, (time.time() - oldest) if oldest is not None else 0
+
+    def claim(self, limit):
+        """Atomically claim up to `limit` entries; returns (token, rows)"""
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.execute(
+                'UPDATE spool SET claimed_by = NULL, claimed_at = NULL '
+                'WHERE claimed_by IS NOT NULL AND claimed_at < ?',
+                (now - CLAIM_TIMEOUT_SECONDS,),
+            )
+            conn.execute(
+                'UPDATE spool SET claimed_by = ?, claimed_at = ? WHERE id IN ('
+                ' SELECT id FROM spool WHERE claimed_by IS NULL ORDER BY id LIMIT ?)',
+                (token, now, limit),
+            )
+            rows = conn.execute(
+                'SELECT id, session_id, payload FROM spool WHERE claimed_by = ? ORDER BY id',
+                (token,),
+            ).fetchall()
+            conn.execute('COMMIT')
+        return token, rows
+
+    def release(self, token):
+        with self._connect() as conn:
+            conn.execute('UPDATE spool SET claimed_by = NULL, claimed_at = NULL WHERE claimed_by = ?', (token,))
+
+    def acknowledge(self, token):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM spool WHERE claimed_by = ?', (token,))
+
+
+_spool = None
+
+
+def get_spool():
+    global _spool
+    if _spool is None or _spool.path != get_spool_path():
+        _spool = FeedbackSpool()
+    return _spool
+
+
+def enqueue_response(session, response_data, ip_address=None, user_agent='', completion_time=None):
+    """Spool a validated anonymous response and flush if a batch is ready"""
+    spool = get_spool()
+    spool.enqueue(session.id, {
+        'response_data': response_data,
+        'ip_address': ip_address,
+        'user_agent': user_agent,
+        'completion_time_seconds': completion_time,
+    })
+
+    batch_size = _setting('FEEDBACK_INTAKE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    max_delay = _setting('FEEDBACK_INTAKE_MAX_DELAY', DEFAULT_MAX_DELAY_SECONDS)
+    pending, oldest_age = spool.pending_stats()
+    if pending >= batch_size or oldest_age >= max_delay:
+        try:
+            flush(batch_size=batch_size, max_batches=1)
+        except Exception as e:
+            # Entries stay in the spool and are retried by the next flush
+            logger.error(f"Error flushing feedback intake spool: {str(e)}")
+
+
+def flush(batch_size=None, max_batches=None):
+    """Drain spooled responses into FeedbackResponse with bulk_create"""
+    from .models import FeedbackResponse, FeedbackSession
+
+    spool = get_spool()
+    batch_size = batch_size or _setting('FEEDBACK_INTAKE_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    written = 0
+    batches = 0
+
+    while max_batches is None or batches < max_batches:
+        token, rows = spool.claim(batch_size)
+        if not rows:
+            break
+        batches += 1
+
+        session_ids = {session_id for _, session_id, _ in rows}
+        existing = set(FeedbackSession.objects.filter(id__in=session_ids).values_list('id', flat=True))
+
+        responses = []
+        for _, session_id, payload in rows:
+            if session_id not in existing:
+                continue
+            data = json.loads(payload)
+            responses.append(FeedbackResponse(
+                session_id=session_id,
+                respondent=None,
+                response_data=data['response_data'],
+                ip_address=data.get('ip_address'),
+                user_agent=data.get('user_agent') or '',
+                completion_time_seconds=data.get('completion_time_seconds'),
+                is_complete=True,
+            ))
+
+        try:
+            with transaction.atomic():
+                FeedbackResponse.objects.bulk_create(responses, batch_size=batch_size)
+        except Exception:
+            spool.release(token)
+            raise
+        spool.acknowledge(token)
+        written += len(responses)
+
+    return written
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from feedback.intake import flush, get_spool
+
+
+class Command(BaseCommand):
+    help = 'Flush buffered anonymous feedback responses into the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None, help='Rows per bulk insert')
+
+    def handle(self, *args, **options):
+        pending, _ = get_spool().pending_stats()
+        self.stdout.write(f'Flushing {pending} spooled feedback responses...')
+
+        written = flush(batch_size=options['batch_size'])
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Wrote {written} feedback responses'))
@@ -0,0 +1,205 @@
+"""
+Compiled representation of FeedbackTemplate question schemas.
+
+FeedbackTemplate.questions is free-form JSON. Compiling it once per template
+version gives every respond/aggregation path the same typed view of the
+questions, so submissions are validated and normalized in a single pass
+over the known questions instead of scanning every POST key.
+"""
+from collections import OrderedDict
+import threading
+
+from django.core.exceptions import ValidationError
+
+QUESTION_PREFIX = 'question_'
+
+EMOJI_CHOICES = ['very_sad', 'sad', 'neutral', 'happy', 'very_happy']
+YES_NO_CHOICES = ['yes', 'no']
+
+# Column types used by aggregation
+NUMERIC = 'numeric'
+CATEGORICAL = 'categorical'
+TEXT = 'text'
+
+DEFAULT_SCALES = {
+    'rating': 5,
+    'scale': 10,
+}
+
+MAX_CACHED_SCHEMAS = 256
+
+
+def _clean_numeric(question, raw):
+    try:
+        value = int(raw)
+    except (TypeError, ValueError):
+        raise ValidationError(f'"{raw}" is not a number.')
+    if not 1 <= value <= question.scale:
+        raise ValidationError(f'Value must be between 1 and {question.scale}.')
+    return value
+
+
+def _clean_choice(question, raw):
+    if raw not in question.choices:
+        raise ValidationError(f'"{raw}" is not a valid choice.')
+    return raw
+
+
+def _clean_text(question, raw):
+    return raw.strip()
+
+
+class CompiledQuestion:
+    """A single template question with its type, validator and column type"""
+    __slots__ = ('index', 'key', 'type', 'text', 'required', 'scale',
+                 'choices', 'column_type', '_validator')
+
+    def __init__(self, index, definition):
+        self.index = index
+        self.key = f'{QUESTION_PREFIX}{index}'
+        self.type = definition.get('type', 'text')
+        self.text = definition.get('question', '')
+        self.required = bool(definition.get('required', False))
+        self.scale = None
+        self.choices = ()
+
+        if self.type in DEFAULT_SCALES:
+            self.scale = int(definition.get('scale') or DEFAULT_SCALES[self.type])
+            self.column_type = NUMERIC
+            self._validator = _clean_numeric
+        elif self.type == 'multiple_choice':
+            self.choices = tuple(str(option) for option in definition.get('options', []))
+            self.column_type = CATEGORICAL
+            self._validator = _clean_choice
+        elif self.type == 'yes_no':
+            self.choices = tuple(YES_NO_CHOICES)
+            self.column_type = CATEGORICAL
+            self._validator = _clean_choice
+        elif self.type == 'emoji':
+            self.choices = tuple(EMOJI_CHOICES)
+            self.column_type = CATEGORICAL
+            self._validator = _clean_choice
+        else:
+            self.column_type = TEXT
+            self._validator = _clean_text
+
+    def clean(self, raw):
+        """Validate and normalize a raw submitted value; None means unanswered"""
+        if raw is None or (isinstance(raw, str) and not raw.strip()):
+            if self.required:
+                raise ValidationError('This question is required.')
+            return None
+        return self._validator(self, str(raw))
+
+
+class CompiledSchema:
+    """Typed, immutable view of a FeedbackTemplate's questions"""
+
+    def __init__(self, template_id, version, questions):
+        self.template_id = template_id
+        self.version = version
+        self.questions = tuple(
+            CompiledQuestion(index, definition)
+            for index, definition in enumerate(questions or [])
+            if isinstance(definition, dict)
+        )
+        self.keys = tuple(question.key for question in self.questions)
+
+    def __len__(self):
+        return len(self.questions)
+
+    def clean(self, data):
+        """
+        Validate a submission in one pass over the compiled questions.
+        Returns (response_data, errors); unanswered optional questions are
+        left out of response_data.
+        """
+        response_data = {}
+        errors = {}
+        for question in self.questions:
+            try:
+                value = question.clean(data.get(question.key))
+            except ValidationError as e:
+                errors[question.key] = e.messages
+                continue
+            if value is not None:
+                response_data[question.key] = value
+        return response_data, errors
+
+    def aggregate(self, responses):
+        """
+        Summarize an iterable of response_data dicts per question.
+        Numeric questions get count/average/min/max, categorical questions
+        get per-choice counts and text questions get an answer count.
+        """
+        columns = {question.key: [] for question in self.questions}
+        for data in responses:
+            if not data:
+                continue
+            for key, values in columns.items():
+                value = data.get(key)
+                if value not in (None, ''):
+                    values.append(value)
+
+        summary = {}
+        for question in self.questions:
+            values = columns[question.key]
+            stats = {
+                'question': question.text,
+                'type': question.type,
+                'count': len(values),
+            }
+            if question.column_type == NUMERIC:
+                numbers = []
+                for value in values:
+                    try:
+                        numbers.append(int(value))
+                    except (TypeError, ValueError):
+                        continue
+                stats['count'] = len(numbers)
+                stats['average'] = round(sum(numbers) / len(numbers), 2) if numbers else None
+                stats['min'] = min(numbers) if numbers else None
+                stats['max'] = max(numbers) if numbers else None
+                stats['scale'] = question.scale
+            elif question.column_type == CATEGORICAL:
+                counts = dict.fromkeys(question.choices, 0)
+                for value in values:
+                    if value in counts:
+                        counts[value] += 1
+                stats['choices'] = counts
+            summary[question.key] = stats
+        return summary
+
+
+EMPTY_SCHEMA = CompiledSchema(None, None, [])
+
+_schema_cache = OrderedDict()
+_schema_cache_lock = threading.Lock()
+
+
+def get_compiled_schema(template):
+    """
+    Return the CompiledSchema for a FeedbackTemplate, compiling it at most
+    once per (template id, updated_at).
+    """
+    if template is None:
+        return EMPTY_SCHEMA
+
+    key = (template.pk, template.updated_at)
+    with _schema_cache_lock:
+        schema = _schema_cache.get(key)
+        if schema is not None:
+            _schema_cache.move_to_end(key)
+            return schema
+
+    schema = CompiledSchema(template.pk, template.updated_at, template.questions)
+    with _schema_cache_lock:
+        _schema_cache[key] = schema
+        while len(_schema_cache) > MAX_CACHED_SCHEMAS:
+            _schema_cache.popitem(last=False)
+    return schema
+
+
+def clear_schema_cache():
+    with _schema_cache_lock:
+        _schema_cache.clear()
@@ -1,3 +1,117 @@
-from django.test import TestCase
+import os
+import tempfile
 
-# Create your tests here.
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from users.models import CustomUser
+from .models import FeedbackCategory, FeedbackTemplate, FeedbackSession, FeedbackResponse
+from .schema import get_compiled_schema, clear_schema_cache
+from . import intake
+
+
+class CompiledSchemaTest(TestCase):
+    def setUp(self):
+        clear_schema_cache()
+        self.teacher = CustomUser.objects.create_user(username='teacher', password='Testpass123', role='teacher')
+        self.category = FeedbackCategory.objects.create(name='Course')
+        self.template = FeedbackTemplate.objects.create(
+            title='Evaluation',
+            description='Course evaluation',
+            template_type='teacher_to_student',
+            category=self.category,
+            created_by=self.teacher,
+            questions=[
+                {'type': 'rating', 'question': 'Rate the course', 'required': True, 'scale': 5},
+                {'type': 'multiple_choice', 'question': 'Best method', 'options': ['Lectures', 'Labs']},
+                {'type': 'text', 'question': 'Comments', 'required': False},
+            ],
+        )
+
+    def test_schema_is_cached_per_version(self):
+        schema = get_compiled_schema(self.template)
+        self.assertIs(schema, get_compiled_schema(self.template))
+
+        self.template.questions = self.template.questions[:1]
+        self.template.save()
+        recompiled = get_compiled_schema(self.template)
+        self.assertIsNot(schema, recompiled)
+        self.assertEqual(len(recompiled), 1)
+
+    def test_clean_normalizes_and_validates(self):
+        schema = get_compiled_schema(self.template)
+
+        data, errors = schema.clean({'question_0': '4', 'question_1': 'Labs', 'question_2': '  ok ', 'other': 'x'})
+        self.assertEqual(errors, {})
+        self.assertEqual(data, {'question_0': 4, 'question_1': 'Labs', 'question_2': 'ok'})
+
+        data, errors = schema.clean({'question_0': '9', 'question_1': 'Naps'})
+        self.assertEqual(set(errors), {'question_0', 'question_1'})
+
+        data, errors = schema.clean({})
+        self.assertEqual(set(errors), {'question_0'})
+
+    def test_aggregate_uses_typed_columns(self):
+        schema = get_compiled_schema(self.template)
+        summary = schema.aggregate([
+            {'question_0': 4, 'question_1': 'Labs'},
+            {'question_0': '2', 'question_1': 'Labs', 'question_2': 'fine'},
+            {},
+        ])
+        self.assertEqual(summary['question_0']['average'], 3.0)
+        self.assertEqual(summary['question_0']['count'], 2)
+        self.assertEqual(summary['question_1']['choices'], {'Lectures': 0, 'Labs': 2})
+        self.assertEqual(summary['question_2']['count'], 1)
+
+
+class FeedbackIntakeTest(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        spool_path = os.path.join(self.tmpdir.name, 'spool.sqlite3')
+        settings_override = override_settings(FEEDBACK_INTAKE_SPOOL=spool_path, FEEDBACK_INTAKE_BATCH_SIZE=3)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        teacher = CustomUser.objects.create_user(username='teacher', password='Testpass123', role='teacher')
+        category = FeedbackCategory.objects.create(name='Survey')
+        template = FeedbackTemplate.objects.create(
+            title='Campus survey',
+            description='Campus-wide survey',
+            template_type='self_assessment',
+            category=category,
+            created_by=teacher,
+            questions=[{'type': 'rating', 'question': 'Overall', 'required': True, 'scale': 5}],
+        )
+        self.session = FeedbackSession.objects.create(
+            title='Campus survey',
+            category=category,
+            template=template,
+            created_by=teacher,
+            status='active',
+            visibility='public',
+            allow_anonymous=True,
+            allow_multiple_responses=True,
+        )
+
+    def test_responses_are_buffered_and_flushed_in_batches(self):
+        url = reverse('feedback:feedback_public_respond', args=[self.session.id])
+        for rating in ('4', '5'):
+            self.client.post(url, {'question_0': rating})
+        self.assertEqual(FeedbackResponse.objects.count(), 0)
+
+        self.client.post(url, {'question_0': '3'})
+        self.assertEqual(FeedbackResponse.objects.count(), 3)
+        self.assertFalse(FeedbackResponse.objects.filter(respondent__isnull=False).exists())
+
+        self.client.post(url, {'question_0': '1'})
+        self.assertEqual(intake.flush(), 1)
+        self.assertEqual(intake.get_spool().pending_stats()[0], 0)
+        self.assertEqual(FeedbackResponse.objects.count(), 4)
+
+    def test_invalid_answers_are_shown_on_the_form(self):
+        url = reverse('feedback:feedback_public_respond', args=[self.session.id])
+        response = self.client.post(url, {'question_0': '9'})
+        self.assertContains(response, 'Value must be between 1 and 5.')
+        self.assertContains(response, 'question-card has-error')
+        self.assertEqual(FeedbackResponse.objects.count(), 0)
@@ -15,6 +15,7 @@ urlpatterns = [
     path('sessions/create/', views.feedback_session_create, name='feedback_session_create'),
     path('sessions/<int:session_id>/', views.feedback_session_detail, name='feedback_session_detail'),
     path('sessions/<int:session_id>/respond/', views.feedback_respond, name='feedback_respond'),
+    path('sessions/<int:session_id>/public-respond/', views.feedback_public_respond, name='feedback_public_respond'),
     
     # Templates
     path('templates/', views.feedback_templates, name='feedback_templates'),
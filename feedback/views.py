@@ -5,9 +5,12 @@ from django.http import JsonResponse
 from django.utils import timezone
 from django.db.models import Q, Count, Avg
 from django.core.paginator import Paginator
+from smart_classroom.pagination import KeysetPaginator
 from .models import (FeedbackCategory, FeedbackTemplate, FeedbackSession, 
                      FeedbackResponse, FeedbackComment, FeedbackAnalytics, 
                      FeedbackNotification)
+from .schema import get_compiled_schema
+from .intake import enqueue_response, is_buffered_session
 from classroom.models import Classroom
 from subject.models import Subject
 from users.models import CustomUser
@@ -141,9 +144,8 @@ def feedback_sessions_list(request):
         sessions = sessions.filter(visibility=visibility_filter)
     
     # Pagination
-    paginator = Paginator(sessions, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = KeysetPaginator(sessions, 10, ordering=('-created_at', '-id'))
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     # Get filter options
     categories = FeedbackCategory.objects.filter(is_active=True)
@@ -266,6 +268,13 @@ def feedback_session_detail(request, session_id):
                 completion_times = [r.completion_time_seconds for r in responses if r.completion_time_seconds]
                 if completion_times:
                     analytics.average_completion_time = sum(completion_times) / len(completion_times)
+            schema = get_compiled_schema(session.template)
+            if len(schema):
+                analytics.detailed_metrics = {
+                    'questions': schema.aggregate(
+                        session.feedback_responses.values_list('response_data', flat=True)
+                    )
+                }
             analytics.save()
     
     context = {
@@ -302,13 +311,21 @@ def feedback_respond(request, session_id):
         messages.info(request, 'You have already responded to this session.')
         return redirect('feedback:feedback_session_detail', session_id=session.id)
     
+    schema = get_compiled_schema(session.template)
+    
     if request.method == 'POST':
         try:
-            # Get response data from form
-            response_data = {}
-            for key, value in request.POST.items():
-                if key.startswith('question_'):
-                    response_data[key] = value
+            # Validate and normalize answers against the compiled template schema
+            response_data, errors = schema.clean(request.POST)
+            if errors:
+                messages.error(request, 'Please answer all required questions with valid values.')
+                context = {
+                    'session': session,
+                    'existing_response': existing_response,
+                    'errors': errors,
+                    'question_errors': _question_errors(schema, errors),
+                }
+                return render(request, 'feedback/respond.html', context)
             
             # Calculate completion time (if start time was tracked)
             completion_time = None
@@ -347,6 +364,63 @@ def feedback_respond(request, session_id):
     }
     return render(request, 'feedback/respond.html', context)
 
+def _question_errors(schema, errors):
+    """Errors of schema.clean() by question index, for the respond form"""
+    return [
+        {'index': question.index, 'messages': errors[question.key]}
+        for question in schema.questions
+        if question.key in errors
+    ]
+
+def feedback_public_respond(request, session_id):
+    """Respond to a public anonymous session through the buffered intake queue"""
+    session = get_object_or_404(FeedbackSession, id=session_id)
+    
+    if not is_buffered_session(session):
+        return redirect('feedback:feedback_respond', session_id=session.id)
+    
+    if not session.is_active:
+        messages.error(request, 'This feedback session is no longer active.')
+        return redirect('feedback:feedback_list')
+    
+    responded_key = f'feedback_responded_{session_id}'
+    if request.session.get(responded_key) and not session.allow_multiple_responses:
+        messages.info(request, 'You have already responded to this session.')
+        return redirect('feedback:feedback_list')
+    
+    schema = get_compiled_schema(session.template)
+    
+    if request.method == 'POST':
+        response_data, errors = schema.clean(request.POST)
+        if errors:
+            messages.error(request, 'Please answer all required questions with valid values.')
+            return render(request, 'feedback/respond.html', {
+                'session': session,
+                'errors': errors,
+                'question_errors': _question_errors(schema, errors),
+            })
+        
+        completion_time = None
+        start_time = request.session.get(f'feedback_start_{session_id}')
+        if start_time:
+            completion_time = int((timezone.now().timestamp() - start_time))
+        
+        enqueue_response(
+            session,
+            response_data,
+            ip_address=request.META.get('REMOTE_ADDR'),
+            user_agent=request.META.get('HTTP_USER_AGENT', ''),
+            completion_time=completion_time,
+        )
+        request.session[responded_key] = True
+        
+        messages.success(request, 'Your feedback has been submitted successfully!')
+        return redirect('feedback:feedback_list')
+    
+    request.session[f'feedback_start_{session_id}'] = timezone.now().timestamp()
+    
+    return render(request, 'feedback/respond.html', {'session': session})
+
 @login_required
 def feedback_templates(request):
     """Manage feedback templates"""
@@ -0,0 +1,23 @@
+from django.contrib import admin
+from .models import GradingPolicy, GradingCategoryWeight, FinalGrade
+
+
+class GradingCategoryWeightInline(admin.TabularInline):
+    model = GradingCategoryWeight
+    extra = 0
+
+
+@admin.register(GradingPolicy)
+class GradingPolicyAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'updated_at']
+    search_fields = ['subject__name']
+    readonly_fields = ['created_at', 'updated_at']
+    inlines = [GradingCategoryWeightInline]
+
+
+@admin.register(FinalGrade)
+class FinalGradeAdmin(admin.ModelAdmin):
+    list_display = ['student', 'subject', 'grade_count', 'average', 'final_percentage', 'updated_at']
+    list_filter = ['subject']
+    search_fields = ['student__username', 'student__first_name', 'student__last_name', 'subject__name']
+    readonly_fields = ['grade_count', 'average', 'final_percentage', 'updated_at']
@@ -3,4 +3,7 @@ from django.apps import AppConfig
 
 class GradesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'grades'
\ No newline at end of file
+    name = 'grades'
+    
+    def ready(self):
+        import grades.signals
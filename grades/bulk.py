@@ -0,0 +1,160 @@
+"""
+Bulk grade entry for a single assessment.
+
+A batch is validated as a whole: student identifiers are checked against
+the classroom roster with one query, percentages are computed for the
+whole batch at once, and the grades are written with bulk_create. Nothing
+is written if any row is invalid.
+"""
+import csv
+import io
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from django.db import transaction
+from django.utils.dateparse import parse_date
+
+from users.models import StudentProfile
+from .models import Grade
+from .policies import recompute_final_grades
+
+BATCH_SIZE = 1000
+GRADE_TYPES = {value for value, _ in Grade.GRADE_TYPES}
+HUNDRED = Decimal(100)
+CENT = Decimal('0.01')
+
+
+class GradeImportError(Exception):
+    """Raised with a list of row errors when a batch cannot be imported"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} invalid row(s)")
+
+
+def parse_csv(file_obj):
+    """Read rows from a CSV file with a header (student_id or username, points_earned, comments)"""
+    content = file_obj.read()
+    if isinstance(content, bytes):
+        content = content.decode('utf-8-sig')
+    return list(csv.DictReader(io.StringIO(content)))
+
+
+def _to_decimal(value):
+    try:
+        number = Decimal(str(value).strip())
+    except (InvalidOperation, ValueError):
+        return None
+    return number if number.is_finite() else None
+
+
+def _to_date(value):
+    try:
+        return parse_date(str(value).strip()) if value else None
+    except ValueError:
+        return None
+
+
+def _fits(field_name, value):
+    """Whether `value` fits the Grade DecimalField `field_name` once rounded to its decimal places"""
+    field = Grade._meta.get_field(field_name)
+    limit = Decimal(10) ** (field.max_digits - field.decimal_places)
+    return abs(value.quantize(Decimal(1).scaleb(-field.decimal_places), rounding=ROUND_HALF_UP)) < limit
+
+
+def build_grades(classroom, subject, teacher, assessment, rows):
+    """
+    Validate an assessment batch and return unsaved Grade objects.
+
+    `assessment` holds title, grade_type, points_possible, date_assigned and
+    optionally date_due; each row holds student_id (StudentProfile.student_id)
+    or username, points_earned and optional comments.
+    """
+    errors = []
+
+    title = (assessment.get('title') or '').strip()
+    grade_type = assessment.get('grade_type')
+    points_possible = _to_decimal(assessment.get('points_possible'))
+    date_assigned = _to_date(assessment.get('date_assigned'))
+    date_due = _to_date(assessment.get('date_due'))
+    if not title:
+        errors.append({'row': None, 'error': 'Assessment title is required.'})
+    if grade_type not in GRADE_TYPES:
+        errors.append({'row': None, 'error': f'Invalid grade type "{grade_type}".'})
+    if points_possible is None or points_possible <= 0 or not _fits('points_possible', points_possible):
+        errors.append({'row': None, 'error': 'points_possible must be a positive number below 1000.'})
+    if not date_assigned:
+        errors.append({'row': None, 'error': 'date_assigned must be a valid date (YYYY-MM-DD).'})
+    if assessment.get('date_due') and not date_due:
+        errors.append({'row': None, 'error': 'date_due must be a valid date (YYYY-MM-DD).'})
+    if not isinstance(rows, list):
+        errors.append({'row': None, 'error': 'grades must be a list of rows.'})
+    if errors:
+        raise GradeImportError(errors)
+
+    # One query for the whole roster
+    roster = {}
+    for user_id, student_id, username in StudentProfile.objects.filter(
+        classroom=classroom
+    ).values_list('user_id', 'student_id', 'user__username'):
+        if student_id:
+            roster[student_id] = user_id
+        roster[username] = user_id
+
+    user_ids = []
+    earned = []
+    comments = []
+    seen = set()
+    scale = HUNDRED / points_possible
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            errors.append({'row': number, 'error': 'Each row must be an object.'})
+            continue
+        key = str(row.get('student_id') or row.get('username') or '').strip()
+        user_id = roster.get(key)
+        points = _to_decimal(row.get('points_earned'))
+        if user_id is None:
+            errors.append({'row': number, 'error': f'Student "{key}" is not in {classroom.name}.'})
+        elif user_id in seen:
+            errors.append({'row': number, 'error': f'Student "{key}" appears more than once.'})
+        if points is None or points < 0:
+            errors.append({'row': number, 'error': 'points_earned must be a non-negative number.'})
+        elif not _fits('points_earned', points) or not _fits('percentage', points * scale):
+            errors.append({'row': number, 'error': 'points_earned is too large for this assessment.'})
+        if user_id is not None:
+            seen.add(user_id)
+        user_ids.append(user_id)
+        earned.append(points)
+        comments.append(str(row.get('comments') or '').strip())
+
+    if errors:
+        raise GradeImportError(errors)
+
+    # Percentages for the whole batch in one pass
+    percentages = [(points * scale).quantize(CENT, rounding=ROUND_HALF_UP) for points in earned]
+
+    return [
+        Grade(
+            student_id=user_id,
+            subject=subject,
+            teacher=teacher,
+            title=title,
+            grade_type=grade_type,
+            points_earned=points,
+            points_possible=points_possible,
+            percentage=percentage,
+            date_assigned=date_assigned,
+            date_due=date_due,
+            comments=comment,
+        )
+        for user_id, points, percentage, comment in zip(user_ids, earned, percentages, comments)
+    ]
+
+
+def import_grades(classroom, subject, teacher, assessment, rows):
+    """Validate and insert a batch of grades; returns the number created"""
+    grades = build_grades(classroom, subject, teacher, assessment, rows)
+    with transaction.atomic():
+        Grade.objects.bulk_create(grades, batch_size=BATCH_SIZE)
+        # bulk_create skips post_save, so refresh the cached final grades here
+        recompute_final_grades(subject.id, [grade.student_id for grade in grades])
+    return len(grades)
@@ -0,0 +1,107 @@
+"""
+Gradebook aggregation for single students and whole classrooms.
+
+All statistics come from one grouped query over Grade, bucketed by
+(student, subject, grade_type), and are folded into per-subject and overall
+averages in Python. The rows are tiny compared to the raw grades, so nothing
+here loads Grade instances.
+"""
+from collections import OrderedDict
+
+from django.db.models import Count, Sum
+
+from .models import Grade
+
+
+def _round(value):
+    return round(float(value), 2) if value is not None else None
+
+
+def grouped_grade_rows(grades):
+    """One GROUP BY query: count and percentage sum per (student, subject, grade_type)"""
+    return (
+        grades.values('student_id', 'subject_id', 'subject__name', 'grade_type')
+        .annotate(count=Count('id'), total=Sum('percentage'))
+        .order_by('subject__name', 'subject_id', 'grade_type')
+    )
+
+
+def weighted_average(by_type, weights=None):
+    """
+    Average of per-type averages. With no weights every grade type present
+    counts equally; types missing from `weights` are ignored.
+    """
+    parts = []
+    for grade_type, stats in by_type.items():
+        weight = 1 if weights is None else weights.get(grade_type, 0)
+        if weight and stats['count']:
+            parts.append((stats['total'] / stats['count'], weight))
+    total_weight = sum(weight for _, weight in parts)
+    if not total_weight:
+        return None
+    return sum(average * weight for average, weight in parts) / total_weight
+
+
+def _summarize(rows, weights=None):
+    subjects = OrderedDict()
+    total = 0
+    count = 0
+
+    for row in rows:
+        # Subject names are not unique, so group by id
+        subject = subjects.setdefault(row['subject_id'], {
+            'subject_id': row['subject_id'],
+            'name': row['subject__name'],
+            'count': 0,
+            'total': 0,
+            'by_type': OrderedDict(),
+        })
+        row_total = float(row['total'] or 0)
+        subject['count'] += row['count']
+        subject['total'] += row_total
+        subject['by_type'][row['grade_type']] = {'count': row['count'], 'total': row_total}
+        total += row_total
+        count += row['count']
+
+    for subject in subjects.values():
+        subject_weights = weights.get(subject['subject_id']) if weights else None
+        subject['average'] = _round(subject['total'] / subject['count']) if subject['count'] else 0
+        subject['weighted_average'] = _round(weighted_average(subject['by_type'], subject_weights))
+        for stats in subject['by_type'].values():
+            stats['average'] = _round(stats['total'] / stats['count'])
+
+    weighted = [s['weighted_average'] for s in subjects.values() if s['weighted_average'] is not None]
+    return {
+        'subjects': subjects,
+        'total_grades': count,
+        'overall_average': _round(total / count) if count else 0,
+        'weighted_average': _round(sum(weighted) / len(weighted)) if weighted else 0,
+    }
+
+
+def student_gradebook(student, subject=None, weights=None):
+    """
+    Per-subject averages, counts, weighted-by-type averages and the overall
+    average for one student, with subjects keyed by id. `weights` maps
+    subject_id -> {grade_type: weight}.
+    """
+    grades = Grade.objects.filter(student=student)
+    if subject is not None:
+        grades = grades.filter(subject=subject)
+    return _summarize(grouped_grade_rows(grades), weights)
+
+
+def classroom_gradebook(classroom, subject=None, weights=None):
+    """Gradebook summaries for every student in a classroom, keyed by student id"""
+    grades = Grade.objects.filter(student__student_profile__classroom=classroom)
+    if subject is not None:
+        grades = grades.filter(subject=subject)
+
+    rows_by_student = OrderedDict()
+    for row in grouped_grade_rows(grades):
+        rows_by_student.setdefault(row['student_id'], []).append(row)
+
+    return OrderedDict(
+        (student_id, _summarize(rows, weights))
+        for student_id, rows in rows_by_student.items()
+    )
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.models import CustomUser
+from classroom.models import Classroom
+from subject.models import Subject
+from grades.bulk import GradeImportError, import_grades, parse_csv
+
+
+class Command(BaseCommand):
+    help = 'Import grades for one assessment from a CSV file (student_id or username, points_earned, comments)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_file', help='Path to the CSV file')
+        parser.add_argument('--classroom', type=int, required=True, help='Classroom id')
+        parser.add_argument('--subject', type=int, required=True, help='Subject id')
+        parser.add_argument('--teacher', required=True, help='Username of the grading teacher')
+        parser.add_argument('--title', required=True, help='Assessment title')
+        parser.add_argument('--grade-type', required=True, help='assignment, quiz, exam, project or participation')
+        parser.add_argument('--points-possible', required=True, help='Maximum points for the assessment')
+        parser.add_argument('--date-assigned', required=True, help='YYYY-MM-DD')
+        parser.add_argument('--date-due', default=None, help='YYYY-MM-DD')
+
+    def handle(self, *args, **options):
+        try:
+            classroom = Classroom.objects.get(id=options['classroom'])
+            subject = Subject.objects.get(id=options['subject'])
+            teacher = CustomUser.objects.get(username=options['teacher'])
+        except (Classroom.DoesNotExist, Subject.DoesNotExist, CustomUser.DoesNotExist) as e:
+            raise CommandError(str(e))
+
+        with open(options['csv_file'], 'rb') as f:
+            rows = parse_csv(f)
+        self.stdout.write(f'Importing {len(rows)} grades into {classroom.name} / {subject.name}...')
+
+        assessment = {
+            'title': options['title'],
+            'grade_type': options['grade_type'],
+            'points_possible': options['points_possible'],
+            'date_assigned': options['date_assigned'],
+            'date_due': options['date_due'],
+        }
+        try:
+            created = import_grades(classroom, subject, teacher, assessment, rows)
+        except GradeImportError as e:
+            for error in e.errors:
+                row = f"row {error['row']}: " if error['row'] else ''
+                self.stderr.write(f"{row}{error['error']}")
+            raise CommandError(str(e))
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Imported {created} grades'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from subject.models import Subject
+from grades.policies import recompute_subject
+
+
+class Command(BaseCommand):
+    help = 'Recompute cached final grades from the current grading policies (also backfills grades that predate the cache)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--subject', type=int, help='Only recompute this subject id')
+
+    def handle(self, *args, **options):
+        subjects = Subject.objects.all()
+        if options['subject']:
+            subjects = subjects.filter(id=options['subject'])
+
+        for subject in subjects:
+            recompute_subject(subject.id)
+            self.stdout.write(f'Recomputed final grades for {subject.name}')
+
+        self.stdout.write(self.style.SUCCESS('✅ Final grades are up to date'))
@@ -0,0 +1,151 @@
+"""
+Whole-class gradebook matrix: students x grade items.
+
+Cells are pivoted from a single values() query into a flat, row-major
+array of doubles (NaN marks a missing grade), which keeps a 40 x 200
+gradebook to a few kilobytes and makes row/column statistics simple loops
+over contiguous memory.
+"""
+from array import array
+from bisect import bisect_left, bisect_right
+import math
+
+from users.models import StudentProfile
+from .models import Grade
+
+MISSING = float('nan')
+
+
+def _mean(values):
+    present = [v for v in values if not math.isnan(v)]
+    return sum(present) / len(present) if present else None
+
+
+def _round(value):
+    return round(value, 2) if value is not None else None
+
+
+class GradebookMatrix:
+    """Students x grade items with row/column averages and class percentiles"""
+
+    def __init__(self, students, items, cells):
+        self.students = students  # [(student_id, name)]
+        self.items = items        # [{'subject_id', 'subject', 'title', 'grade_type', 'date_assigned'}]
+        self.cells = cells        # array('d'), row-major
+        self.width = len(items)
+
+    @classmethod
+    def for_classroom(cls, classroom, subject=None):
+        students = [
+            (user_id, f"{first_name} {last_name}".strip() or username)
+            for user_id, first_name, last_name, username in StudentProfile.objects.filter(
+                classroom=classroom
+            ).order_by('user__last_name', 'user__first_name').values_list(
+                'user_id', 'user__first_name', 'user__last_name', 'user__username'
+            )
+        ]
+
+        grades = Grade.objects.filter(student__student_profile__classroom=classroom)
+        if subject is not None:
+            grades = grades.filter(subject=subject)
+        rows = list(
+            grades.values_list(
+                'student_id', 'subject_id', 'subject__name', 'title', 'grade_type', 'date_assigned', 'percentage',
+            ).order_by('date_assigned', 'subject__name', 'title')
+        )
+        return cls.from_rows(students, rows)
+
+    @classmethod
+    def from_rows(cls, students, rows):
+        """Pivot (student_id, subject_id, subject, title, grade_type, date_assigned, percentage) rows"""
+        row_index = {student_id: i for i, (student_id, _) in enumerate(students)}
+        column_index = {}
+        items = []
+        # Subjects can reuse a title and date, so the subject is part of the column key
+        for _, subject_id, subject, title, grade_type, date_assigned, _ in rows:
+            key = (subject_id, title, grade_type, date_assigned)
+            if key not in column_index:
+                column_index[key] = len(items)
+                items.append({
+                    'subject_id': subject_id,
+                    'subject': subject,
+                    'title': title,
+                    'grade_type': grade_type,
+                    'date_assigned': date_assigned,
+                })
+
+        width = len(items)
+        cells = array('d', [MISSING]) * (len(students) * width)
+        for student_id, subject_id, _, title, grade_type, date_assigned, percentage in rows:
+            r = row_index.get(student_id)
+            if r is None or percentage is None:
+                continue
+            cells[r * width + column_index[(subject_id, title, grade_type, date_assigned)]] = float(percentage)
+        return cls(students, items, cells)
+
+    def row(self, r):
+        return self.cells[r * self.width:(r + 1) * self.width]
+
+    def column(self, c):
+        return self.cells[c::self.width] if self.width else array('d')
+
+    def row_averages(self):
+        return [_mean(self.row(r)) for r in range(len(self.students))]
+
+    def column_averages(self):
+        return [_mean(self.column(c)) for c in range(self.width)]
+
+    def percentiles(self, row_averages=None):
+        """Percentile rank of each student's average within the class (midpoint rule)"""
+        if row_averages is None:
+            row_averages = self.row_averages()
+        ranked = sorted(avg for avg in row_averages if avg is not None)
+        n = len(ranked)
+        result = []
+        for avg in row_averages:
+            if avg is None:
+                result.append(None)
+                continue
+            below = bisect_left(ranked, avg)
+            equal = bisect_right(ranked, avg) - below
+            result.append((below + 0.5 * equal) / n * 100)
+        return result
+
+    def to_dict(self):
+        row_averages = self.row_averages()
+        percentiles = self.percentiles(row_averages)
+        return {
+            'items': [
+                {**item, 'date_assigned': item['date_assigned'].isoformat()}
+                for item in self.items
+            ],
+            'column_averages': [_round(v) for v in self.column_averages()],
+            'students': [
+                {
+                    'id': student_id,
+                    'name': name,
+                    'cells': [None if math.isnan(v) else _round(v) for v in self.row(r)],
+                    'average': _round(row_averages[r]),
+                    'percentile': _round(percentiles[r]),
+                }
+                for r, (student_id, name) in enumerate(self.students)
+            ],
+        }
+
+    def iter_csv_rows(self):
+        """Rows for a streaming CSV export, header first and column averages last"""
+        yield ['Student'] + [f"{item['title']} ({item['subject']})" for item in self.items] + ['Average', 'Percentile']
+        row_averages = self.row_averages()
+        percentiles = self.percentiles(row_averages)
+        for r, (_, name) in enumerate(self.students):
+            cells = ['' if math.isnan(v) else f'{v:.2f}' for v in self.row(r)]
+            average = row_averages[r]
+            percentile = percentiles[r]
+            yield [name] + cells + [
+                '' if average is None else f'{average:.2f}',
+                '' if percentile is None else f'{percentile:.1f}',
+            ]
+        yield ['Class average'] + [
+            '' if v is None else f'{v:.2f}' for v in self.column_averages()
+        ] + ['', '']
+
@@ -0,0 +1,57 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:20
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('subject', '0002_subject_subject_id'),
+        ('grades', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GradingPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('description', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('subject', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='grading_policy', to='subject.subject')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GradingCategoryWeight',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade_type', models.CharField(choices=[('assignment', 'Assignment'), ('quiz', 'Quiz'), ('exam', 'Exam'), ('project', 'Project'), ('participation', 'Participation')], max_length=20)),
+                ('weight', models.DecimalField(decimal_places=2, default=1, max_digits=5)),
+                ('drop_lowest', models.PositiveIntegerField(default=0)),
+                ('policy', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='weights', to='grades.gradingpolicy')),
+            ],
+            options={
+                'ordering': ['grade_type'],
+                'unique_together': {('policy', 'grade_type')},
+            },
+        ),
+        migrations.CreateModel(
+            name='FinalGrade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade_count', models.PositiveIntegerField(default=0)),
+                ('average', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('final_percentage', models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_grades', to=settings.AUTH_USER_MODEL)),
+                ('subject', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='final_grades', to='subject.subject')),
+            ],
+            options={
+                'ordering': ['subject__name'],
+                'unique_together': {('student', 'subject')},
+            },
+        ),
+    ]
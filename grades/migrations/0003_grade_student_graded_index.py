@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('grades', '0002_gradingpolicy_finalgrade'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='grade',
+            index=models.Index(fields=['student', '-date_graded'], name='grade_student_graded_idx'),
+        ),
+    ]
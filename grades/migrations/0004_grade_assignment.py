@@ -0,0 +1,20 @@
+# Generated by Django 4.2.30 on 2026-10-19 00:13
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assignments', '0005_assignment_classroom_due_index'),
+        ('grades', '0003_grade_student_graded_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grade',
+            name='assignment',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='gradebook_grades', to='assignments.assignment'),
+        ),
+    ]
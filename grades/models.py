@@ -17,6 +17,10 @@ class Grade(models.Model):
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='grades')
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE)
     teacher = models.ForeignKey(User, on_delete=models.CASCADE, related_name='assigned_grades')
+    # Set on grades mirrored from graded submissions (assignments.grading)
+    assignment = models.ForeignKey(
+        'assignments.Assignment', on_delete=models.SET_NULL, null=True, blank=True, related_name='gradebook_grades',
+    )
     
     title = models.CharField(max_length=200)
     grade_type = models.CharField(max_length=20, choices=GRADE_TYPES)
@@ -39,4 +43,59 @@ class Grade(models.Model):
         return f"{self.student.get_full_name()} - {self.title} ({self.percentage}%)"
     
     class Meta:
-        ordering = ['-date_graded']
\ No newline at end of file
+        ordering = ['-date_graded']
+        indexes = [
+            # A student's most recent grades (student timelines)
+            models.Index(fields=['student', '-date_graded'], name='grade_student_graded_idx'),
+        ]
+
+class GradingPolicy(models.Model):
+    """Per-subject category weights used to compute final grades"""
+    subject = models.OneToOneField(Subject, on_delete=models.CASCADE, related_name='grading_policy')
+    description = models.TextField(blank=True)
+    
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"Grading policy for {self.subject.name}"
+    
+    def get_weights(self):
+        return {w.grade_type: float(w.weight) for w in self.weights.all()}
+    
+    def get_drop_lowest(self):
+        return {w.grade_type: w.drop_lowest for w in self.weights.all() if w.drop_lowest}
+
+
+class GradingCategoryWeight(models.Model):
+    """Weight and drop-lowest rule for one grade type within a policy"""
+    policy = models.ForeignKey(GradingPolicy, on_delete=models.CASCADE, related_name='weights')
+    grade_type = models.CharField(max_length=20, choices=Grade.GRADE_TYPES)
+    weight = models.DecimalField(max_digits=5, decimal_places=2, default=1)
+    drop_lowest = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        unique_together = ['policy', 'grade_type']
+        ordering = ['grade_type']
+    
+    def __str__(self):
+        return f"{self.policy.subject.name} - {self.get_grade_type_display()} ({self.weight})"
+
+
+class FinalGrade(models.Model):
+    """Cached final grade per (student, subject), kept current by grades.signals"""
+    student = models.ForeignKey(User, on_delete=models.CASCADE, related_name='final_grades')
+    subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='final_grades')
+    
+    grade_count = models.PositiveIntegerField(default=0)
+    average = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    final_percentage = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ['student', 'subject']
+        ordering = ['subject__name']
+    
+    def __str__(self):
+        return f"{self.student.get_full_name()} - {self.subject.name} ({self.final_percentage}%)"
@@ -0,0 +1,195 @@
+"""
+Final grade computation from per-subject grading policies.
+
+FinalGrade rows are recomputed for a single (student, subject) pair whenever
+one of its grades changes, so report cards and dashboards only ever read
+the cached values.
+"""
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.utils import timezone
+
+from .gradebook import weighted_average
+from .models import Grade, GradingCategoryWeight, FinalGrade
+from .ranking import invalidate_classroom_ranks
+from users.portal import touch_students
+
+
+def _quantize(value):
+    if value is None:
+        return None
+    return Decimal(str(value)).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
+
+def get_policy(subject_id):
+    """Return (weights, drop_lowest) for a subject; (None, {}) without a policy"""
+    rows = list(
+        GradingCategoryWeight.objects.filter(policy__subject_id=subject_id)
+        .values_list('grade_type', 'weight', 'drop_lowest')
+    )
+    if not rows:
+        return None, {}
+    weights = {grade_type: float(weight) for grade_type, weight, _ in rows}
+    drop_lowest = {grade_type: drop for grade_type, _, drop in rows if drop}
+    return weights, drop_lowest
+
+
+def compute_final_grade(percentages_by_type, weights=None, drop_lowest=None):
+    """
+    Apply drop-lowest rules and category weights to {grade_type: [percentages]}.
+    Returns (grade_count, average, final_percentage).
+    """
+    by_type = {}
+    all_values = []
+    for grade_type, values in percentages_by_type.items():
+        all_values.extend(values)
+        kept = sorted(values)
+        drop = (drop_lowest or {}).get(grade_type, 0)
+        if drop and len(kept) > drop:
+            kept = kept[drop:]
+        by_type[grade_type] = {'count': len(kept), 'total': sum(kept)}
+
+    count = len(all_values)
+    average = sum(all_values) / count if count else 0
+    return count, average, weighted_average(by_type, weights)
+
+
+def recompute_final_grade(student_id, subject_id, policy=None):
+    """Recompute and store the FinalGrade for one (student, subject) pair"""
+    weights, drop_lowest = policy if policy is not None else get_policy(subject_id)
+
+    percentages_by_type = {}
+    for grade_type, percentage in Grade.objects.filter(
+        student_id=student_id, subject_id=subject_id
+    ).values_list('grade_type', 'percentage'):
+        if percentage is not None:
+            percentages_by_type.setdefault(grade_type, []).append(float(percentage))
+
+    if not percentages_by_type:
+        final_grade = None
+        FinalGrade.objects.filter(student_id=student_id, subject_id=subject_id).delete()
+    else:
+        count, average, final = compute_final_grade(percentages_by_type, weights, drop_lowest)
+        final_grade, _ = FinalGrade.objects.update_or_create(
+            student_id=student_id,
+            subject_id=subject_id,
+            defaults={
+                'grade_count': count,
+                'average': _quantize(average),
+                'final_percentage': _quantize(final),
+            },
+        )
+    # Only after commit, or a concurrent read could cache ranks from the old rows
+    transaction.on_commit(lambda: invalidate_classroom_ranks([student_id]))
+    touch_students([student_id])
+    return final_grade
+
+
+def recompute_final_grades(subject_id, student_ids, chunk_size=500):
+    """
+    Recompute final grades for many students in one subject with a handful
+    of queries per chunk, for bulk paths that bypass Grade signals.
+    """
+    policy = get_policy(subject_id)
+    weights, drop_lowest = policy
+    student_ids = sorted(set(student_ids))
+
+    with transaction.atomic():
+        for start in range(0, len(student_ids), chunk_size):
+            chunk = student_ids[start:start + chunk_size]
+
+            percentages = {}
+            for student_id, grade_type, percentage in Grade.objects.filter(
+                subject_id=subject_id, student_id__in=chunk
+            ).values_list('student_id', 'grade_type', 'percentage'):
+                if percentage is not None:
+                    percentages.setdefault(student_id, {}).setdefault(grade_type, []).append(float(percentage))
+
+            existing = {
+                final_grade.student_id: final_grade
+                for final_grade in FinalGrade.objects.filter(subject_id=subject_id, student_id__in=chunk)
+            }
+
+            now = timezone.now()
+            to_create = []
+            to_update = []
+            for student_id in chunk:
+                if student_id not in percentages:
+                    continue
+                count, average, final = compute_final_grade(percentages[student_id], weights, drop_lowest)
+                final_grade = existing.get(student_id)
+                if final_grade is None:
+                    final_grade = FinalGrade(student_id=student_id, subject_id=subject_id)
+                    to_create.append(final_grade)
+                else:
+                    to_update.append(final_grade)
+                final_grade.grade_count = count
+                final_grade.average = _quantize(average)
+                final_grade.final_percentage = _quantize(final)
+                final_grade.updated_at = now
+
+            FinalGrade.objects.bulk_create(to_create)
+            FinalGrade.objects.bulk_update(to_update, ['grade_count', 'average', 'final_percentage', 'updated_at'])
+            stale = [student_id for student_id in existing if student_id not in percentages]
+            if stale:
+                FinalGrade.objects.filter(subject_id=subject_id, student_id__in=stale).delete()
+        transaction.on_commit(lambda: invalidate_classroom_ranks(student_ids))
+        touch_students(student_ids)
+
+
+def recompute_subject(subject_id):
+    """Recompute every final grade in a subject, e.g. after its policy changed"""
+    student_ids = set(
+        Grade.objects.filter(subject_id=subject_id)
+        .values_list('student_id', flat=True).distinct()
+    )
+    student_ids.update(FinalGrade.objects.filter(subject_id=subject_id).values_list('student_id', flat=True))
+    recompute_final_grades(subject_id, student_ids)
+
+
+def recompute_student(student_id):
+    subject_ids = (
+        Grade.objects.filter(student_id=student_id)
+        .values_list('subject_id', flat=True).distinct()
+    )
+    with transaction.atomic():
+        for subject_id in subject_ids:
+            recompute_final_grade(student_id, subject_id)
+
+
+def final_grade_summary(student):
+    """
+    Report-card summary read from the cached FinalGrade rows, shaped like
+    gradebook.student_gradebook(). Grades that predate the cache are
+    backfilled by the recompute_final_grades command, not on read.
+    """
+    final_grades = FinalGrade.objects.filter(student=student).select_related('subject').order_by(
+        'subject__name', 'subject_id',
+    )
+
+    subjects = {}
+    total = 0
+    count = 0
+    finals = []
+    for final_grade in final_grades:
+        average = float(final_grade.average)
+        final = float(final_grade.final_percentage) if final_grade.final_percentage is not None else None
+        subjects[final_grade.subject_id] = {
+            'subject_id': final_grade.subject_id,
+            'name': final_grade.subject.name,
+            'count': final_grade.grade_count,
+            'average': average,
+            'weighted_average': final,
+        }
+        total += average * final_grade.grade_count
+        count += final_grade.grade_count
+        if final is not None:
+            finals.append(final)
+
+    return {
+        'subjects': subjects,
+        'total_grades': count,
+        'overall_average': round(total / count, 2) if count else 0,
+        'weighted_average': round(sum(finals) / len(finals), 2) if finals else 0,
+    }
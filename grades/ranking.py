@@ -0,0 +1,150 @@
+"""
+Class rank and percentile per subject and overall.
+
+Ranks are computed from the cached FinalGrade rows with SQL window
+functions where the database supports them, with a pure Python fallback
+otherwise. Results are cached per classroom for CLASS_RANKS_CACHE_TIMEOUT
+seconds; the entry is dropped whenever a final grade of one of the
+classroom's students is recomputed or a student joins or leaves the
+classroom.
+"""
+from bisect import bisect_left, bisect_right
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Avg, Count, F, FloatField, Window
+from django.db.models.functions import Coalesce, PercentRank, Rank
+
+from users.models import StudentProfile
+from .models import FinalGrade
+
+DEFAULT_TIMEOUT = 300
+
+
+def _cache_key(classroom_id):
+    return f'grades:class_ranks:{classroom_id}'
+
+
+def invalidate_classroom_ranks(student_ids):
+    """Drop cached ranks for the classrooms these students belong to"""
+    classroom_ids = set(
+        StudentProfile.objects.filter(user_id__in=list(student_ids), classroom__isnull=False)
+        .values_list('classroom_id', flat=True)
+    )
+    clear_classroom_ranks(classroom_ids)
+
+
+def clear_classroom_ranks(classroom_ids):
+    """Drop cached ranks of these classrooms"""
+    cache.delete_many([_cache_key(classroom_id) for classroom_id in classroom_ids if classroom_id is not None])
+
+
+def _entry(score, rank, size, percent_rank):
+    return {
+        'score': round(float(score), 2),
+        'rank': rank,
+        'size': size,
+        'percentile': round(percent_rank * 100, 1),
+    }
+
+
+def _score():
+    # Float output keeps SQLite from wrapping the window ORDER BY in a numeric CAST
+    return Coalesce('final_percentage', 'average', output_field=FloatField())
+
+
+def _rank_with_windows(final_grades):
+    subjects = {}
+    rows = final_grades.order_by().annotate(
+        score=_score(),
+    ).annotate(
+        rank=Window(Rank(), partition_by=[F('subject_id')], order_by=F('score').desc()),
+        percent_rank=Window(PercentRank(), partition_by=[F('subject_id')], order_by=F('score').asc()),
+        size=Window(Count('id'), partition_by=[F('subject_id')]),
+    ).values_list('subject_id', 'student_id', 'score', 'rank', 'size', 'percent_rank')
+    for subject_id, student_id, score, rank, size, percent_rank in rows:
+        subjects.setdefault(subject_id, {})[student_id] = _entry(score, rank, size, percent_rank)
+
+    overall = {}
+    rows = final_grades.order_by().values('student_id').annotate(
+        score=Avg(_score(), output_field=FloatField()),
+    ).annotate(
+        rank=Window(Rank(), order_by=F('score').desc()),
+        percent_rank=Window(PercentRank(), order_by=F('score').asc()),
+        size=Window(Count('student_id')),
+    ).values_list('student_id', 'score', 'rank', 'size', 'percent_rank')
+    for student_id, score, rank, size, percent_rank in rows:
+        overall[student_id] = _entry(score, rank, size, percent_rank)
+
+    return subjects, overall
+
+
+def rank_scores(scores):
+    """
+    Competition ranks (1 = best) and percent ranks for {student_id: score},
+    matching SQL RANK() and PERCENT_RANK().
+    """
+    ordered = sorted(scores.values())
+    size = len(ordered)
+    result = {}
+    for student_id, score in scores.items():
+        below = bisect_left(ordered, score)
+        above = size - bisect_right(ordered, score)
+        percent_rank = below / (size - 1) if size > 1 else 0.0
+        result[student_id] = _entry(score, above + 1, size, percent_rank)
+    return result
+
+
+def _rank_in_python(final_grades):
+    by_subject = {}
+    totals = {}
+    for subject_id, student_id, final, average in final_grades.values_list(
+        'subject_id', 'student_id', 'final_percentage', 'average'
+    ):
+        score = float(final if final is not None else average)
+        by_subject.setdefault(subject_id, {})[student_id] = score
+        total = totals.setdefault(student_id, [0.0, 0])
+        total[0] += score
+        total[1] += 1
+
+    subjects = {subject_id: rank_scores(scores) for subject_id, scores in by_subject.items()}
+    overall = rank_scores({student_id: total / count for student_id, (total, count) in totals.items()})
+    return subjects, overall
+
+
+def classroom_ranks(classroom_id):
+    """
+    Return {'subjects': {subject_id: {student_id: entry}}, 'overall': {student_id: entry}}
+    where each entry has score, rank, size and percentile.
+    """
+    key = _cache_key(classroom_id)
+    ranks = cache.get(key)
+    if ranks is not None:
+        return ranks
+
+    final_grades = FinalGrade.objects.filter(student__student_profile__classroom_id=classroom_id)
+    if connection.features.supports_over_clause:
+        subjects, overall = _rank_with_windows(final_grades)
+    else:
+        subjects, overall = _rank_in_python(final_grades)
+
+    ranks = {'subjects': subjects, 'overall': overall}
+    cache.set(key, ranks, getattr(settings, 'CLASS_RANKS_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return ranks
+
+
+def student_standing(student):
+    """Rank and percentile of one student within their classroom"""
+    profile = getattr(student, 'student_profile', None)
+    if profile is None or profile.classroom_id is None:
+        return None
+    ranks = classroom_ranks(profile.classroom_id)
+    return {
+        'overall': ranks['overall'].get(student.id),
+        'subjects': {
+            subject_id: students[student.id]
+            for subject_id, students in ranks['subjects'].items()
+            if student.id in students
+        },
+    }
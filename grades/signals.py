@@ -0,0 +1,88 @@
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from users.models import StudentProfile
+from .models import Grade, GradingPolicy, GradingCategoryWeight
+from .policies import recompute_final_grade, recompute_subject
+from .ranking import clear_classroom_ranks
+
+
+@receiver(pre_save, sender=Grade)
+def remember_previous_grade_owner(sender, instance, **kwargs):
+    """Remember the old (student, subject) so a moved grade updates both final grades"""
+    instance._previous_final_grade_key = None
+    if instance.pk:
+        instance._previous_final_grade_key = (
+            Grade.objects.filter(pk=instance.pk).values_list('student_id', 'subject_id').first()
+        )
+
+
+@receiver(post_save, sender=Grade)
+@receiver(post_delete, sender=Grade)
+def update_final_grade(sender, instance, **kwargs):
+    """Keep the cached final grade of the affected (student, subject) current"""
+    key = (instance.student_id, instance.subject_id)
+    recompute_final_grade(*key)
+    previous = getattr(instance, '_previous_final_grade_key', None)
+    if previous and previous != key:
+        recompute_final_grade(*previous)
+
+
+@receiver(post_save, sender=GradingCategoryWeight)
+@receiver(post_delete, sender=GradingCategoryWeight)
+def update_final_grades_for_weight(sender, instance, **kwargs):
+    """Category weights changed - recompute the whole subject"""
+    try:
+        subject_id = GradingPolicy.objects.values_list('subject_id', flat=True).get(id=instance.policy_id)
+    except GradingPolicy.DoesNotExist:
+        return
+    recompute_subject(subject_id)
+
+
+@receiver(pre_save, sender=GradingPolicy)
+def remember_previous_policy_subject(sender, instance, **kwargs):
+    instance._previous_subject_id = None
+    if instance.pk:
+        instance._previous_subject_id = (
+            GradingPolicy.objects.filter(pk=instance.pk).values_list('subject_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=GradingPolicy)
+def update_final_grades_for_saved_policy(sender, instance, **kwargs):
+    """A policy moved to another subject changes the final grades of both"""
+    subject_ids = {instance.subject_id, getattr(instance, '_previous_subject_id', None)} - {None}
+
+    def recompute():
+        for subject_id in subject_ids:
+            recompute_subject(subject_id)
+    transaction.on_commit(recompute)
+
+
+@receiver(post_delete, sender=GradingPolicy)
+def update_final_grades_for_policy(sender, instance, **kwargs):
+    recompute_subject(instance.subject_id)
+
+
+@receiver(pre_save, sender=StudentProfile)
+def remember_previous_classroom(sender, instance, **kwargs):
+    instance._previous_classroom_id = None
+    if instance.pk:
+        instance._previous_classroom_id = (
+            StudentProfile.objects.filter(pk=instance.pk).values_list('classroom_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=StudentProfile)
+def update_ranks_for_classroom_change(sender, instance, **kwargs):
+    """A student who joins or leaves a classroom changes the ranks of both classrooms"""
+    previous = getattr(instance, '_previous_classroom_id', None)
+    if previous != instance.classroom_id:
+        classroom_ids = [previous, instance.classroom_id]
+        transaction.on_commit(lambda: clear_classroom_ranks(classroom_ids))
+
+
+@receiver(post_delete, sender=StudentProfile)
+def update_ranks_for_removed_student(sender, instance, **kwargs):
+    classroom_ids = [instance.classroom_id]
+    transaction.on_commit(lambda: clear_classroom_ranks(classroom_ids))
@@ -0,0 +1,266 @@
+from datetime import date
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from users.models import CustomUser
+from classroom.models import Classroom
+from subject.models import Subject
+from .models import Grade, GradingPolicy, GradingCategoryWeight, FinalGrade
+from .gradebook import student_gradebook, classroom_gradebook
+from .matrix import GradebookMatrix
+from .policies import final_grade_summary
+from .ranking import classroom_ranks, rank_scores, student_standing
+
+
+class GradesTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = CustomUser.objects.create_user(username='teacher', password='Testpass123', role='teacher')
+        self.student = CustomUser.objects.create_user(username='student', password='Testpass123', role='student')
+        self.classroom = Classroom.objects.create(name='10A', grade='10', teacher=self.teacher)
+        self.student.student_profile.classroom = self.classroom
+        self.student.student_profile.save()
+        self.math = Subject.objects.create(name='Math')
+        self.science = Subject.objects.create(name='Science')
+
+    def add_grade(self, subject, grade_type, earned, possible=100):
+        return Grade.objects.create(
+            student=self.student,
+            subject=subject,
+            teacher=self.teacher,
+            title=f'{subject.name} {grade_type}',
+            grade_type=grade_type,
+            points_earned=Decimal(earned),
+            points_possible=Decimal(possible),
+            date_assigned=date.today(),
+        )
+
+
+class GradebookTest(GradesTestCase):
+    def test_student_gradebook_single_query(self):
+        self.add_grade(self.math, 'quiz', 60)
+        self.add_grade(self.math, 'quiz', 80)
+        self.add_grade(self.math, 'exam', 100)
+        self.add_grade(self.science, 'exam', 50)
+
+        with self.assertNumQueries(1):
+            gradebook = student_gradebook(self.student)
+
+        math = gradebook['subjects'][self.math.id]
+        self.assertEqual(math['name'], 'Math')
+        self.assertEqual(math['count'], 3)
+        self.assertEqual(math['average'], 80.0)
+        # quiz average 70 and exam average 100 weigh equally
+        self.assertEqual(math['weighted_average'], 85.0)
+        self.assertEqual(math['by_type']['quiz']['average'], 70.0)
+        self.assertEqual(gradebook['total_grades'], 4)
+        self.assertEqual(gradebook['overall_average'], 72.5)
+
+        weighted = student_gradebook(self.student, weights={self.math.id: {'quiz': 1, 'exam': 3}})
+        self.assertEqual(weighted['subjects'][self.math.id]['weighted_average'], 92.5)
+
+        # A second subject with the same name stays separate
+        other_math = Subject.objects.create(name='Math')
+        self.add_grade(other_math, 'exam', 20)
+        subjects = student_gradebook(self.student)['subjects']
+        self.assertEqual(subjects[self.math.id]['count'], 3)
+        self.assertEqual(subjects[other_math.id]['average'], 20.0)
+
+    def test_classroom_gradebook(self):
+        self.add_grade(self.math, 'quiz', 40)
+        gradebook = classroom_gradebook(self.classroom)
+        self.assertEqual(list(gradebook), [self.student.id])
+        self.assertEqual(gradebook[self.student.id]['overall_average'], 40.0)
+
+
+class GradebookMatrixTest(TestCase):
+    def test_pivot_statistics(self):
+        today = date.today()
+        students = [(1, 'Ann'), (2, 'Ben'), (3, 'Cy')]
+        rows = [
+            (1, 10, 'Math', 'Quiz 1', 'quiz', today, Decimal('80')),
+            (1, 10, 'Math', 'Exam', 'exam', today, Decimal('100')),
+            (2, 10, 'Math', 'Quiz 1', 'quiz', today, Decimal('60')),
+            (3, 20, 'Science', 'Quiz 1', 'quiz', today, Decimal('50')),
+        ]
+        matrix = GradebookMatrix.from_rows(students, rows)
+
+        self.assertEqual(matrix.row_averages(), [90.0, 60.0, 50.0])
+        self.assertEqual(matrix.column_averages(), [70.0, 100.0, 50.0])
+        self.assertEqual([round(p, 1) for p in matrix.percentiles()], [83.3, 50.0, 16.7])
+
+        data = matrix.to_dict()
+        self.assertEqual(data['students'][1]['cells'], [60.0, None, None])
+        csv_rows = list(matrix.iter_csv_rows())
+        self.assertEqual(csv_rows[0], [
+            'Student', 'Quiz 1 (Math)', 'Exam (Math)', 'Quiz 1 (Science)', 'Average', 'Percentile',
+        ])
+        self.assertEqual(csv_rows[-1], ['Class average', '70.00', '100.00', '50.00', '', ''])
+
+
+class FinalGradeTest(GradesTestCase):
+    def test_final_grade_follows_grade_changes(self):
+        quiz = self.add_grade(self.math, 'quiz', 50)
+        self.add_grade(self.math, 'quiz', 90)
+        self.add_grade(self.math, 'exam', 80)
+
+        final = FinalGrade.objects.get(student=self.student, subject=self.math)
+        self.assertEqual(final.grade_count, 3)
+        self.assertEqual(final.final_percentage, Decimal('75.00'))
+
+        policy = GradingPolicy.objects.create(subject=self.math)
+        GradingCategoryWeight.objects.create(policy=policy, grade_type='quiz', weight=1, drop_lowest=1)
+        GradingCategoryWeight.objects.create(policy=policy, grade_type='exam', weight=3)
+        final.refresh_from_db()
+        # quiz 50 dropped: (90 * 1 + 80 * 3) / 4
+        self.assertEqual(final.final_percentage, Decimal('82.50'))
+
+        quiz.subject = self.science
+        quiz.save()
+        self.assertTrue(FinalGrade.objects.filter(student=self.student, subject=self.science).exists())
+        final.refresh_from_db()
+        self.assertEqual(final.grade_count, 2)
+
+        quiz.delete()
+        self.assertFalse(FinalGrade.objects.filter(student=self.student, subject=self.science).exists())
+
+        summary = final_grade_summary(self.student)
+        self.assertEqual(summary['subjects'][self.math.id]['weighted_average'], 82.5)
+        self.assertEqual(summary['subjects'][self.math.id]['name'], 'Math')
+
+    def test_summary_keeps_same_named_subjects_and_does_not_write(self):
+        other_math = Subject.objects.create(name='Math')
+        self.add_grade(self.math, 'exam', 80)
+        self.add_grade(other_math, 'exam', 40)
+        summary = final_grade_summary(self.student)
+        self.assertEqual(summary['subjects'][self.math.id]['average'], 80.0)
+        self.assertEqual(summary['subjects'][other_math.id]['average'], 40.0)
+
+        FinalGrade.objects.all().delete()
+        with self.assertNumQueries(1):
+            self.assertEqual(final_grade_summary(self.student)['subjects'], {})
+
+    def test_moving_a_policy_recomputes_both_subjects(self):
+        self.add_grade(self.math, 'quiz', 50)
+        self.add_grade(self.math, 'exam', 90)
+        policy = GradingPolicy.objects.create(subject=self.math)
+        GradingCategoryWeight.objects.create(policy=policy, grade_type='exam', weight=1)
+        self.assertEqual(FinalGrade.objects.get(subject=self.math).final_percentage, Decimal('90.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            policy.subject = self.science
+            policy.save()
+        # Math falls back to the plain average once it has no policy
+        self.assertEqual(FinalGrade.objects.get(subject=self.math).final_percentage, Decimal('70.00'))
+
+
+class BulkGradeEntryTest(GradesTestCase):
+    def test_json_batch_is_validated_and_inserted(self):
+        other = CustomUser.objects.create_user(username='other', password='Testpass123', role='student')
+        self.client.login(username='teacher', password='Testpass123')
+        url = reverse('grades:bulk_grade_entry')
+        payload = {
+            'classroom': self.classroom.id,
+            'subject': self.math.id,
+            'title': 'Unit test',
+            'grade_type': 'exam',
+            'points_possible': '40',
+            'date_assigned': str(date.today()),
+            'grades': [
+                {'username': 'student', 'points_earned': '30'},
+                {'username': 'other', 'points_earned': '20'},
+            ],
+        }
+
+        response = self.client.post(url, payload, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['errors'][0]['row'], 2)
+        self.assertFalse(Grade.objects.exists())
+
+        payload['grades'] = [{'student_id': self.student.student_profile.student_id, 'points_earned': '30'}]
+        response = self.client.post(url, payload, content_type='application/json')
+        self.assertEqual(response.json(), {'success': True, 'created': 1})
+        grade = Grade.objects.get(student=self.student)
+        self.assertEqual(grade.percentage, Decimal('75.00'))
+        self.assertEqual(FinalGrade.objects.get(student=self.student).final_percentage, Decimal('75.00'))
+        self.assertFalse(Grade.objects.filter(student=other).exists())
+
+    def test_malformed_batches_are_rejected_with_row_errors(self):
+        self.client.login(username='teacher', password='Testpass123')
+        url = reverse('grades:bulk_grade_entry')
+        payload = {
+            'classroom': self.classroom.id,
+            'subject': self.math.id,
+            'title': 'Unit test',
+            'grade_type': 'exam',
+            'points_possible': '40',
+            'date_assigned': str(date.today()),
+            'grades': [{'username': 'student', 'points_earned': '30'}],
+        }
+        bad_payloads = [
+            dict(payload, date_assigned='2024-13-45'),
+            dict(payload, grades=[{'username': 'student', 'points_earned': '1000'}]),
+            dict(payload, points_possible='1', grades=[{'username': 'student', 'points_earned': '20'}]),
+            dict(payload, classroom='abc'),
+            dict(payload, grades=[['student', '30']]),
+            dict(payload, grades={'username': 'student'}),
+        ]
+        for bad in bad_payloads:
+            response = self.client.post(url, bad, content_type='application/json')
+            self.assertEqual(response.status_code, 400, bad)
+            self.assertTrue(response.json()['errors'], bad)
+
+        response = self.client.post(url, [payload], content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Grade.objects.exists())
+
+
+class ClassRankTest(GradesTestCase):
+    def test_ranks_match_python_fallback_and_invalidate(self):
+        rival = CustomUser.objects.create_user(username='rival', password='Testpass123', role='student')
+        rival.student_profile.classroom = self.classroom
+        rival.student_profile.save()
+        self.add_grade(self.math, 'exam', 70)
+        Grade.objects.create(
+            student=rival, subject=self.math, teacher=self.teacher, title='Math exam', grade_type='exam',
+            points_earned=Decimal(90), points_possible=Decimal(100), date_assigned=date.today(),
+        )
+
+        ranks = classroom_ranks(self.classroom.id)
+        self.assertEqual(ranks['overall'][rival.id]['rank'], 1)
+        self.assertEqual(ranks['overall'][self.student.id]['rank'], 2)
+        self.assertEqual(ranks['subjects'][self.math.id][self.student.id]['percentile'], 0.0)
+        self.assertEqual(ranks['subjects'][self.math.id][rival.id]['percentile'], 100.0)
+        self.assertEqual(
+            rank_scores({self.student.id: 70.0, rival.id: 90.0}),
+            ranks['subjects'][self.math.id],
+        )
+
+        with self.assertNumQueries(0):
+            classroom_ranks(self.classroom.id)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.add_grade(self.math, 'exam', 100)
+        # Cached ranks stay until the transaction commits
+        self.assertEqual(classroom_ranks(self.classroom.id)['overall'][self.student.id]['score'], 70.0)
+        for callback in callbacks:
+            callback()
+        ranks = classroom_ranks(self.classroom.id)
+        self.assertEqual(ranks['overall'][self.student.id]['score'], 85.0)
+        self.assertEqual(student_standing(self.student)['overall']['rank'], 2)
+
+    def test_moving_a_student_clears_both_classrooms(self):
+        self.add_grade(self.math, 'exam', 70)
+        other = Classroom.objects.create(name='10B', grade='10', teacher=self.teacher)
+        self.assertIn(self.student.id, classroom_ranks(self.classroom.id)['overall'])
+        self.assertEqual(classroom_ranks(other.id)['overall'], {})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            profile = self.student.student_profile
+            profile.classroom = other
+            profile.save()
+        self.assertNotIn(self.student.id, classroom_ranks(self.classroom.id)['overall'])
+        self.assertIn(self.student.id, classroom_ranks(other.id)['overall'])
@@ -6,4 +6,6 @@ app_name = 'grades'
 urlpatterns = [
     path('student/<int:student_id>/', views.student_grades, name='student_grades'),
     path('my-grades/', views.student_grades, name='my_grades'),
+    path('bulk-entry/', views.bulk_grade_entry, name='bulk_grade_entry'),
+    path('classroom/<int:classroom_id>/matrix/', views.classroom_gradebook_matrix, name='classroom_gradebook_matrix'),
 ]
\ No newline at end of file
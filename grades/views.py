@@ -1,9 +1,25 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Avg, Count
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_http_methods
+import csv
+import json
 from .models import Grade
+from .policies import final_grade_summary
+from .ranking import student_standing
+from .matrix import GradebookMatrix
+from .bulk import GradeImportError, import_grades, parse_csv
 from users.models import CustomUser
+from users.decorators import role_required
+from classroom.models import Classroom
+from subject.models import Subject
+
+
+class Echo:
+    """File-like object whose write() hands the row back to the CSV writer's caller"""
+    def write(self, value):
+        return value
 
 @login_required
 def student_grades(request, student_id=None):
@@ -21,37 +37,102 @@ def student_grades(request, student_id=None):
             messages.error(request, 'Student ID required.')
             return redirect('dashboard')
     
-    # Get grades for the student
+    # Recent grades for the table; statistics come from the cached final grades
     grades = Grade.objects.filter(student=student).select_related('subject', 'teacher')
-    
-    # Calculate statistics
-    total_grades = grades.count()
-    average_grade = grades.aggregate(avg=Avg('percentage'))['avg'] or 0
-    
-    # Group by subject
-    subjects_stats = {}
-    for grade in grades:
-        subject_name = grade.subject.name
-        if subject_name not in subjects_stats:
-            subjects_stats[subject_name] = {
-                'grades': [],
-                'average': 0,
-                'count': 0
-            }
-        subjects_stats[subject_name]['grades'].append(grade)
-    
-    # Calculate subject averages
-    for subject, stats in subjects_stats.items():
-        if stats['grades']:
-            stats['average'] = sum(g.percentage for g in stats['grades']) / len(stats['grades'])
-            stats['count'] = len(stats['grades'])
+    gradebook = final_grade_summary(student)
     
     context = {
         'student': student,
         'grades': grades[:20],  # Recent 20 grades
-        'total_grades': total_grades,
-        'average_grade': round(average_grade, 2),
-        'subjects_stats': subjects_stats,
+        'total_grades': gradebook['total_grades'],
+        'average_grade': gradebook['overall_average'],
+        'weighted_average': gradebook['weighted_average'],
+        'subjects_stats': gradebook['subjects'],
+        'standing': student_standing(student),
     }
     
-    return render(request, 'grades/student_grades.html', context)
\ No newline at end of file
+    return render(request, 'grades/student_grades.html', context)
+
+@role_required(['admin', 'teacher'])
+def classroom_gradebook_matrix(request, classroom_id):
+    """Students x grade items matrix for a classroom, as JSON or streamed CSV"""
+    classroom = get_object_or_404(Classroom, id=classroom_id)
+    if request.user.role == 'teacher' and classroom.teacher_id != request.user.id:
+        return JsonResponse({'success': False, 'message': 'Permission denied'}, status=403)
+    
+    subject = None
+    subject_id = request.GET.get('subject')
+    if subject_id:
+        subject = get_object_or_404(Subject, id=subject_id)
+    
+    matrix = GradebookMatrix.for_classroom(classroom, subject)
+    
+    if request.GET.get('format') == 'csv':
+        writer = csv.writer(Echo())
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for row in matrix.iter_csv_rows()),
+            content_type='text/csv',
+        )
+        filename = f"gradebook_{classroom.classroom_id or classroom.id}.csv"
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    return JsonResponse({
+        'success': True,
+        'classroom': classroom.id,
+        'subject': subject.id if subject else None,
+        **matrix.to_dict(),
+    })
+
+
+@role_required(['admin', 'teacher'])
+@require_http_methods(["POST"])
+def bulk_grade_entry(request):
+    """
+    Enter grades for one assessment in bulk, either as a JSON body
+    ({"classroom", "subject", "title", "grade_type", "points_possible",
+    "date_assigned", "grades": [...]}) or as form fields plus a CSV file.
+    """
+    try:
+        if request.content_type == 'application/json':
+            data = json.loads(request.body)
+            if not isinstance(data, dict):
+                raise ValueError('Grade data must be an object')
+            rows = data.get('grades', [])
+        else:
+            data = request.POST
+            if 'file' not in request.FILES:
+                return JsonResponse({'success': False, 'message': 'CSV file is required'}, status=400)
+            rows = parse_csv(request.FILES['file'])
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'success': False, 'message': 'Invalid grade data'}, status=400)
+    
+    try:
+        classroom_id = int(data.get('classroom'))
+        subject_id = int(data.get('subject'))
+    except (TypeError, ValueError):
+        return JsonResponse({
+            'success': False,
+            'message': 'Invalid grade data',
+            'errors': [{'row': None, 'error': 'classroom and subject must be integer ids.'}],
+        }, status=400)
+    
+    classroom = get_object_or_404(Classroom, id=classroom_id)
+    subject = get_object_or_404(Subject, id=subject_id)
+    if request.user.role == 'teacher' and classroom.teacher_id != request.user.id:
+        return JsonResponse({'success': False, 'message': 'Permission denied'}, status=403)
+    
+    assessment = {
+        'title': data.get('title'),
+        'grade_type': data.get('grade_type'),
+        'points_possible': data.get('points_possible'),
+        'date_assigned': data.get('date_assigned'),
+        'date_due': data.get('date_due'),
+    }
+    
+    try:
+        created = import_grades(classroom, subject, request.user, assessment, rows)
+    except GradeImportError as e:
+        return JsonResponse({'success': False, 'message': str(e), 'errors': e.errors}, status=400)
+    
+    return JsonResponse({'success': True, 'created': created})
@@ -0,0 +1,238 @@
+"""
+Keyset (cursor) pagination.
+
+Pages are selected with a WHERE clause on the sort key of the last row seen
+instead of OFFSET, so page 500 costs the same as page 1, and no COUNT(*) is
+run unless an approximate count is asked for. Cursors are opaque URL-safe
+tokens holding the sort key values and a direction. The last ordering field
+must be unique (normally the primary key) so the order is total.
+
+KeysetPaginator serves template views; KeysetPagination plugs the same
+logic into Django REST framework.
+"""
+import base64
+import binascii
+import datetime
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+DEFAULT_ORDERING = ('-created_at', '-id')
+DEFAULT_COUNT_LIMIT = 10000
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Keeps full microsecond precision, which DjangoJSONEncoder truncates"""
+
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            return o.isoformat()
+        return super().default(o)
+
+
+def approximate_count(queryset, limit=DEFAULT_COUNT_LIMIT):
+    """
+    Return (count, exact). Unfiltered PostgreSQL tables use the planner's
+    row estimate; otherwise rows are counted up to `limit`.
+    """
+    if connection.vendor == 'postgresql' and not queryset.query.where:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                           [queryset.model._meta.db_table])
+            row = cursor.fetchone()
+        if row and row[0] > limit:
+            return row[0], False
+    count = queryset.order_by()[:limit + 1].count()
+    if count > limit:
+        return limit, False
+    return count, True
+
+
+class KeysetPage:
+    """One page of results; iterable and sized like django.core.paginator.Page"""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self.has_next_page = has_next
+        self.has_previous_page = has_previous
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.has_next_page
+
+    def has_previous(self):
+        return self.has_previous_page
+
+    def has_other_pages(self):
+        return self.has_next_page or self.has_previous_page
+
+    @property
+    def next_cursor(self):
+        if not self.has_next_page or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[-1], 'next')
+
+    @property
+    def previous_cursor(self):
+        if not self.has_previous_page or not self.object_list:
+            return None
+        return self.paginator.encode_cursor(self.object_list[0], 'prev')
+
+
+class KeysetPaginator:
+    """
+    Paginate `queryset` by `ordering` (field names, '-' for descending).
+    Nullable model fields sort their NULLs last.
+    """
+
+    def __init__(self, queryset, per_page, ordering=DEFAULT_ORDERING, count_limit=DEFAULT_COUNT_LIMIT):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.count_limit = count_limit
+        self.fields = []
+        for name in ordering:
+            descending = name.startswith('-')
+            name = name.lstrip('-')
+            self.fields.append((name, descending, self._model_field(name)))
+
+    def _model_field(self, name):
+        try:
+            return self.queryset.model._meta.get_field('pk' if name == 'id' else name)
+        except FieldDoesNotExist:
+            return None  # annotation
+
+    @cached_property
+    def _count(self):
+        return approximate_count(self.queryset, self.count_limit)
+
+    @property
+    def count(self):
+        """Row count, capped at count_limit; see count_is_exact"""
+        return self._count[0]
+
+    @property
+    def count_is_exact(self):
+        return self._count[1]
+
+    def _nullable(self, field):
+        return field is not None and field.null
+
+    def encode_cursor(self, obj, direction):
+        values = [getattr(obj, name) for name, _, _ in self.fields]
+        data = json.dumps({'v': values, 'd': direction}, cls=CursorEncoder, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            data = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            raw_values, direction = data['v'], data['d']
+            if direction not in ('next', 'prev') or len(raw_values) != len(self.fields):
+                raise InvalidCursor(cursor)
+            values = [
+                field.to_python(value) if field is not None and value is not None else value
+                for (_, _, field), value in zip(self.fields, raw_values)
+            ]
+        except (ValueError, KeyError, TypeError, binascii.Error, ValidationError):
+            raise InvalidCursor(cursor)
+        return values, direction
+
+    def _order_by(self, reverse):
+        ordering = []
+        for name, descending, field in self.fields:
+            descending = descending != reverse
+            nulls = {}
+            if self._nullable(field):
+                # NULLs come last going forward, so first when walking backwards
+                nulls = {'nulls_first': True} if reverse else {'nulls_last': True}
+            ordering.append(F(name).desc(**nulls) if descending else F(name).asc(**nulls))
+        return ordering
+
+    def _seek(self, values, reverse):
+        """Rows strictly after (or before, when reverse) the cursor position"""
+        condition = None
+        for (name, descending, field), value in reversed(list(zip(self.fields, values))):
+            nullable = self._nullable(field)
+            if value is None:
+                beyond = Q(**{f'{name}__isnull': False}) if reverse else Q(pk__in=[])
+                same = Q(**{f'{name}__isnull': True})
+            else:
+                lookup = 'gt' if descending == reverse else 'lt'
+                beyond = Q(**{f'{name}__{lookup}': value})
+                if nullable and not reverse:
+                    beyond |= Q(**{f'{name}__isnull': True})
+                same = Q(**{name: value})
+            condition = beyond if condition is None else beyond | (same & condition)
+        return condition
+
+    def get_page(self, cursor=None):
+        """Page after/before `cursor`; the first page for a missing or bad cursor"""
+        values, direction = None, 'next'
+        if cursor:
+            try:
+                values, direction = self.decode_cursor(cursor)
+            except InvalidCursor:
+                values = None
+        
+        reverse = direction == 'prev'
+        queryset = self.queryset.order_by(*self._order_by(reverse))
+        if values is not None:
+            queryset = queryset.filter(self._seek(values, reverse))
+        rows = list(queryset[:self.per_page + 1])
+        more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        
+        if reverse:
+            if not more:
+                # Walked back to the start: show a full first page instead
+                return self.get_page()
+            rows.reverse()
+            return KeysetPage(rows, self, has_next=True, has_previous=True)
+        return KeysetPage(rows, self, has_next=more, has_previous=values is not None)
+
+
+class KeysetPagination(BasePagination):
+    """DRF pagination class: {'next', 'previous', 'results'} with cursor links"""
+    cursor_query_param = 'cursor'
+    page_size = 20
+    ordering = DEFAULT_ORDERING
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = getattr(view, 'keyset_ordering', self.ordering)
+        self.page = KeysetPaginator(queryset, self.page_size, ordering).get_page(
+            request.query_params.get(self.cursor_query_param)
+        )
+        return list(self.page)
+
+    def _link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self._link(self.page.next_cursor),
+            'previous': self._link(self.page.previous_cursor),
+            'results': data,
+        })
@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import sys
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -76,6 +78,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'users.navigation.navigation',
             ],
         },
     },
@@ -145,6 +148,82 @@ LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 LOGOUT_REDIRECT_URL = '/login/'
 
+# Buffered intake for public/anonymous feedback sessions
+FEEDBACK_INTAKE_SPOOL = BASE_DIR / 'var' / 'feedback_intake.sqlite3'
+FEEDBACK_INTAKE_BATCH_SIZE = 500
+FEEDBACK_INTAKE_MAX_DELAY = 30  # seconds
+
+# Chunked, resumable assignment submission uploads
+ASSIGNMENT_UPLOAD_DIR = BASE_DIR / 'var' / 'uploads'
+ASSIGNMENT_UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024
+ASSIGNMENT_UPLOAD_MAX_SIZE = 100 * 1024 * 1024
+
+# Assignment file downloads: None serves from Django, or let the web server
+# send the file with 'X-Sendfile' (Apache) or 'X-Accel-Redirect' (nginx,
+# with an internal location mapped to MEDIA_ROOT at ASSIGNMENT_FILE_ACCEL_PREFIX)
+ASSIGNMENT_FILE_SENDFILE = None
+ASSIGNMENT_FILE_ACCEL_PREFIX = '/protected-media/'
+
+# Cache shared by all web workers and management commands. The cached class
+# ranks, dashboard totals, access scopes, parent summaries, sidebars,
+# workloads and student timelines (and warm_student_timelines) only work
+# when every process sees the same cache, so production sets REDIS_URL
+# (requires the redis package). Without it a file cache under var/ is
+# shared by the processes of one host. Tests keep a per-process cache so
+# runs cannot see each other's entries.
+if 'test' in sys.argv[1:2]:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+elif os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BASE_DIR / 'var' / 'cache',
+            'OPTIONS': {'MAX_ENTRIES': 20000},
+        }
+    }
+
+# Lifetime of cached class ranks (seconds); grade recomputes and classroom
+# moves clear them earlier
+CLASS_RANKS_CACHE_TIMEOUT = 300
+
+# Limits of the user import endpoint; larger files go through
+# `manage.py import_users`, which has no limit
+USER_IMPORT_MAX_UPLOAD_SIZE = 2 * 1024 * 1024
+USER_IMPORT_MAX_ROWS = 500
+
+# Dashboard totals cache lifetime (seconds); signals invalidate it on changes
+DASHBOARD_STATS_TIMEOUT = 60
+
+# Share users' permission scopes (classroom/child ids) across requests for
+# this many seconds; 0 keeps them per request only
+ACCESS_SCOPE_CACHE_TIMEOUT = 30
+
+# Upper bound on the age of a cached parent portal summary (seconds); writes
+# affecting a child make it stale earlier
+PARENT_SUMMARY_CACHE_TIMEOUT = 300
+
+# Lifetime of the cached sidebar fragment (seconds); signals make it stale
+# earlier when its classrooms, sessions or notifications change
+NAVIGATION_CACHE_TIMEOUT = 600
+
+# Lifetime of a teacher's cached dashboard workload summary (seconds)
+TEACHER_WORKLOAD_CACHE_TIMEOUT = 60
+
+# Upper bound on the age of a cached student "today" timeline (seconds);
+# writes concerning the student or their classroom make it stale earlier
+STUDENT_TIMELINE_CACHE_TIMEOUT = 900
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
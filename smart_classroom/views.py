@@ -6,6 +6,7 @@ from django.views.decorators.csrf import csrf_exempt
 import json
 
 from users.models import CustomUser
+from users.stats import get_dashboard_stats
 from teacher.models import TeacherProfile, Assignment, Quiz
 from subject.models import Subject, SubjectTeacher
 from classroom.models import Classroom, Announcement
@@ -25,14 +26,15 @@ def home(request):
             return redirect('users:parent_dashboard')
     
     # For anonymous users, show general dashboard
+    stats = get_dashboard_stats()
     context = {
-        'total_teachers': CustomUser.objects.filter(role='teacher').count(),
-        'total_students': CustomUser.objects.filter(role='student').count(),
-        'total_subjects': Subject.objects.count(),
-        'total_classrooms': Classroom.objects.count(),
-        'total_assignments': Assignment.objects.count(),
-        'total_quizzes': Quiz.objects.count(),
-        'recent_announcements': Announcement.objects.order_by('-created_at')[:5],
+        'total_teachers': stats['total_teachers'],
+        'total_students': stats['total_students'],
+        'total_subjects': stats['total_subjects'],
+        'total_classrooms': stats['total_classrooms'],
+        'total_assignments': stats['total_assignments'],
+        'total_quizzes': stats['total_quizzes'],
+        'recent_announcements': stats['recent_announcements'],
     }
     return render(request, 'dashboard.html', context)
 
@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 from classroom.models import Classroom
 import uuid
+from users.ids import next_id, SUBJECT
 
 class Subject(models.Model):
     subject_id = models.CharField(max_length=20, unique=True, blank=True, null=True)
@@ -10,9 +11,7 @@ class Subject(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.subject_id:
-            # Generate unique subject ID
-            import random
-            self.subject_id = f"SUB{random.randint(10000000, 99999999)}"
+            self.subject_id = next_id(SUBJECT)
         super().save(*args, **kwargs)
 
     def __str__(self):
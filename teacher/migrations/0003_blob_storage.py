@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:28
+
+import assignments.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teacher', '0002_alter_teacherprofile_user'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='assignment',
+            name='file',
+            field=models.FileField(storage=assignments.storage.get_blob_storage, upload_to='assignments/'),
+        ),
+    ]
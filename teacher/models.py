@@ -2,6 +2,7 @@ from django.db import models
 from django.conf import settings
 from classroom.models import Classroom
 from subject.models import Subject
+from assignments.storage import get_blob_storage
 
 class TeacherProfile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='old_teacher_profile')
@@ -12,7 +13,7 @@ class TeacherProfile(models.Model):
 class Assignment(models.Model):
     classroom = models.ForeignKey(Classroom, on_delete=models.CASCADE, related_name='assignments')
     subject = models.ForeignKey(Subject, on_delete=models.CASCADE, related_name='assignments')
-    file = models.FileField(upload_to='assignments/')
+    file = models.FileField(upload_to='assignments/', storage=get_blob_storage)
     due_date = models.DateField()
 
     def __str__(self):
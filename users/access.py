@@ -0,0 +1,127 @@
+"""
+Access-control scope of a user.
+
+The classroom ids a teacher owns and the student ids a parent is linked to
+are loaded once and kept as frozensets on the user object, which Django
+creates per request, so repeated permission checks during a request are
+set lookups. With ACCESS_SCOPE_CACHE_TIMEOUT set, the sets are also shared
+between requests through the cache for that many seconds; signals drop a
+user's entry when their classrooms or children change.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import cached_property
+
+CACHE_KEY = 'users:access_scope:{}'
+
+
+def _cache_timeout():
+    return getattr(settings, 'ACCESS_SCOPE_CACHE_TIMEOUT', 0)
+
+
+class AccessScope:
+    """What one user may see: their classrooms and their children"""
+
+    def __init__(self, user):
+        self.user = user
+
+    @cached_property
+    def _ids(self):
+        timeout = _cache_timeout()
+        key = CACHE_KEY.format(self.user.pk)
+        if timeout:
+            cached = cache.get(key)
+            if cached is not None:
+                return cached
+        ids = self._load()
+        if timeout:
+            cache.set(key, ids, timeout)
+        return ids
+
+    def _load(self):
+        from classroom.models import Classroom
+        from .models import ParentProfile
+        
+        classroom_ids = frozenset()
+        child_ids = frozenset()
+        if self.user.role == 'teacher':
+            classroom_ids = frozenset(Classroom.objects.filter(teacher=self.user).values_list('id', flat=True))
+        elif self.user.role == 'parent':
+            child_ids = frozenset(
+                ParentProfile.students.through.objects.filter(
+                    parentprofile__user=self.user,
+                ).values_list('studentprofile__user_id', flat=True)
+            )
+        return {'classroom_ids': classroom_ids, 'child_ids': child_ids}
+
+    @property
+    def classroom_ids(self):
+        """Ids of classrooms the user teaches"""
+        return self._ids['classroom_ids']
+
+    @property
+    def child_ids(self):
+        """User ids of the students linked to the user as a parent"""
+        return self._ids['child_ids']
+
+    def _student_classroom_id(self, student_user):
+        profile = getattr(student_user, 'student_profile', None)
+        return profile.classroom_id if profile is not None else None
+
+    def can_access_student(self, student_user):
+        role = self.user.role
+        if role == 'admin':
+            return True
+        if role == 'teacher':
+            return self._student_classroom_id(student_user) in self.classroom_ids
+        if role == 'parent':
+            return student_user.pk in self.child_ids
+        if role == 'student':
+            return self.user.pk == student_user.pk
+        return False
+
+    def can_modify_user(self, target_user):
+        if self.user.role == 'admin' or self.user.pk == target_user.pk:
+            return True
+        if self.user.role in ('teacher', 'parent') and target_user.role == 'student':
+            return self.can_access_student(target_user)
+        return False
+
+    def filter_students(self, queryset):
+        """Restrict a StudentProfile queryset to the students the user may access"""
+        role = self.user.role
+        if role == 'admin':
+            return queryset
+        if role == 'teacher':
+            return queryset.filter(classroom_id__in=self.classroom_ids)
+        if role == 'parent':
+            return queryset.filter(user_id__in=self.child_ids)
+        if role == 'student':
+            return queryset.filter(user_id=self.user.pk)
+        return queryset.none()
+
+    def filter_student_users(self, queryset):
+        """Restrict a CustomUser queryset of students to the accessible ones"""
+        role = self.user.role
+        if role == 'admin':
+            return queryset
+        if role == 'teacher':
+            return queryset.filter(student_profile__classroom_id__in=self.classroom_ids)
+        if role == 'parent':
+            return queryset.filter(pk__in=self.child_ids)
+        if role == 'student':
+            return queryset.filter(pk=self.user.pk)
+        return queryset.none()
+
+
+def get_access_scope(user):
+    """The user's scope, built once per user object (i.e. per request)"""
+    scope = getattr(user, '_access_scope', None)
+    if scope is None:
+        scope = AccessScope(user)
+        user._access_scope = scope
+    return scope
+
+
+def invalidate_access_scope(*user_ids):
+    cache.delete_many([CACHE_KEY.format(user_id) for user_id in user_ids if user_id is not None])
@@ -0,0 +1,263 @@
+"""
+Bulk user import, e.g. a whole year group at term start.
+
+The file is validated as a whole before anything is written: usernames,
+classrooms and parents are checked with one query each. Passwords are
+hashed in a process pool, then users, their role profiles, public IDs
+(one reservation per prefix), parent links and search tokens are written
+with bulk_create. bulk_create skips the per-user post_save signals, so the
+caches those signals would clear are invalidated once at the end.
+"""
+import csv
+import io
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.validators import validate_email
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+
+from classroom.models import Classroom
+from .access import invalidate_access_scope
+from .ids import assign_ids, ADMIN, TEACHER, EMPLOYEE, STUDENT
+from .models import CustomUser, StudentProfile, ParentProfile, UserSearchToken, PROFILE_MODELS
+from .search import user_tokens
+from .stats import invalidate_dashboard_stats
+
+BATCH_SIZE = 1000
+ROLES = {value for value, _ in CustomUser.ROLE_CHOICES}
+GRADES = {value for value, _ in StudentProfile.GRADE_CHOICES}
+# Below this many passwords a process pool costs more than it saves
+POOL_THRESHOLD = 50
+
+
+class UserImportError(Exception):
+    """Raised with a list of row errors when a file cannot be imported"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} invalid row(s)")
+
+
+def parse_csv(file_obj):
+    """
+    Read rows from a CSV file with a header: username, role, first_name,
+    last_name, email, password, phone_number, and for students classroom
+    (classroom id or name), grade, roll_number and parent (parent username)
+    """
+    try:
+        content = file_obj.read()
+        if isinstance(content, bytes):
+            content = content.decode('utf-8-sig')
+        return list(csv.DictReader(io.StringIO(content)))
+    except (csv.Error, UnicodeDecodeError) as e:
+        raise UserImportError([{'row': None, 'error': f'Not a readable UTF-8 CSV file: {e}'}])
+
+
+def parse_xlsx(file_obj):
+    """Read rows from the first sheet of an XLSX file with the CSV columns as header"""
+    try:
+        from openpyxl import load_workbook
+        from openpyxl.utils.exceptions import InvalidFileException
+    except ImportError:
+        raise UserImportError([{'row': None, 'error': 'XLSX import requires openpyxl; upload a CSV file instead.'}])
+    try:
+        sheet = load_workbook(file_obj, read_only=True, data_only=True).active
+    except (zipfile.BadZipFile, InvalidFileException, KeyError, OSError) as e:
+        raise UserImportError([{'row': None, 'error': f'Not a readable XLSX file: {e}'}])
+    rows = sheet.iter_rows(values_only=True)
+    header = [str(cell or '').strip() for cell in next(rows, [])]
+    return [
+        {key: '' if value is None else str(value) for key, value in zip(header, row)}
+        for row in rows
+        if any(value not in (None, '') for value in row)
+    ]
+
+
+def parse_file(file_obj, filename):
+    if filename.lower().endswith('.xlsx'):
+        return parse_xlsx(file_obj)
+    return parse_csv(file_obj)
+
+
+def hash_passwords(passwords, workers=None):
+    """make_password for every password, spread over processes for large batches"""
+    workers = workers or getattr(settings, 'USER_IMPORT_WORKERS', None) or os.cpu_count() or 1
+    if workers < 2 or len(passwords) < POOL_THRESHOLD:
+        return [make_password(password) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+
+def _clean(row, key):
+    return str(row.get(key) or '').strip()
+
+
+def _lookup_classrooms(keys):
+    """Classroom ids by public classroom_id or by name, if the name is unambiguous"""
+    found = {}
+    ambiguous = set()
+    for pk, classroom_id, name in Classroom.objects.filter(
+        Q(classroom_id__in=keys) | Q(name__in=keys)
+    ).values_list('id', 'classroom_id', 'name'):
+        if classroom_id in keys:
+            found[classroom_id] = pk
+        if name in keys and name != classroom_id:
+            if name in found and found[name] != pk:
+                ambiguous.add(name)
+            found.setdefault(name, pk)
+    return found, ambiguous
+
+
+def validate_rows(rows):
+    """Check every row; returns cleaned rows or raises UserImportError"""
+    errors = []
+    cleaned = []
+    usernames = {}
+    for number, row in enumerate(rows, start=1):
+        data = {key: _clean(row, key) for key in (
+            'username', 'role', 'first_name', 'last_name', 'email', 'phone_number',
+            'classroom', 'grade', 'roll_number', 'parent',
+        )}
+        data['role'] = data['role'].lower()
+        data['password'] = str(row.get('password') or '') or None
+        data['row'] = number
+        if not data['username']:
+            errors.append({'row': number, 'error': 'username is required.'})
+        elif data['username'] in usernames:
+            errors.append({'row': number, 'error': f'Username "{data["username"]}" appears more than once.'})
+        else:
+            usernames[data['username']] = data
+        if data['role'] not in ROLES:
+            errors.append({'row': number, 'error': f'Invalid role "{data["role"]}".'})
+        if data['email']:
+            try:
+                validate_email(data['email'])
+            except ValidationError:
+                errors.append({'row': number, 'error': f'Invalid email "{data["email"]}".'})
+        if data['grade'] and data['grade'] not in GRADES:
+            errors.append({'row': number, 'error': f'Invalid grade "{data["grade"]}".'})
+        if data['role'] != 'student' and (data['classroom'] or data['parent']):
+            errors.append({'row': number, 'error': 'classroom and parent only apply to students.'})
+        cleaned.append(data)
+
+    taken = set(CustomUser.objects.filter(username__in=list(usernames)).values_list('username', flat=True))
+    for username in taken:
+        errors.append({'row': usernames[username]['row'], 'error': f'Username "{username}" already exists.'})
+
+    classroom_keys = {data['classroom'] for data in cleaned if data['classroom']}
+    classrooms, ambiguous = _lookup_classrooms(classroom_keys) if classroom_keys else ({}, set())
+
+    parent_keys = {data['parent'] for data in cleaned if data['parent']}
+    new_parents = {username for username, data in usernames.items() if data['role'] == 'parent'}
+    existing_parents = dict(ParentProfile.objects.filter(
+        user__username__in=parent_keys - new_parents,
+    ).values_list('user__username', 'id'))
+
+    for data in cleaned:
+        if data['classroom']:
+            if data['classroom'] in ambiguous:
+                errors.append({'row': data['row'], 'error': f'Classroom name "{data["classroom"]}" is ambiguous; use its id.'})
+            elif data['classroom'] not in classrooms:
+                errors.append({'row': data['row'], 'error': f'Classroom "{data["classroom"]}" does not exist.'})
+            data['classroom_pk'] = classrooms.get(data['classroom'])
+        if data['parent'] and data['parent'] not in new_parents and data['parent'] not in existing_parents:
+            errors.append({'row': data['row'], 'error': f'Parent "{data["parent"]}" does not exist.'})
+
+    if errors:
+        raise UserImportError(sorted(errors, key=lambda error: error['row'] or 0))
+    return cleaned, existing_parents
+
+
+def import_users(rows, workers=None, progress=None):
+    """
+    Validate and create users with their profiles; returns the number of
+    users created per role. `progress(stage, done, total)` is called as the
+    import advances.
+    """
+    report = progress or (lambda stage, done, total: None)
+    cleaned, existing_parents = validate_rows(rows)
+    total = len(cleaned)
+
+    report('hashing passwords', 0, total)
+    hashes = hash_passwords([data['password'] for data in cleaned], workers)
+    report('hashing passwords', total, total)
+
+    users = [
+        CustomUser(
+            username=data['username'],
+            role=data['role'],
+            first_name=data['first_name'],
+            last_name=data['last_name'],
+            email=data['email'],
+            phone_number=data['phone_number'] or None,
+            password=password,
+            is_staff=data['role'] == 'admin',
+        )
+        for data, password in zip(cleaned, hashes)
+    ]
+
+    with transaction.atomic():
+        for start in range(0, total, BATCH_SIZE):
+            CustomUser.objects.bulk_create(users[start:start + BATCH_SIZE])
+            report('creating users', min(start + BATCH_SIZE, total), total)
+        if any(user.pk is None for user in users):
+            # Backends without RETURNING leave the primary keys unset
+            pks = dict(CustomUser.objects.filter(
+                username__in=[user.username for user in users],
+            ).values_list('username', 'id'))
+            for user in users:
+                user.pk = pks[user.username]
+
+        profiles = {role: [] for role in PROFILE_MODELS}
+        for data, user in zip(cleaned, users):
+            if data['role'] == 'student':
+                profile = StudentProfile(
+                    user=user,
+                    classroom_id=data.get('classroom_pk'),
+                    grade=data['grade'],
+                    roll_number=data['roll_number'],
+                )
+            else:
+                profile = PROFILE_MODELS[data['role']](user=user)
+            profiles[data['role']].append(profile)
+
+        assign_ids(profiles['admin'], 'employee_id', ADMIN)
+        assign_ids(profiles['teacher'], 'teacher_id', TEACHER)
+        assign_ids(profiles['teacher'], 'employee_id', EMPLOYEE)
+        assign_ids(profiles['student'], 'student_id', STUDENT)
+        for role, role_profiles in profiles.items():
+            PROFILE_MODELS[role].objects.bulk_create(role_profiles, batch_size=BATCH_SIZE)
+        report('creating profiles', total, total)
+
+        parent_ids = dict(existing_parents)
+        parent_ids.update((profile.user.username, profile.pk) for profile in profiles['parent'])
+        student_profiles = {profile.user.username: profile for profile in profiles['student']}
+        links = [
+            ParentProfile.students.through(parentprofile_id=parent_ids[data['parent']],
+                                           studentprofile_id=student_profiles[data['username']].pk)
+            for data in cleaned if data['parent']
+        ]
+        ParentProfile.students.through.objects.bulk_create(links, batch_size=BATCH_SIZE)
+        report('linking parents', len(links), len(links))
+
+        UserSearchToken.objects.bulk_create(
+            (
+                UserSearchToken(user=user, token=token)
+                for user in users
+                for token in user_tokens(user, student_profiles.get(user.username))
+            ),
+            batch_size=BATCH_SIZE,
+        )
+        report('indexing for search', total, total)
+
+    # The signals bulk_create skipped would have cleared these
+    invalidate_dashboard_stats()
+    linked_parents = {parent_ids[data['parent']] for data in cleaned if data['parent']}
+    invalidate_access_scope(*ParentProfile.objects.filter(pk__in=linked_parents).values_list('user_id', flat=True))
+
+    return {role: len(role_profiles) for role, role_profiles in profiles.items() if role_profiles}
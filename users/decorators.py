@@ -3,6 +3,7 @@ from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied
 from django.shortcuts import redirect
 from django.contrib import messages
+from .access import get_access_scope
 
 def role_required(allowed_roles):
     """
@@ -86,49 +87,18 @@ def can_modify_user(user, target_user):
     Check if a user can modify another user's data.
     Admins can modify anyone.
     Teachers can modify their own data and their students' data.
-    Students and parents can only modify their own data.
+    Parents can modify their own data and their children's data.
+    Students can only modify their own data.
     """
-    if user.role == 'admin':
-        return True
-    elif user.role == 'teacher':
-        if user == target_user:
-            return True
-        # Teachers can modify their students' data
-        if target_user.role == 'student' and hasattr(target_user, 'student_profile'):
-            # Check if the student is in any of the teacher's classrooms
-            teacher_classrooms = user.classrooms.all()
-            student_classroom = target_user.student_profile.classroom
-            return student_classroom in teacher_classrooms
-    elif user.role == 'parent':
-        if user == target_user:
-            return True
-        # Parents can view their children's data
-        if target_user.role == 'student' and hasattr(user, 'parent_profile'):
-            return target_user.student_profile in user.parent_profile.students.all()
-    elif user.role == 'student':
-        return user == target_user
-    
-    return False
+    return get_access_scope(user).can_modify_user(target_user)
 
 def user_can_access_student_data(user, student_user):
     """
     Check if a user can access student data.
     Used for attendance, grades, etc.
     """
-    if user.role == 'admin':
-        return True
-    elif user.role == 'teacher':
-        # Teachers can access their students' data
-        if hasattr(student_user, 'student_profile'):
-            teacher_classrooms = user.classrooms.all()
-            student_classroom = student_user.student_profile.classroom
-            return student_classroom in teacher_classrooms
-    elif user.role == 'parent':
-        # Parents can access their children's data
-        if hasattr(user, 'parent_profile') and hasattr(student_user, 'student_profile'):
-            return student_user.student_profile in user.parent_profile.students.all()
-    elif user.role == 'student':
-        # Students can access their own data
-        return user == student_user
-    
-    return False
\ No newline at end of file
+    return get_access_scope(user).can_access_student(student_user)
+
+def filter_accessible_students(user, queryset):
+    """Restrict a StudentProfile queryset to the students the user may access"""
+    return get_access_scope(user).filter_students(queryset)
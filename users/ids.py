@@ -0,0 +1,59 @@
+"""
+Sequential public IDs (student, teacher, employee, classroom, subject).
+
+Each prefix has a counter row in IdSequence. A caller reserves a block of
+numbers with a single atomic increment, so bulk creation of thousands of
+rows takes one reservation and never collides or retries, and new IDs are
+increasing, which keeps inserts at the end of their unique indexes.
+Numbers of a rolled-back transaction are returned to the counter with it.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+STUDENT = 'STU'
+TEACHER = 'TCH'
+EMPLOYEE = 'EMP'
+ADMIN = 'ADM'
+CLASSROOM = 'CLS'
+SUBJECT = 'SUB'
+
+DIGITS = 6
+
+
+def format_id(prefix, number):
+    return f"{prefix}{number:0{DIGITS}d}"
+
+
+def reserve(prefix, count=1):
+    """Reserve `count` consecutive numbers for `prefix`; returns a range"""
+    from .models import IdSequence
+    
+    with transaction.atomic():
+        updated = IdSequence.objects.filter(prefix=prefix).update(next_value=F('next_value') + count)
+        if not updated:
+            try:
+                with transaction.atomic():
+                    IdSequence.objects.create(prefix=prefix, next_value=1 + count)
+                return range(1, 1 + count)
+            except IntegrityError:
+                # Another process created the counter first
+                IdSequence.objects.filter(prefix=prefix).update(next_value=F('next_value') + count)
+        end = IdSequence.objects.filter(prefix=prefix).values_list('next_value', flat=True).get()
+    return range(end - count, end)
+
+
+def allocate_ids(prefix, count):
+    """`count` new formatted IDs in one reservation"""
+    return [format_id(prefix, number) for number in reserve(prefix, count)]
+
+
+def next_id(prefix):
+    return allocate_ids(prefix, 1)[0]
+
+
+def assign_ids(objects, field_name, prefix):
+    """Fill `field_name` on every object that has no value yet, with one reservation"""
+    missing = [obj for obj in objects if not getattr(obj, field_name)]
+    for obj, value in zip(missing, allocate_ids(prefix, len(missing)) if missing else []):
+        setattr(obj, field_name, value)
+    return objects
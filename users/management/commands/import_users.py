@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.bulk import UserImportError, import_users, parse_file
+
+
+class Command(BaseCommand):
+    help = 'Import users with their profiles from a CSV or XLSX file (username, role, names, email, password, classroom, parent, ...)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Path to the CSV or XLSX file')
+        parser.add_argument('--workers', type=int, default=None, help='Processes used to hash passwords')
+
+    def handle(self, *args, **options):
+        def progress(stage, done, total):
+            self.stdout.write(f'  {stage}: {done}/{total}')
+
+        try:
+            with open(options['file'], 'rb') as f:
+                rows = parse_file(f, options['file'])
+            self.stdout.write(f'Importing {len(rows)} users...')
+            created = import_users(rows, workers=options['workers'], progress=progress)
+        except UserImportError as e:
+            for error in e.errors:
+                row = f"row {error['row']}: " if error['row'] else ''
+                self.stderr.write(f"{row}{error['error']}")
+            raise CommandError(str(e))
+
+        summary = ', '.join(f'{count} {role}s' for role, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f'✅ Imported {sum(created.values())} users ({summary})'))
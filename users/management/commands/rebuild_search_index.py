@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from users.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the user search token index'
+
+    def handle(self, *args, **options):
+        count = rebuild_index()
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Indexed {count} users'))
@@ -0,0 +1,32 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand, CommandError
+
+from users.models import CustomUser
+from users.timeline import get_student_timeline
+
+
+class Command(BaseCommand):
+    help = (
+        'Build the cached "today" timeline of every active student, e.g. from an early-morning cron job. '
+        'Requires a cache shared with the web workers (CACHES in settings).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--classroom', type=int, default=None, help='Only students of this classroom id')
+
+    def handle(self, *args, **options):
+        if isinstance(caches['default'], LocMemCache):
+            raise CommandError('The default cache is local to this process; configure a shared cache '
+                               '(e.g. REDIS_URL) so the web workers can read the timelines.')
+
+        students = CustomUser.objects.filter(role='student', is_active=True, student_profile__isnull=False)
+        if options['classroom']:
+            students = students.filter(student_profile__classroom_id=options['classroom'])
+
+        count = 0
+        for student in students.select_related('student_profile').iterator():
+            get_student_timeline(student, student.student_profile.classroom_id, refresh=True)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f'✅ Built timelines for {count} students'))
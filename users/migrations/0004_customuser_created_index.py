@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 23:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_usersearchtoken'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['-created_at', '-id'], name='users_created_id_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.30 on 2026-10-19 10:12
+
+import re
+import unicodedata
+
+from django.db import migrations
+
+BATCH_SIZE = 1000
+MAX_TOKEN_LENGTH = 64
+DIGITS_RE = re.compile(r'\d+')
+
+
+# A frozen copy of the users.search tokenizer as of this migration, so
+# later changes there do not change what this migration writes
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def words(text):
+    word = []
+    for c in text:
+        if unicodedata.category(c)[0] in 'LNM':
+            word.append(c)
+        elif word:
+            yield ''.join(word)
+            word = []
+    if word:
+        yield ''.join(word)
+
+
+def tokenize(text):
+    tokens = []
+    for word in words(normalize(text)):
+        tokens.append(word[:MAX_TOKEN_LENGTH])
+        tokens.extend(digits for digits in DIGITS_RE.findall(word) if digits != word)
+    return tokens
+
+
+def user_tokens(user, student_profile=None):
+    fields = [user.username, user.first_name, user.last_name, user.email]
+    if student_profile is not None:
+        fields += [student_profile.student_id, student_profile.roll_number]
+    tokens = set()
+    for value in fields:
+        tokens.update(tokenize(value))
+    return tokens
+
+
+def index_existing_users(apps, schema_editor):
+    """Fill UserSearchToken for users created before the search index existed"""
+    CustomUser = apps.get_model('users', 'CustomUser')
+    StudentProfile = apps.get_model('users', 'StudentProfile')
+    UserSearchToken = apps.get_model('users', 'UserSearchToken')
+
+    profiles = {profile.user_id: profile for profile in StudentProfile.objects.all()}
+    UserSearchToken.objects.all().delete()
+    batch = []
+    for user in CustomUser.objects.all().iterator():
+        profile = profiles.get(user.id) if user.role == 'student' else None
+        batch.extend(UserSearchToken(user_id=user.id, token=token) for token in user_tokens(user, profile))
+        if len(batch) >= BATCH_SIZE:
+            UserSearchToken.objects.bulk_create(batch)
+            batch = []
+    UserSearchToken.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_idsequence'),
+    ]
+
+    operations = [
+        migrations.RunPython(index_existing_users, migrations.RunPython.noop),
+    ]
@@ -1,7 +1,7 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.core.validators import RegexValidator
-import uuid
+from .ids import next_id, ADMIN, TEACHER, EMPLOYEE, STUDENT
 
 class CustomUser(AbstractUser):
     ROLE_CHOICES = (
@@ -30,6 +30,12 @@ class CustomUser(AbstractUser):
     
     def get_full_name(self):
         return f"{self.first_name} {self.last_name}".strip() or self.username
+    
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Keyset pagination of user lists
+            models.Index(fields=['-created_at', '-id'], name='users_created_id_idx'),
+        ]
 
 class AdminProfile(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='admin_profile')
@@ -47,7 +53,7 @@ class AdminProfile(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.employee_id:
-            self.employee_id = f"ADM{str(uuid.uuid4().int)[:8]}"
+            self.employee_id = next_id(ADMIN)
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -68,17 +74,9 @@ class TeacherProfile(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.teacher_id:
-            # Generate 4-digit ID with first two letters from name
-            first_initial = self.user.first_name[:2].upper() if self.user.first_name else 'TC'
-            import random
-            number = random.randint(10, 99)
-            self.teacher_id = f"{first_initial}{number:02d}"
+            self.teacher_id = next_id(TEACHER)
         if not self.employee_id:
-            # Generate employee ID
-            first_initial = self.user.first_name[:2].upper() if self.user.first_name else 'EM'
-            import random
-            number = random.randint(10, 99)
-            self.employee_id = f"{first_initial}{number:02d}"
+            self.employee_id = next_id(EMPLOYEE)
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -117,11 +115,7 @@ class StudentProfile(models.Model):
     
     def save(self, *args, **kwargs):
         if not self.student_id:
-            # Generate 4-digit ID with first two letters from name
-            first_initial = self.user.first_name[:2].upper() if self.user.first_name else 'ST'
-            import random
-            number = random.randint(10, 99)
-            self.student_id = f"{first_initial}{number:02d}"
+            self.student_id = next_id(STUDENT)
         super().save(*args, **kwargs)
     
     def __str__(self):
@@ -152,29 +146,29 @@ class ParentProfile(models.Model):
     def get_children(self):
         return self.students.all()
 
-# Signal to create profiles automatically
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+# Profile model of each role
+PROFILE_MODELS = {
+    'admin': AdminProfile,
+    'teacher': TeacherProfile,
+    'student': StudentProfile,
+    'parent': ParentProfile,
+}
 
-@receiver(post_save, sender=CustomUser)
-def create_user_profile(sender, instance, created, **kwargs):
-    if created:
-        if instance.role == 'admin':
-            AdminProfile.objects.create(user=instance)
-        elif instance.role == 'teacher':
-            TeacherProfile.objects.create(user=instance)
-        elif instance.role == 'student':
-            StudentProfile.objects.create(user=instance)
-        elif instance.role == 'parent':
-            ParentProfile.objects.create(user=instance)
+class IdSequence(models.Model):
+    """Next free number for a public ID prefix, handed out by users.ids"""
+    prefix = models.CharField(max_length=10, primary_key=True)
+    next_value = models.PositiveBigIntegerField(default=1)
+    
+    def __str__(self):
+        return f"{self.prefix}: next {self.next_value}"
 
-@receiver(post_save, sender=CustomUser)
-def save_user_profile(sender, instance, **kwargs):
-    if instance.role == 'admin' and hasattr(instance, 'admin_profile'):
-        instance.admin_profile.save()
-    elif instance.role == 'teacher' and hasattr(instance, 'teacher_profile'):
-        instance.teacher_profile.save()
-    elif instance.role == 'student' and hasattr(instance, 'student_profile'):
-        instance.student_profile.save()
-    elif instance.role == 'parent' and hasattr(instance, 'parent_profile'):
-        instance.parent_profile.save()
+class UserSearchToken(models.Model):
+    """Normalized search token of a user, maintained by users.search"""
+    user = models.ForeignKey(CustomUser, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=64)
+    
+    def __str__(self):
+        return f"{self.token} -> {self.user_id}"
+    
+    class Meta:
+        unique_together = ['token', 'user']
@@ -0,0 +1,63 @@
+"""
+Sidebar navigation shared by every page through base.html.
+
+The sidebar is a template fragment cached per (role, user id, version).
+`navigation` is a context processor that only reads the version tokens
+(one cache round trip); the counters shown in the sidebar are lazy, so
+they are queried only when the fragment is rebuilt. Signals replace a
+user's token when their classrooms, attendance sessions or notifications
+change, and the admin role token when any attendance session changes.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.functional import SimpleLazyObject
+
+USER_VERSION_KEY = 'users:nav_version:{}'
+ROLE_VERSION_KEY = 'users:nav_version:role:{}'
+DEFAULT_TIMEOUT = 600
+
+
+def bump_navigation(user_ids=(), roles=()):
+    """Make the cached sidebars of these users / whole roles stale"""
+    keys = [USER_VERSION_KEY.format(user_id) for user_id in user_ids if user_id is not None]
+    keys += [ROLE_VERSION_KEY.format(role) for role in roles]
+    cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+
+def navigation_version(user):
+    keys = [ROLE_VERSION_KEY.format(user.role), USER_VERSION_KEY.format(user.pk)]
+    versions = cache.get_many(keys)
+    missing = {key: uuid.uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return '.'.join(versions[key] for key in keys)
+
+
+def navigation_counters(user):
+    """Badge counts of the sidebar"""
+    from attendance.models import AttendanceSession
+    from feedback.models import FeedbackNotification
+
+    counters = {'attendance': 0, 'feedback': 0}
+    if user.role in ('admin', 'teacher'):
+        sessions = AttendanceSession.objects.filter(status='active')
+        if user.role == 'teacher':
+            sessions = sessions.filter(teacher=user)
+        counters['attendance'] = sessions.count()
+        counters['feedback'] = FeedbackNotification.objects.filter(recipient=user, is_read=False).count()
+    return counters
+
+
+def navigation(request):
+    """Context processor: key and lazy counters for the cached sidebar fragment"""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return {'nav_cache_timeout': 0, 'nav_version': ''}
+    return {
+        'nav_cache_timeout': getattr(settings, 'NAVIGATION_CACHE_TIMEOUT', DEFAULT_TIMEOUT),
+        'nav_version': navigation_version(user),
+        'nav_counters': SimpleLazyObject(lambda: navigation_counters(user)),
+    }
@@ -0,0 +1,198 @@
+"""
+Parent portal summary: attendance, recent grades, upcoming assignments and
+missing submissions for all of a parent's children.
+
+Each section is one query over all children (recent grades use a window
+function to keep the latest few per child), so the cost does not grow with
+the number of children. The summary is cached per parent together with
+version tokens of the children and their classrooms; writes that affect a
+child bump the token (a cache write, no query), which makes the cached
+summary stale without having to find the parents.
+"""
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .access import get_access_scope
+from .models import StudentProfile
+
+CACHE_KEY = 'users:parent_summary:{}'
+STUDENT_VERSION_KEY = 'users:student_version:{}'
+CLASSROOM_VERSION_KEY = 'users:classroom_version:{}'
+DEFAULT_TIMEOUT = 300
+RECENT_GRADES = 5
+UPCOMING_DAYS = 14
+
+
+def _new_token():
+    return uuid.uuid4().hex
+
+
+def _replace_tokens_on_commit(keys):
+    # A token replaced before the commit could be read by a concurrent
+    # rebuild that still sees the old rows and caches them as current
+    if keys:
+        transaction.on_commit(lambda: cache.set_many({key: _new_token() for key in keys}, None))
+
+
+def touch_students(student_ids):
+    """Mark cached summaries of these students (user ids) stale once the transaction commits"""
+    _replace_tokens_on_commit([STUDENT_VERSION_KEY.format(student_id) for student_id in student_ids])
+
+
+def touch_classrooms(classroom_ids):
+    """Mark cached summaries of students in these classrooms stale once the transaction commits"""
+    _replace_tokens_on_commit([CLASSROOM_VERSION_KEY.format(classroom_id) for classroom_id in classroom_ids])
+
+
+def current_versions(keys):
+    """Version tokens of these keys, creating missing ones"""
+    versions = cache.get_many(keys)
+    missing = {key: _new_token() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return versions
+
+
+def _attendance(student_ids):
+    from attendance.models import AttendanceRecord
+
+    rows = AttendanceRecord.objects.filter(student_id__in=student_ids).values('student_id').annotate(
+        total=Count('id'),
+        present=Count('id', filter=Q(status='present')),
+        late=Count('id', filter=Q(status='late')),
+        absent=Count('id', filter=Q(status='absent')),
+    ).order_by()
+    attendance = {}
+    for row in rows:
+        student_id = row.pop('student_id')
+        row['rate'] = round(row['present'] / row['total'] * 100, 1) if row['total'] else 0
+        attendance[student_id] = row
+    return attendance
+
+
+def _recent_grades(student_ids):
+    from grades.models import Grade
+
+    grades = Grade.objects.filter(student_id__in=student_ids).annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=[F('student_id')],
+            order_by=[F('date_assigned').desc(), F('id').desc()],
+        ),
+    ).filter(position__lte=RECENT_GRADES).values_list(
+        'student_id', 'title', 'subject__name', 'grade_type', 'percentage', 'date_assigned',
+    ).order_by('student_id', 'position')
+    recent = {}
+    for student_id, title, subject, grade_type, percentage, date_assigned in grades:
+        recent.setdefault(student_id, []).append({
+            'title': title,
+            'subject': subject,
+            'grade_type': grade_type,
+            'percentage': float(percentage) if percentage is not None else None,
+            'date_assigned': date_assigned,
+        })
+    return recent
+
+
+def _child_assignments(student_ids, due_filter, order_by):
+    """(child id, assignment) rows for published assignments in the children's classrooms"""
+    from assignments.models import Assignment, AssignmentSubmission
+
+    return Assignment.objects.filter(
+        due_filter,
+        status='published',
+        classroom__students__user_id__in=student_ids,
+    ).annotate(
+        child_id=F('classroom__students__user_id'),
+        submitted=Exists(AssignmentSubmission.objects.filter(
+            assignment=OuterRef('pk'), student_id=OuterRef('child_id'),
+        )),
+    ).values_list('child_id', 'id', 'title', 'subject__name', 'due_date', 'submitted').order_by(*order_by)
+
+
+def _upcoming_assignments(student_ids, now):
+    rows = _child_assignments(
+        student_ids,
+        Q(due_date__gte=now, due_date__lte=now + timedelta(days=UPCOMING_DAYS)),
+        ['due_date', 'id'],
+    )
+    upcoming = {}
+    for child_id, assignment_id, title, subject, due_date, submitted in rows:
+        upcoming.setdefault(child_id, []).append({
+            'id': assignment_id, 'title': title, 'subject': subject, 'due_date': due_date, 'submitted': submitted,
+        })
+    return upcoming
+
+
+def _missing_submissions(student_ids, now):
+    rows = _child_assignments(student_ids, Q(due_date__lt=now), ['-due_date', 'id']).filter(submitted=False)
+    missing = {}
+    for child_id, assignment_id, title, subject, due_date, _ in rows:
+        missing.setdefault(child_id, []).append({
+            'id': assignment_id, 'title': title, 'subject': subject, 'due_date': due_date,
+        })
+    return missing
+
+
+def compute_parent_summary(child_ids, now=None):
+    """Summary of each child (user ids), in five queries whatever the number of children"""
+    now = now or timezone.now()
+    children = list(
+        StudentProfile.objects.filter(user_id__in=child_ids).select_related('user', 'classroom')
+        .order_by('user__first_name', 'user__last_name', 'user_id')
+    )
+    if not children:
+        return []
+    student_ids = [child.user_id for child in children]
+    attendance = _attendance(student_ids)
+    recent_grades = _recent_grades(student_ids)
+    upcoming = _upcoming_assignments(student_ids, now)
+    missing = _missing_submissions(student_ids, now)
+
+    no_attendance = {'total': 0, 'present': 0, 'late': 0, 'absent': 0, 'rate': 0}
+    return [
+        {
+            'id': child.user_id,
+            'name': child.user.get_full_name(),
+            'student_id': child.student_id,
+            'classroom': child.classroom.name if child.classroom else None,
+            'classroom_id': child.classroom_id,
+            'attendance': attendance.get(child.user_id, no_attendance),
+            'recent_grades': recent_grades.get(child.user_id, []),
+            'upcoming_assignments': upcoming.get(child.user_id, []),
+            'missing_submissions': missing.get(child.user_id, []),
+        }
+        for child in children
+    ]
+
+
+def get_parent_summary(parent_user):
+    """The parent's summary, from the cache unless one of the children changed since"""
+    child_ids = get_access_scope(parent_user).child_ids
+    key = CACHE_KEY.format(parent_user.pk)
+    cached = cache.get(key)
+    if cached is not None and cached['child_ids'] == child_ids:
+        if cache.get_many(cached['versions']) == cached['versions']:
+            return cached['children']
+
+    # Read the children's tokens first, so a write during the computation
+    # leaves the stored entry stale rather than hiding the write
+    versions = current_versions([STUDENT_VERSION_KEY.format(student_id) for student_id in child_ids])
+    children = compute_parent_summary(child_ids)
+    versions.update(current_versions([
+        CLASSROOM_VERSION_KEY.format(child['classroom_id']) for child in children if child['classroom_id']
+    ]))
+    cache.set(key, {
+        'child_ids': child_ids,
+        'versions': versions,
+        'children': children,
+    }, getattr(settings, 'PARENT_SUMMARY_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return children
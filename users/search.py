@@ -0,0 +1,155 @@
+"""
+Indexed user search.
+
+Every user gets a set of normalized tokens (lowercased, accents removed,
+split on anything that is not a letter, digit or mark in any script, with
+digit runs indexed separately) built from the
+username, names, email and student id / roll number. The tokens live in
+UserSearchToken with a (token, user) index, so a search term is a prefix
+range scan on that index instead of leading-wildcard LIKEs over the whole
+user table. Every term of a query must prefix-match one of a user's tokens;
+users are ranked by how many terms match a token exactly.
+"""
+import re
+import unicodedata
+
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, OuterRef, Q, Subquery, Sum, When
+
+from .models import CustomUser, StudentProfile, UserSearchToken
+
+DIGITS_RE = re.compile(r'\d+')
+MAX_TOKEN_LENGTH = 64
+MAX_TERMS = 5
+# Sorts after every character, closing the prefix range
+RANGE_END = '\U0010ffff'
+
+
+def normalize(text):
+    text = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in text if not unicodedata.combining(c)).lower()
+
+
+def words(text):
+    """Runs of letters, digits and marks of any script in normalized text"""
+    word = []
+    for c in text:
+        # Marks too: Devanagari vowel signs etc. are part of the word
+        if unicodedata.category(c)[0] in 'LNM':
+            word.append(c)
+        elif word:
+            yield ''.join(word)
+            word = []
+    if word:
+        yield ''.join(word)
+
+
+def tokenize(text):
+    tokens = []
+    for word in words(normalize(text)):
+        tokens.append(word[:MAX_TOKEN_LENGTH])
+        # "stu2024001" is also found by "2024001"
+        tokens.extend(digits for digits in DIGITS_RE.findall(word) if digits != word)
+    return tokens
+
+
+def user_tokens(user, student_profile=None):
+    fields = [user.username, user.first_name, user.last_name, user.email]
+    if student_profile is not None:
+        fields += [student_profile.student_id, student_profile.roll_number]
+    tokens = set()
+    for value in fields:
+        tokens.update(tokenize(value))
+    return tokens
+
+
+def index_user(user, student_profile=None):
+    """Replace a user's search tokens"""
+    if student_profile is None and user.role == 'student':
+        student_profile = StudentProfile.objects.filter(user=user).first()
+    tokens = user_tokens(user, student_profile)
+    with transaction.atomic():
+        UserSearchToken.objects.filter(user=user).delete()
+        UserSearchToken.objects.bulk_create([UserSearchToken(user=user, token=token) for token in tokens])
+
+
+def rebuild_index(batch_size=1000):
+    """Rebuild every user's tokens, e.g. after bulk writes that skip signals"""
+    profiles = {profile.user_id: profile for profile in StudentProfile.objects.all()}
+    count = 0
+    with transaction.atomic():
+        UserSearchToken.objects.all().delete()
+        batch = []
+        for user in CustomUser.objects.all().iterator():
+            batch.extend(
+                UserSearchToken(user=user, token=token)
+                for token in user_tokens(user, profiles.get(user.id))
+            )
+            count += 1
+            if len(batch) >= batch_size:
+                UserSearchToken.objects.bulk_create(batch)
+                batch = []
+        UserSearchToken.objects.bulk_create(batch)
+    return count
+
+
+def query_terms(query):
+    return list(dict.fromkeys(word[:MAX_TOKEN_LENGTH] for word in words(normalize(query))))[:MAX_TERMS]
+
+
+def _prefix(term):
+    return Q(token__gte=term, token__lt=term + RANGE_END)
+
+
+def matching_tokens(terms):
+    """
+    One row per matching user with matched_terms and exact_matches, from
+    prefix range scans on the token index.
+    """
+    term_number = Case(
+        *[When(_prefix(term), then=number) for number, term in enumerate(terms)],
+        output_field=IntegerField(),
+    )
+    condition = Q()
+    for term in terms:
+        condition |= _prefix(term)
+    return UserSearchToken.objects.filter(condition).values('user_id').annotate(
+        matched_terms=Count(term_number, distinct=True),
+        exact_matches=Sum(Case(When(token__in=terms, then=1), default=0, output_field=IntegerField())),
+    ).filter(matched_terms=len(terms))
+
+
+def search_users(queryset, query, user_field='id'):
+    """
+    Filter a queryset of users (or of rows pointing at users through
+    `user_field`) to those matching every term, best matches first. Returns
+    the queryset unchanged for an empty query and no rows for a query
+    without searchable characters.
+    """
+    if not (query or '').strip():
+        return queryset
+    terms = query_terms(query)
+    if not terms:
+        return queryset.none()
+    matches = matching_tokens(terms)
+    rank = matches.filter(user_id=OuterRef(user_field)).values('exact_matches')
+    return queryset.filter(**{f'{user_field}__in': matches.values('user_id')}).annotate(
+        search_rank=Subquery(rank, output_field=IntegerField()),
+    ).order_by('-search_rank', *queryset.query.order_by)
+
+
+def autocomplete(query, queryset=None, limit=10):
+    """Top matches as dicts for type-ahead search boxes"""
+    queryset = queryset if queryset is not None else CustomUser.objects.all()
+    users = search_users(queryset, query)
+    if users is queryset:
+        return []
+    return [
+        {
+            'id': user.id,
+            'username': user.username,
+            'name': user.get_full_name(),
+            'role': user.role,
+        }
+        for user in users.only('id', 'username', 'first_name', 'last_name', 'role')[:limit]
+    ]
@@ -1,41 +1,152 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_init, pre_save, post_save, post_delete, pre_delete, m2m_changed
 from django.dispatch import receiver
-from .models import CustomUser, StudentProfile, TeacherProfile, AdminProfile, ParentProfile
+from .models import CustomUser, StudentProfile, ParentProfile, PROFILE_MODELS
+from .stats import COUNTED_MODELS, invalidate_dashboard_stats
+from .search import index_user
+from .access import invalidate_access_scope
+from .portal import touch_students, touch_classrooms
+from .navigation import bump_navigation
+from classroom.models import Classroom
+from attendance.models import AttendanceRecord, AttendanceSession
+from feedback.models import FeedbackNotification, FeedbackResponse, FeedbackSession
+from assignments.models import Assignment, AssignmentSubmission
+
+
+@receiver(post_init, sender=CustomUser)
+def remember_user_role(sender, instance, **kwargs):
+    # Read from __dict__ so a deferred role is not loaded
+    instance._saved_role = instance.__dict__.get('role')
 
 
 @receiver(post_save, sender=CustomUser)
-def create_user_profile(sender, instance, created, **kwargs):
-    """Create appropriate profile when a user is created"""
+def sync_user_profile(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Give a user the profile of their role when they are created or change role.
+    Other saves (last_login on every login, edits of the user's own fields)
+    leave the profile alone.
+    """
+    if update_fields is not None and 'role' not in update_fields:
+        return
+    model = PROFILE_MODELS.get(instance.role)
+    if model is None:
+        return
     if created:
-        if instance.role == 'student':
-            StudentProfile.objects.get_or_create(user=instance)
-        elif instance.role == 'teacher':
-            TeacherProfile.objects.get_or_create(user=instance)
-        elif instance.role == 'admin':
-            AdminProfile.objects.get_or_create(user=instance)
-        elif instance.role == 'parent':
-            ParentProfile.objects.get_or_create(user=instance)
+        model.objects.create(user=instance)
+    elif instance.role != instance._saved_role:
+        model.objects.get_or_create(user=instance)
+    instance._saved_role = instance.role
+
+
+for model in COUNTED_MODELS:
+    post_save.connect(invalidate_dashboard_stats, sender=model, dispatch_uid=f'dashboard_stats.save.{model._meta.label_lower}')
+    post_delete.connect(invalidate_dashboard_stats, sender=model, dispatch_uid=f'dashboard_stats.delete.{model._meta.label_lower}')
+
+
+USER_SEARCH_FIELDS = {'username', 'first_name', 'last_name', 'email', 'role'}
+PROFILE_SEARCH_FIELDS = {'student_id', 'roll_number'}
 
 
 @receiver(post_save, sender=CustomUser)
-def save_user_profile(sender, instance, **kwargs):
-    """Save the profile when user is saved"""
-    try:
-        if instance.role == 'student' and hasattr(instance, 'student_profile'):
-            instance.student_profile.save()
-        elif instance.role == 'teacher' and hasattr(instance, 'teacher_profile'):
-            instance.teacher_profile.save()
-        elif instance.role == 'admin' and hasattr(instance, 'admin_profile'):
-            instance.admin_profile.save()
-        elif instance.role == 'parent' and hasattr(instance, 'parent_profile'):
-            instance.parent_profile.save()
-    except Exception:
-        # If profile doesn't exist, create it
-        if instance.role == 'student':
-            StudentProfile.objects.get_or_create(user=instance)
-        elif instance.role == 'teacher':
-            TeacherProfile.objects.get_or_create(user=instance)
-        elif instance.role == 'admin':
-            AdminProfile.objects.get_or_create(user=instance)
-        elif instance.role == 'parent':
-            ParentProfile.objects.get_or_create(user=instance)
\ No newline at end of file
+def index_user_for_search(sender, instance, update_fields=None, **kwargs):
+    """Refresh search tokens unless only unrelated fields (e.g. last_login) changed"""
+    if update_fields is None or USER_SEARCH_FIELDS.intersection(update_fields):
+        index_user(instance, getattr(instance, 'student_profile', None) if instance.role == 'student' else None)
+
+
+@receiver(post_save, sender=StudentProfile)
+def index_student_for_search(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or PROFILE_SEARCH_FIELDS.intersection(update_fields):
+        index_user(instance.user, instance)
+
+
+@receiver(pre_save, sender=Classroom)
+def remember_previous_teacher(sender, instance, **kwargs):
+    """Remember the old teacher so a reassigned classroom updates both teachers"""
+    instance._previous_teacher_id = None
+    if instance.pk:
+        instance._previous_teacher_id = (
+            Classroom.objects.filter(pk=instance.pk).values_list('teacher_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Classroom)
+@receiver(post_delete, sender=Classroom)
+def classroom_changed(sender, instance, **kwargs):
+    """Teachers' cached classroom ids and sidebar follow classroom changes"""
+    teacher_ids = {instance.teacher_id, getattr(instance, '_previous_teacher_id', None)}
+    invalidate_access_scope(*teacher_ids)
+    bump_navigation(user_ids=teacher_ids)
+
+
+@receiver(m2m_changed, sender=ParentProfile.students.through)
+def parent_children_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Parents' cached child ids follow changes to the parent-student links"""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        invalidate_access_scope(instance.user_id)
+    elif pk_set:
+        invalidate_access_scope(*ParentProfile.objects.filter(pk__in=pk_set).values_list('user_id', flat=True))
+
+
+@receiver(post_save, sender=AttendanceRecord)
+@receiver(post_delete, sender=AttendanceRecord)
+@receiver(post_save, sender=AssignmentSubmission)
+@receiver(post_delete, sender=AssignmentSubmission)
+def student_activity_changed(sender, instance, **kwargs):
+    """Parent summaries of the student are stale (grades are handled by grades.policies)"""
+    touch_students([instance.student_id])
+
+
+@receiver(post_save, sender=StudentProfile)
+@receiver(post_delete, sender=StudentProfile)
+def student_profile_changed(sender, instance, **kwargs):
+    touch_students([instance.user_id])
+
+
+@receiver(post_save, sender=Assignment)
+@receiver(post_delete, sender=Assignment)
+def classroom_assignments_changed(sender, instance, **kwargs):
+    touch_classrooms([instance.classroom_id])
+
+
+@receiver(post_save, sender=AttendanceSession)
+@receiver(post_delete, sender=AttendanceSession)
+def attendance_session_changed(sender, instance, **kwargs):
+    """Active-session badges of the session's teacher and of all admins, and the classroom's timelines"""
+    bump_navigation(user_ids=[instance.teacher_id], roles=['admin'])
+    touch_classrooms([instance.classroom_id])
+
+
+@receiver(post_save, sender=FeedbackNotification)
+@receiver(post_delete, sender=FeedbackNotification)
+def feedback_notification_changed(sender, instance, **kwargs):
+    bump_navigation(user_ids=[instance.recipient_id])
+
+
+@receiver(post_save, sender=FeedbackSession)
+@receiver(pre_delete, sender=FeedbackSession)
+def feedback_session_changed(sender, instance, **kwargs):
+    """Pending feedback in the targeted students' timelines"""
+    touch_students(instance.target_users.values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=FeedbackSession.target_users.through)
+def feedback_targets_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear' and not reverse:
+        # clear() does not pass the removed ids
+        touch_students(instance.target_users.values_list('id', flat=True))
+        return
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        touch_students([instance.pk])
+    elif pk_set:
+        touch_students(pk_set)
+
+
+@receiver(post_save, sender=FeedbackResponse)
+@receiver(post_delete, sender=FeedbackResponse)
+def feedback_response_changed(sender, instance, **kwargs):
+    if instance.respondent_id:
+        touch_students([instance.respondent_id])
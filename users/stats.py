@@ -0,0 +1,93 @@
+"""
+Site-wide totals for the dashboards.
+
+Role counts and the other totals come from a single query (conditional
+counts plus scalar subqueries) and are cached together with the recent
+users (as plain values, never model instances with password hashes) and
+announcements lists. Signals drop the cache whenever one of the
+counted models changes, and a short TTL bounds staleness for writes that
+bypass signals (bulk_create, queryset.update/delete).
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, Q, Subquery, Value
+
+from classroom.models import Classroom, Announcement
+from subject.models import Subject
+from teacher.models import Assignment as LegacyAssignment, Quiz
+from assignments.models import Assignment
+from .models import CustomUser
+
+CACHE_KEY = 'users:dashboard_stats'
+DEFAULT_TIMEOUT = 60
+ROLES = ['student', 'teacher', 'parent', 'admin']
+
+
+def _table_count(model):
+    counted = model.objects.order_by().annotate(one=Value(1)).values('one').annotate(n=Count('*')).values('n')
+    return Subquery(counted, output_field=IntegerField())
+
+
+def compute_totals():
+    """All dashboard totals in one query"""
+    role_counts = {
+        f'total_{role}s': Count('id', filter=Q(role=role))
+        for role in ROLES
+    }
+    # Grouping by a constant gives exactly one row, and unlike aggregate()
+    # allows the other tables' counts as scalar subqueries in the same SELECT
+    totals = CustomUser.objects.order_by().annotate(one=Value(1)).values('one').annotate(
+        total_users=Count('id'),
+        **role_counts,
+        total_subjects=_table_count(Subject),
+        total_classrooms=_table_count(Classroom),
+        total_assignments=_table_count(LegacyAssignment),
+        total_course_assignments=_table_count(Assignment),
+        total_quizzes=_table_count(Quiz),
+    ).get()
+    del totals['one']
+    return totals
+
+
+RECENT_USER_FIELDS = ('id', 'username', 'first_name', 'last_name', 'role', 'created_at', 'profile_picture')
+
+
+def recent_users(limit=5):
+    """The newest users as dicts with the fields the dashboards show"""
+    role_names = dict(CustomUser.ROLE_CHOICES)
+    picture_storage = CustomUser._meta.get_field('profile_picture').storage
+    users = []
+    for row in CustomUser.objects.order_by('-created_at').values(*RECENT_USER_FIELDS)[:limit]:
+        picture = row.pop('profile_picture')
+        row['full_name'] = f"{row['first_name']} {row['last_name']}".strip() or row['username']
+        row['role_display'] = role_names.get(row['role'], row['role'])
+        row['profile_picture_url'] = picture_storage.url(picture) if picture else None
+        users.append(row)
+    return users
+
+
+def get_dashboard_stats():
+    """Cached totals plus recent_users and recent_announcements"""
+    stats = cache.get(CACHE_KEY)
+    if stats is None:
+        stats = compute_totals()
+        stats['recent_users'] = recent_users()
+        stats['recent_announcements'] = list(
+            Announcement.objects.select_related('classroom').order_by('-created_at')[:5]
+        )
+        cache.set(CACHE_KEY, stats, getattr(settings, 'DASHBOARD_STATS_TIMEOUT', DEFAULT_TIMEOUT))
+    return stats
+
+
+# Saves limited to these fields (e.g. last_login on every login) change no totals
+AUTH_FIELDS = {'last_login', 'password'}
+
+
+def invalidate_dashboard_stats(update_fields=None, **kwargs):
+    if update_fields is not None and AUTH_FIELDS.issuperset(update_fields):
+        return
+    cache.delete(CACHE_KEY)
+
+
+# Models whose changes show up on the dashboards
+COUNTED_MODELS = [CustomUser, Classroom, Subject, Announcement, LegacyAssignment, Assignment, Quiz]
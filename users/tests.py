@@ -1,3 +1,516 @@
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from classroom.models import Classroom
+from subject.models import Subject
+from .models import CustomUser
+from .stats import get_dashboard_stats
+from .search import search_users, tokenize, rebuild_index
+from .models import UserSearchToken, StudentProfile, ParentProfile, TeacherProfile
+from .access import get_access_scope
+from .decorators import can_modify_user, user_can_access_student_data, filter_accessible_students
+from smart_classroom.pagination import KeysetPaginator, KeysetPagination
+from .bulk import import_users, hash_passwords, parse_csv, UserImportError
+from .portal import compute_parent_summary, get_parent_summary
+from .workload import compute_teacher_workload
+from .timeline import get_student_timeline
+from .ids import allocate_ids, assign_ids, next_id, STUDENT
+
+
+class UsersTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user(username='admin', password='Testpass123', role='admin')
+
+
+class DashboardStatsTest(UsersTestCase):
+    def test_totals_cached_and_invalidated(self):
+        CustomUser.objects.create_user(username='student', password='Testpass123', role='student')
+        Subject.objects.create(name='Math')
+
+        with self.assertNumQueries(3):
+            stats = get_dashboard_stats()
+        self.assertEqual(stats['total_users'], 2)
+        self.assertEqual(stats['total_students'], 1)
+        self.assertEqual(stats['total_admins'], 1)
+        self.assertEqual(stats['total_subjects'], 1)
+        self.assertEqual(stats['total_classrooms'], 0)
+        self.assertEqual(stats['recent_users'][0]['username'], 'student')
+        self.assertNotIn('password', stats['recent_users'][0])
+
+        with self.assertNumQueries(0):
+            get_dashboard_stats()
+
+        # Logins only save last_login and keep the cached totals
+        update_last_login(None, self.admin)
+        with self.assertNumQueries(0):
+            get_dashboard_stats()
+
+        CustomUser.objects.create_user(username='teacher', password='Testpass123', role='teacher')
+        self.assertEqual(get_dashboard_stats()['total_teachers'], 1)
+
+    def test_admin_dashboard(self):
+        self.client.login(username='admin', password='Testpass123')
+        response = self.client.get(reverse('users:admin_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['total_users'], 1)
+        self.assertContains(response, 'Admin • Joined')
+
+    def test_home_dashboard_warm_cache(self):
+        self.client.get(reverse('home'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('home'))
+        self.assertEqual(response.context['total_teachers'], 0)
+
+
+class UserSearchTest(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ana = CustomUser.objects.create_user(
+            username='ana.lopez', password='Testpass123', role='student',
+            first_name='Ana', last_name='López', email='ana@school.edu',
+        )
+        self.ana.student_profile.roll_number = 'R-17'
+        self.ana.student_profile.save()
+        self.anabel = CustomUser.objects.create_user(
+            username='anabel', password='Testpass123', role='teacher', first_name='Anabel', last_name='Smith',
+        )
+
+    def test_prefix_search_ranked_and_maintained_on_save(self):
+        self.assertIn('2024001', tokenize('STU2024001'))
+        self.assertEqual(
+            list(search_users(CustomUser.objects.order_by('username'), 'ana')),
+            [self.ana, self.anabel],
+        )
+        self.assertEqual(list(search_users(CustomUser.objects.all(), 'lopez an')), [self.ana])
+        self.assertEqual(list(search_users(CustomUser.objects.all(), 'r 17')), [self.ana])
+
+        self.anabel.last_name = 'Jones'
+        self.anabel.save()
+        self.assertFalse(search_users(CustomUser.objects.all(), 'smith').exists())
+        self.assertEqual(rebuild_index(), 3)
+        self.assertTrue(UserSearchToken.objects.filter(user=self.anabel, token='jones').exists())
+
+    def test_non_latin_names_are_searchable(self):
+        ram = CustomUser.objects.create_user(username='ram', password='Testpass123', first_name='राम')
+        wang = CustomUser.objects.create_user(username='wang', password='Testpass123', first_name='王小明')
+        self.assertEqual(list(search_users(CustomUser.objects.all(), 'राम')), [ram])
+        self.assertEqual(list(search_users(CustomUser.objects.all(), '王小')), [wang])
+        self.assertIn('jose', tokenize('José_García'))
+        # A query with nothing searchable in it matches nobody
+        self.assertFalse(search_users(CustomUser.objects.all(), '--').exists())
+        self.assertEqual(search_users(CustomUser.objects.all(), '  ').count(), CustomUser.objects.count())
+
+    def test_views_use_index(self):
+        self.client.login(username='admin', password='Testpass123')
+        response = self.client.get(reverse('users:user_management'), {'search': 'anab'})
+        self.assertEqual(list(response.context['page_obj']), [self.anabel])
+        response = self.client.get(reverse('users:students_list'), {'search': 'lop'})
+        self.assertEqual([profile.user for profile in response.context['page_obj']], [self.ana])
+        response = self.client.get(reverse('users:user_search_autocomplete'), {'q': 'ana', 'role': 'teacher'})
+        self.assertEqual([row['username'] for row in response.json()['results']], ['anabel'])
+
+
+class KeysetPaginationTest(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        CustomUser.objects.bulk_create([
+            CustomUser(username=f'user{number:02d}', role='student') for number in range(24)
+        ])
+        # Legacy rows without created_at sort last
+        CustomUser.objects.filter(username__in=['user03', 'user04']).update(created_at=None)
+        self.expected = [
+            user.id for user in CustomUser.objects.exclude(created_at=None).order_by('-created_at', '-id')
+        ] + [user.id for user in CustomUser.objects.filter(created_at=None).order_by('-id')]
+
+    def walk(self, paginator):
+        seen = []
+        page = paginator.get_page()
+        while True:
+            seen.extend(user.id for user in page)
+            if not page.next_cursor:
+                return seen, page
+            page = paginator.get_page(page.next_cursor)
+
+    def test_pages_forward_and_back_with_null_keys(self):
+        paginator = KeysetPaginator(CustomUser.objects.all(), 10)
+        seen, last = self.walk(paginator)
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(last), 5)
+
+        previous = paginator.get_page(last.previous_cursor)
+        self.assertEqual([user.id for user in previous], self.expected[10:20])
+        self.assertEqual(paginator.get_page('garbage').object_list[0].id, self.expected[0])
+        self.assertEqual((paginator.count, paginator.count_is_exact), (25, True))
+        self.assertEqual(KeysetPaginator(CustomUser.objects.all(), 10, count_limit=20).count, 20)
+
+    def test_user_management_and_drf(self):
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        self.client.login(username='admin', password='Testpass123')
+        response = self.client.get(reverse('users:user_management'))
+        self.assertEqual(len(response.context['page_obj']), 20)
+        response = self.client.get(reverse('users:user_management'), {'cursor': response.context['page_obj'].next_cursor})
+        self.assertEqual(len(response.context['page_obj']), 5)
+
+        pagination = KeysetPagination()
+        request = Request(APIRequestFactory().get('/api/users/'))
+        rows = pagination.paginate_queryset(CustomUser.objects.all(), request)
+        data = pagination.get_paginated_response([row.id for row in rows]).data
+        self.assertEqual(data['results'], self.expected[:20])
+        self.assertIsNone(data['previous'])
+        self.assertIn('cursor=', data['next'])
+
+
+class AccessScopeTest(UsersTestCase):
+    def test_scope_loaded_once_and_invalidated(self):
+        teacher = CustomUser.objects.create_user(username='teacher', password='Testpass123', role='teacher')
+        parent = CustomUser.objects.create_user(username='parent', password='Testpass123', role='parent')
+        mine = CustomUser.objects.create_user(username='mine', password='Testpass123', role='student')
+        other = CustomUser.objects.create_user(username='other', password='Testpass123', role='student')
+        classroom = Classroom.objects.create(name='10A', grade='10', teacher=teacher)
+        StudentProfile.objects.filter(user=mine).update(classroom=classroom)
+        parent.parent_profile.students.add(mine.student_profile)
+        mine = CustomUser.objects.select_related('student_profile').get(pk=mine.pk)
+        other = CustomUser.objects.select_related('student_profile').get(pk=other.pk)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(user_can_access_student_data(teacher, mine))
+            self.assertFalse(user_can_access_student_data(teacher, other))
+            self.assertTrue(can_modify_user(teacher, mine))
+        with self.assertNumQueries(1):
+            self.assertTrue(can_modify_user(parent, mine))
+            self.assertFalse(can_modify_user(parent, other))
+        self.assertFalse(can_modify_user(mine, other))
+        self.assertEqual(
+            list(filter_accessible_students(teacher, StudentProfile.objects.all())),
+            [mine.student_profile],
+        )
+
+        # A fresh user object (next request) reads the shared cache
+        teacher = CustomUser.objects.get(pk=teacher.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_access_scope(teacher).classroom_ids, {classroom.id})
+
+        second = Classroom.objects.create(name='10B', grade='10', teacher=teacher)
+        teacher = CustomUser.objects.get(pk=teacher.pk)
+        self.assertEqual(get_access_scope(teacher).classroom_ids, {classroom.id, second.id})
+
+        # Reassigning a classroom also drops the previous teacher's scope
+        successor = CustomUser.objects.create_user(username='successor', password='Testpass123', role='teacher')
+        second.teacher = successor
+        second.save()
+        teacher = CustomUser.objects.get(pk=teacher.pk)
+        self.assertEqual(get_access_scope(teacher).classroom_ids, {classroom.id})
+
+        parent.parent_profile.students.remove(mine.student_profile)
+        parent = CustomUser.objects.get(pk=parent.pk)
+        self.assertFalse(user_can_access_student_data(parent, mine))
+
+
+class IdAllocatorTest(UsersTestCase):
+    def test_sequential_ids_and_block_reservation(self):
+        first = CustomUser.objects.create_user(username='s1', password='Testpass123', role='student')
+        second = CustomUser.objects.create_user(username='s2', password='Testpass123', role='student')
+        self.assertEqual(first.student_profile.student_id, 'STU000001')
+        self.assertEqual(second.student_profile.student_id, 'STU000002')
+
+        # savepoint, one increment, one read, release
+        with self.assertNumQueries(4):
+            block = allocate_ids(STUDENT, 1000)
+        self.assertEqual(block[0], 'STU000003')
+        self.assertEqual(block[-1], 'STU001002')
+        self.assertEqual(len(set(block)), 1000)
+        self.assertEqual(next_id(STUDENT), 'STU001003')
+
+        profiles = assign_ids([StudentProfile(student_id='KEEP'), StudentProfile()], 'student_id', STUDENT)
+        self.assertEqual([p.student_id for p in profiles], ['KEEP', 'STU001004'])
+
+        classroom = Classroom.objects.create(name='9B', grade='9', teacher=self.admin)
+        self.assertEqual(classroom.classroom_id, 'CLS000001')
+
+
+class UserImportTest(UsersTestCase):
+    CSV = (
+        'username,role,first_name,last_name,email,password,classroom,grade,parent\n'
+        'pat,parent,Pat,Lee,pat@example.com,Secret123,,,\n'
+        'kim,student,Kim,Lee,kim@example.com,Secret123,{classroom},10th,pat\n'
+        'tom,teacher,Tom,Ray,,,,,\n'
+    )
+
+    def test_import_creates_profiles_links_and_index(self):
+        classroom = Classroom.objects.create(name='10A', grade='10', teacher=self.admin)
+        rows = parse_csv(io.BytesIO(self.CSV.format(classroom='10A').encode()))
+        stages = []
+        created = import_users(rows, workers=1, progress=lambda stage, done, total: stages.append(stage))
+
+        self.assertEqual(created, {'teacher': 1, 'student': 1, 'parent': 1})
+        self.assertIn('hashing passwords', stages)
+        kim = CustomUser.objects.get(username='kim')
+        self.assertTrue(kim.check_password('Secret123'))
+        self.assertEqual(kim.student_profile.classroom, classroom)
+        self.assertTrue(kim.student_profile.student_id.startswith('STU'))
+        self.assertEqual(list(ParentProfile.objects.get(user__username='pat').students.all()), [kim.student_profile])
+        self.assertFalse(CustomUser.objects.get(username='tom').has_usable_password())
+        self.assertTrue(CustomUser.objects.get(username='tom').teacher_profile.teacher_id)
+        self.assertEqual(search_users(CustomUser.objects.all(), 'kim').get(), kim)
+
+    def test_invalid_file_writes_nothing(self):
+        rows = parse_csv(io.StringIO(self.CSV.format(classroom='Nowhere') + 'admin,admin,,,,,,,\n'))
+        with self.assertRaises(UserImportError) as raised:
+            import_users(rows, workers=1)
+        self.assertEqual([error['row'] for error in raised.exception.errors], [2, 4])
+        self.assertFalse(CustomUser.objects.filter(username='pat').exists())
+
+    def test_endpoint_and_process_pool(self):
+        self.client.login(username='admin', password='Testpass123')
+        upload = SimpleUploadedFile('users.csv', b'username,role\nzed,student\n')
+        response = self.client.post(reverse('users:import_users'), {'file': upload})
+        self.assertEqual(response.json()['created'], {'student': 1})
+
+        bad_files = [
+            SimpleUploadedFile('users.csv', b'username,role\n"' + b'x' * 200000 + b'",student\n'),
+            SimpleUploadedFile('users.csv', b'\xff\xfe not utf-8'),
+        ]
+        for upload in bad_files:
+            response = self.client.post(reverse('users:import_users'), {'file': upload})
+            self.assertEqual(response.status_code, 400)
+            self.assertTrue(response.json()['errors'])
+        with self.settings(USER_IMPORT_MAX_ROWS=1):
+            upload = SimpleUploadedFile('users.csv', b'username,role\nann,student\nben,student\n')
+            response = self.client.post(reverse('users:import_users'), {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(CustomUser.objects.filter(username='ann').exists())
+
+        hashes = hash_passwords(['pw'] * 60, workers=2)
+        self.assertEqual(len(set(hashes)), 60)
+
+
+class ProfileLifecycleTest(UsersTestCase):
+    def test_profile_follows_creation_and_role_changes_only(self):
+        user = CustomUser.objects.create_user(username='sam', password='Testpass123', role='student')
+        student_id = user.student_profile.student_id
+
+        # Login records last_login with a single UPDATE
+        with self.assertNumQueries(1):
+            update_last_login(None, user)
+
+        # Unrelated saves neither touch nor recreate the profile
+        user = CustomUser.objects.get(pk=user.pk)
+        user.first_name = 'Sam'
+        user.save()
+        self.assertEqual(StudentProfile.objects.get(user=user).student_id, student_id)
+        self.assertEqual(StudentProfile.objects.filter(user=user).count(), 1)
+
+        user.role = 'teacher'
+        user.save()
+        self.assertTrue(TeacherProfile.objects.filter(user=user).exists())
+
+    def test_login_writes_user_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('login'), {'username': 'admin', 'password': 'Testpass123'})
+        writes = [q['sql'] for q in queries if q['sql'].startswith(('UPDATE', 'INSERT', 'DELETE'))]
+        user_writes = [sql for sql in writes if '"users_' in sql]
+        self.assertEqual(len(user_writes), 1)
+        self.assertTrue(user_writes[0].startswith('UPDATE "users_customuser" SET "last_login"'))
+
+
+class ParentSummaryTest(UsersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.parent = CustomUser.objects.create_user(username='parent', password='Testpass123', role='parent')
+        self.classroom = Classroom.objects.create(name='5A', grade='5', teacher=self.admin)
+        self.subject = Subject.objects.create(name='Math')
+
+    def add_child(self, username):
+        child = CustomUser.objects.create_user(username=username, password='Testpass123', role='student')
+        child.student_profile.classroom = self.classroom
+        child.student_profile.save()
+        self.parent.parent_profile.students.add(child.student_profile)
+        return child
+
+    def add_assignment(self, title, due_in_days):
+        from assignments.models import Assignment
+        return Assignment.objects.create(
+            title=title, description='', subject=self.subject, classroom=self.classroom, teacher=self.admin,
+            due_date=timezone.now() + timedelta(days=due_in_days), status='published',
+        )
+
+    def test_fixed_queries_and_cached_until_a_child_changes(self):
+        from assignments.models import AssignmentSubmission
+        from grades.models import Grade
+
+        first = self.add_child('kid1')
+        past = self.add_assignment('Essay', -2)
+        self.add_assignment('Project', 3)
+        AssignmentSubmission.objects.create(assignment=past, student=first, submission_text='done')
+        with self.assertNumQueries(5):
+            compute_parent_summary([first.id])
+
+        second = self.add_child('kid2')
+        self.add_child('kid3')
+        with self.assertNumQueries(5):
+            children = compute_parent_summary([first.id, second.id])
+        by_id = {child['id']: child for child in children}
+        self.assertEqual(by_id[first.id]['missing_submissions'], [])
+        self.assertEqual([a['title'] for a in by_id[second.id]['missing_submissions']], ['Essay'])
+        self.assertEqual([a['title'] for a in by_id[second.id]['upcoming_assignments']], ['Project'])
+
+        parent = CustomUser.objects.get(pk=self.parent.pk)
+        self.assertEqual(len(get_parent_summary(parent)), 3)
+        parent = CustomUser.objects.get(pk=self.parent.pk)
+        with self.assertNumQueries(0):
+            get_parent_summary(parent)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Grade.objects.create(
+                student=second, subject=self.subject, teacher=self.admin, title='Quiz', grade_type='quiz',
+                points_earned=Decimal(9), points_possible=Decimal(10), date_assigned=date.today(),
+            )
+        summary = {child['id']: child for child in get_parent_summary(parent)}
+        self.assertEqual(summary[second.id]['recent_grades'][0]['percentage'], 90.0)
+
+        self.client.login(username='parent', password='Testpass123')
+        response = self.client.get(reverse('users:parent_summary'))
+        self.assertEqual(len(response.json()['children']), 3)
+
+
+class NavigationCacheTest(UsersTestCase):
+    def sidebar_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, [q['sql'] for q in queries if 'attendance_attendancesession' in q['sql']]
+
+    def test_sidebar_is_cached_until_its_sessions_change(self):
+        from attendance.models import AttendanceSession
+
+        teacher = CustomUser.objects.create_user(username='teach', password='Testpass123', role='teacher')
+        classroom = Classroom.objects.create(name='7C', grade='7', teacher=teacher)
+        self.client.login(username='teach', password='Testpass123')
+        url = reverse('users:profile')
+
+        response, queries = self.sidebar_queries(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 1)
+        _, queries = self.sidebar_queries(url)
+        self.assertEqual(queries, [])
+
+        AttendanceSession.objects.create(title='Morning', classroom=classroom, teacher=teacher)
+        response, queries = self.sidebar_queries(url)
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, 'id="attendance-badge">1</span>')
+
+
+class TeacherWorkloadTest(UsersTestCase):
+    def test_workload_in_two_queries_and_cached(self):
+        from assignments.models import Assignment, AssignmentSubmission
+        from attendance.models import AttendanceSession, AttendanceRecord
+
+        teacher = CustomUser.objects.create_user(username='teach', password='Testpass123', role='teacher')
+        subject = Subject.objects.create(name='Art')
+        rooms = [Classroom.objects.create(name=f'Room {n}', grade='8', teacher=teacher) for n in range(3)]
+        students = []
+        for n in range(4):
+            student = CustomUser.objects.create_user(username=f'kid{n}', password='Testpass123', role='student')
+            student.student_profile.classroom = rooms[0]
+            student.student_profile.save()
+            students.append(student)
+        assignment = Assignment.objects.create(
+            title='Sketch', description='', subject=subject, classroom=rooms[0], teacher=teacher,
+            due_date=timezone.now() + timedelta(days=1), status='published',
+        )
+        for student in students[:3]:
+            AssignmentSubmission.objects.create(assignment=assignment, student=student, submission_text='x')
+        session = AttendanceSession.objects.create(title='Morning', classroom=rooms[0], teacher=teacher)
+        AttendanceRecord.objects.create(session=session, student=students[0], status='present')
+
+        with self.assertNumQueries(2):
+            workload = compute_teacher_workload(teacher)
+        first = workload['classrooms'][0]
+        self.assertEqual(
+            (first['student_count'], first['assignment_count'], first['ungraded_count'], first['session_state']),
+            (4, 1, 3, 'active'),
+        )
+        self.assertEqual(first['todays_sessions'][0]['present_count'], 1)
+        self.assertEqual(workload['classrooms'][1]['session_state'], 'none')
+        self.assertEqual(workload['totals']['classroom'], 3)
+
+        self.client.login(username='teach', password='Testpass123')
+        response = self.client.get(reverse('users:teacher_dashboard'))
+        self.assertContains(response, 'Room 2')
+        self.assertEqual(response.context['totals']['ungraded'], 3)
+
+
+class StudentTimelineTest(UsersTestCase):
+    def test_timeline_is_cached_until_a_relevant_write(self):
+        from assignments.models import Assignment, AssignmentSubmission
+        from attendance.models import AttendanceSession
+        from feedback.models import FeedbackCategory, FeedbackSession
+        from grades.models import Grade
+
+        teacher = CustomUser.objects.create_user(username='teach', password='Testpass123', role='teacher')
+        classroom = Classroom.objects.create(name='6B', grade='6', teacher=teacher)
+        subject = Subject.objects.create(name='Music')
+        student = CustomUser.objects.create_user(username='kid', password='Testpass123', role='student')
+        student.student_profile.classroom = classroom
+        student.student_profile.save()
+        assignment = Assignment.objects.create(
+            title='Scales', description='', subject=subject, classroom=classroom, teacher=teacher,
+            due_date=timezone.now() + timedelta(days=1), status='published',
+        )
+        AttendanceSession.objects.create(title='Morning', classroom=classroom, teacher=teacher)
+        feedback = FeedbackSession.objects.create(
+            title='Term survey', category=FeedbackCategory.objects.create(name='General'),
+            created_by=teacher, status='active',
+        )
+        feedback.target_users.add(student)
+
+        with self.assertNumQueries(4):
+            timeline = get_student_timeline(student, classroom.id)
+        self.assertEqual([s['title'] for s in timeline['sessions']], ['Morning'])
+        self.assertEqual(timeline['due_soon'][0]['submitted'], False)
+        self.assertEqual([f['title'] for f in timeline['pending_feedback']], ['Term survey'])
+        with self.assertNumQueries(0):
+            get_student_timeline(student, classroom.id)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            AssignmentSubmission.objects.create(assignment=assignment, student=student, submission_text='la')
+            Grade.objects.create(
+                student=student, subject=subject, teacher=teacher, title='Recital', grade_type='exam',
+                points_earned=Decimal(8), points_possible=Decimal(10), date_assigned=date.today(),
+            )
+        # The tokens are replaced on commit, not while the writes are still uncommitted
+        with self.assertNumQueries(0):
+            get_student_timeline(student, classroom.id)
+        for callback in callbacks:
+            callback()
+        timeline = get_student_timeline(student, classroom.id)
+        self.assertTrue(timeline['due_soon'][0]['submitted'])
+        self.assertEqual(timeline['new_grades'][0]['percentage'], 80.0)
+
+        self.client.login(username='kid', password='Testpass123')
+        self.assertContains(self.client.get(reverse('users:student_dashboard')), 'Term survey')
+
+    def test_warm_command_needs_a_shared_cache(self):
+        with self.assertRaises(CommandError):
+            call_command('warm_student_timelines', stdout=io.StringIO())
 
-# Create your tests here.
+        student = CustomUser.objects.create_user(username='kid', password='Testpass123', role='student')
+        with self.settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+        }}):
+            out = io.StringIO()
+            call_command('warm_student_timelines', stdout=out)
+        self.assertIn('Built timelines for 1 students', out.getvalue())
@@ -0,0 +1,127 @@
+"""
+A student's "today" timeline for the student dashboard: today's attendance
+sessions, assignments due soon, new grades and pending feedback.
+
+Each part is one range query on an index (sessions by classroom and start
+time, assignments by classroom, status and due date, grades by student and
+date graded). The result is stored in the cache per student and day with
+the version tokens of the student and their classroom (see users.portal),
+so writes that concern the student or the classroom make it stale and a
+dashboard visit otherwise costs no queries. `warm_student_timelines`
+builds the entries ahead of the morning rush.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .portal import CLASSROOM_VERSION_KEY, STUDENT_VERSION_KEY, current_versions
+
+CACHE_KEY = 'users:student_timeline:{}:{}'
+DEFAULT_TIMEOUT = 60 * 15
+DUE_SOON_DAYS = 3
+NEW_GRADE_DAYS = 7
+MAX_ITEMS = 10
+
+
+def _day_bounds(day):
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def _sessions(student, classroom_id, day):
+    from attendance.models import AttendanceRecord, AttendanceSession
+
+    start, end = _day_bounds(day)
+    record = AttendanceRecord.objects.filter(session=OuterRef('pk'), student=student)
+    return [
+        {'id': pk, 'title': title, 'subject': subject, 'start_time': start_time, 'status': status,
+         'my_status': my_status}
+        for pk, title, subject, start_time, status, my_status in AttendanceSession.objects.filter(
+            classroom_id=classroom_id, start_time__gte=start, start_time__lt=end,
+        ).annotate(
+            my_status=record.values('status')[:1],
+        ).values_list('id', 'title', 'subject__name', 'start_time', 'status', 'my_status').order_by('start_time')
+    ]
+
+
+def _due_soon(student, classroom_id, now):
+    from assignments.models import Assignment, AssignmentSubmission
+
+    return [
+        {'id': pk, 'title': title, 'subject': subject, 'due_date': due_date, 'submitted': submitted}
+        for pk, title, subject, due_date, submitted in Assignment.objects.filter(
+            classroom_id=classroom_id, status='published',
+            due_date__gte=now, due_date__lt=now + timedelta(days=DUE_SOON_DAYS),
+        ).annotate(
+            submitted=Exists(AssignmentSubmission.objects.filter(assignment=OuterRef('pk'), student=student)),
+        ).values_list('id', 'title', 'subject__name', 'due_date', 'submitted').order_by('due_date')[:MAX_ITEMS]
+    ]
+
+
+def _new_grades(student, now):
+    from grades.models import Grade
+
+    return [
+        {'title': title, 'subject': subject, 'grade_type': grade_type,
+         'percentage': float(percentage) if percentage is not None else None, 'date_graded': date_graded}
+        for title, subject, grade_type, percentage, date_graded in Grade.objects.filter(
+            student=student, date_graded__gte=now - timedelta(days=NEW_GRADE_DAYS),
+        ).values_list(
+            'title', 'subject__name', 'grade_type', 'percentage', 'date_graded',
+        ).order_by('-date_graded')[:MAX_ITEMS]
+    ]
+
+
+def _pending_feedback(student, now):
+    from feedback.models import FeedbackResponse, FeedbackSession
+
+    return [
+        {'id': pk, 'title': title, 'end_date': end_date}
+        for pk, title, end_date in FeedbackSession.objects.filter(
+            Q(end_date__isnull=True) | Q(end_date__gte=now),
+            target_users=student, status='active', start_date__lte=now,
+        ).exclude(
+            Exists(FeedbackResponse.objects.filter(session=OuterRef('pk'), respondent=student)),
+        ).values_list('id', 'title', 'end_date').order_by('end_date', 'id')[:MAX_ITEMS]
+    ]
+
+
+def compute_student_timeline(student, classroom_id, now=None):
+    """The timeline of `student` (a user) in `classroom_id`, in at most four queries"""
+    now = now or timezone.now()
+    day = timezone.localdate(now)
+    return {
+        'date': day,
+        'sessions': _sessions(student, classroom_id, day) if classroom_id else [],
+        'due_soon': _due_soon(student, classroom_id, now) if classroom_id else [],
+        'new_grades': _new_grades(student, now),
+        'pending_feedback': _pending_feedback(student, now),
+    }
+
+
+def _version_keys(student, classroom_id):
+    keys = [STUDENT_VERSION_KEY.format(student.pk)]
+    if classroom_id:
+        keys.append(CLASSROOM_VERSION_KEY.format(classroom_id))
+    return keys
+
+
+def get_student_timeline(student, classroom_id, refresh=False):
+    """The cached timeline, rebuilt when the student or their classroom changed"""
+    key = CACHE_KEY.format(student.pk, timezone.localdate().isoformat())
+    version_keys = _version_keys(student, classroom_id)
+    if not refresh:
+        cached = cache.get(key)
+        if cached is not None and set(cached['versions']) == set(version_keys):
+            if cache.get_many(version_keys) == cached['versions']:
+                return cached['timeline']
+
+    # Tokens are read before the queries, so a concurrent write is not hidden
+    versions = current_versions(version_keys)
+    timeline = compute_student_timeline(student, classroom_id)
+    cache.set(key, {'versions': versions, 'timeline': timeline},
+              getattr(settings, 'STUDENT_TIMELINE_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return timeline
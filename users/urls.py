@@ -12,6 +12,7 @@ urlpatterns = [
     path('api/register/', views.RegisterView.as_view(), name='api_register'),
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/parent-summary/', views.parent_summary, name='parent_summary'),
     
     # Web views - Authentication
     path('signup/', views.signup_view, name='signup'),
@@ -23,6 +24,8 @@ urlpatterns = [
     
     # Admin user management
     path('manage/', views.user_management, name='user_management'),
+    path('search/autocomplete/', views.user_search_autocomplete, name='user_search_autocomplete'),
+    path('import/', views.import_users_view, name='import_users'),
     path('user/<int:user_id>/', views.user_detail, name='user_detail'),
     path('user/<int:user_id>/edit/', views.edit_user, name='edit_user'),
     path('user/<int:user_id>/toggle-status/', views.toggle_user_status, name='toggle_user_status'),
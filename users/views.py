@@ -1,4 +1,5 @@
 from django.shortcuts import render, redirect, get_object_or_404
+from django.conf import settings
 from django.contrib.auth import login, authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
@@ -16,8 +17,16 @@ import json
 from .models import CustomUser, AdminProfile, TeacherProfile, StudentProfile, ParentProfile
 from .forms import (CustomUserCreationForm, AdminProfileForm, TeacherProfileForm, 
                    StudentProfileForm, ParentProfileForm, UserProfileForm, StudentCredentialLoginForm)
-from .decorators import admin_required, role_required, can_modify_user, user_can_access_student_data
+from .decorators import (admin_required, role_required, can_modify_user, user_can_access_student_data,
+                         filter_accessible_students)
 from .serializers import RegisterSerializer
+from .stats import get_dashboard_stats
+from .search import search_users, autocomplete
+from .bulk import UserImportError, import_users, parse_file
+from .portal import get_parent_summary
+from .workload import get_teacher_workload
+from .timeline import get_student_timeline
+from smart_classroom.pagination import KeysetPaginator
 
 logger = logging.getLogger(__name__)
 
@@ -118,9 +127,12 @@ def student_details_for_parent(request, student_id=None):
         # Get student's grades
         try:
             from grades.models import Grade
-            grades = Grade.objects.filter(student=student).order_by('-date_assigned')[:10]
+            from grades.policies import final_grade_summary
+            grades = Grade.objects.filter(student=student).select_related('subject').order_by('-date_assigned')[:10]
+            gradebook = final_grade_summary(student)
         except Exception:
             grades = []
+            gradebook = None
         
         # Get student's attendance records
         try:
@@ -156,6 +168,7 @@ def student_details_for_parent(request, student_id=None):
             'student': student,
             'student_profile': student_profile,
             'grades': grades,
+            'gradebook': gradebook,
             'attendance_records': attendance_records,
             'attendance_percentage': round(attendance_percentage, 1),
             'assignments': assignments,
@@ -273,20 +286,16 @@ def user_management(request):
     
     users = CustomUser.objects.all().order_by('-created_at')
     
-    if search_query:
-        users = users.filter(
-            Q(username__icontains=search_query) |
-            Q(first_name__icontains=search_query) |
-            Q(last_name__icontains=search_query) |
-            Q(email__icontains=search_query)
-        )
-    
     if role_filter:
         users = users.filter(role=role_filter)
     
-    paginator = Paginator(users, 20)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    ordering = ('-created_at', '-id')
+    if search_query:
+        users = search_users(users, search_query)
+        ordering = ('-search_rank',) + ordering
+    
+    paginator = KeysetPaginator(users, 20, ordering)
+    page_obj = paginator.get_page(request.GET.get('cursor'))
     
     context = {
         'page_obj': page_obj,
@@ -297,6 +306,49 @@ def user_management(request):
     
     return render(request, 'users/user_management.html', context)
 
+@role_required(['admin', 'teacher'])
+def user_search_autocomplete(request):
+    """Type-ahead user search; teachers only see students in their classrooms"""
+    users = CustomUser.objects.all()
+    if request.user.role == 'teacher':
+        users = users.filter(role='student', student_profile__classroom__teacher=request.user)
+    elif request.GET.get('role'):
+        users = users.filter(role=request.GET['role'])
+    
+    return JsonResponse({'success': True, 'results': autocomplete(request.GET.get('q', ''), users)})
+
+@admin_required
+@require_http_methods(["POST"])
+def import_users_view(request):
+    """Create users and their profiles in bulk from an uploaded CSV or XLSX file"""
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'success': False, 'message': 'CSV or XLSX file is required'}, status=400)
+    # Hashing passwords for a whole year group outlasts a web request;
+    # larger files go through `manage.py import_users`
+    if upload.size > getattr(settings, 'USER_IMPORT_MAX_UPLOAD_SIZE', 2 * 1024 * 1024):
+        return JsonResponse({'success': False, 'message': 'File too large; use the import_users command'}, status=400)
+    
+    max_rows = getattr(settings, 'USER_IMPORT_MAX_ROWS', 500)
+    try:
+        rows = parse_file(upload, upload.name)
+        if len(rows) > max_rows:
+            return JsonResponse({
+                'success': False,
+                'message': f'At most {max_rows} users per upload; use the import_users command for larger files',
+            }, status=400)
+        created = import_users(rows)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'success': False, 'message': 'Invalid user file'}, status=400)
+    except UserImportError as e:
+        return JsonResponse({'success': False, 'message': str(e), 'errors': e.errors}, status=400)
+    
+    return JsonResponse({
+        'success': True,
+        'message': f'Imported {sum(created.values())} users',
+        'created': created,
+    })
+
 @admin_required
 def user_detail(request, user_id):
     """Admin view to see detailed user information"""
@@ -380,6 +432,11 @@ def edit_user(request, user_id):
     
     return render(request, 'users/edit_profile.html', context)
 
+@role_required(['parent'])
+def parent_summary(request):
+    """Attendance, recent grades, upcoming and missing assignments of all the parent's children"""
+    return JsonResponse({'success': True, 'children': get_parent_summary(request.user)})
+
 @admin_required
 @require_http_methods(["POST"])
 def toggle_user_status(request, user_id):
@@ -404,17 +461,20 @@ def student_details_for_parent(request, student_id):
     viewing_student_id = request.session.get('viewing_student_id')
     is_parent_of_student = False
     
-    if request.user.role == 'parent' and hasattr(request.user, 'parent_profile'):
-        is_parent_of_student = request.user.parent_profile.students.filter(user_id=student_id).exists()
+    if request.user.role == 'parent':
+        is_parent_of_student = user_can_access_student_data(request.user, student_user)
     
     if not (viewing_student_id == student_id or is_parent_of_student or request.user.role in ['admin', 'teacher']):
         messages.error(request, 'You do not have permission to view this student\'s details.')
         return redirect('users:student_credential_login')
     
+    from grades.policies import final_grade_summary
+    
     # Get attendance data, grades, etc. (you can expand this)
     context = {
         'student': student_user,
         'student_profile': student_profile,
+        'gradebook': final_grade_summary(student_user),
         'viewing_as_parent': True,
     }
     
@@ -429,18 +489,8 @@ def students_list(request):
     
     students = StudentProfile.objects.select_related('user', 'classroom').all()
     
-    # Filter for teachers - only their students
-    if request.user.role == 'teacher':
-        teacher_classrooms = request.user.classrooms.all()
-        students = students.filter(classroom__in=teacher_classrooms)
-    
-    if search_query:
-        students = students.filter(
-            Q(user__first_name__icontains=search_query) |
-            Q(user__last_name__icontains=search_query) |
-            Q(student_id__icontains=search_query) |
-            Q(roll_number__icontains=search_query)
-        )
+    # Teachers only see the students in their classrooms
+    students = filter_accessible_students(request.user, students)
     
     if classroom_filter:
         students = students.filter(classroom_id=classroom_filter)
@@ -448,6 +498,9 @@ def students_list(request):
     if grade_filter:
         students = students.filter(grade=grade_filter)
     
+    if search_query:
+        students = search_users(students.order_by('user__last_name', 'user__first_name'), search_query, user_field='user_id')
+    
     paginator = Paginator(students, 20)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
@@ -518,19 +571,14 @@ def dashboard_redirect(request):
 @admin_required
 def admin_dashboard(request):
     """Admin dashboard with system overview"""
-    total_users = CustomUser.objects.count()
-    total_students = CustomUser.objects.filter(role='student').count()
-    total_teachers = CustomUser.objects.filter(role='teacher').count()
-    total_parents = CustomUser.objects.filter(role='parent').count()
-    
-    recent_users = CustomUser.objects.order_by('-created_at')[:5]
+    stats = get_dashboard_stats()
     
     context = {
-        'total_users': total_users,
-        'total_students': total_students,
-        'total_teachers': total_teachers,
-        'total_parents': total_parents,
-        'recent_users': recent_users,
+        'total_users': stats['total_users'],
+        'total_students': stats['total_students'],
+        'total_teachers': stats['total_teachers'],
+        'total_parents': stats['total_parents'],
+        'recent_users': stats['recent_users'],
     }
     
     return render(request, 'users/admin_dashboard.html', context)
@@ -539,11 +587,12 @@ def admin_dashboard(request):
 def teacher_dashboard(request):
     """Teacher dashboard"""
     teacher_profile = getattr(request.user, 'teacher_profile', None)
-    classrooms = request.user.classrooms.all()
+    workload = get_teacher_workload(request.user)
     
     context = {
         'teacher_profile': teacher_profile,
-        'classrooms': classrooms,
+        'classrooms': workload['classrooms'],
+        'totals': workload['totals'],
     }
     
     return render(request, 'users/teacher_dashboard.html', context)
@@ -552,9 +601,11 @@ def teacher_dashboard(request):
 def student_dashboard(request):
     """Student dashboard"""
     student_profile = getattr(request.user, 'student_profile', None)
+    classroom_id = student_profile.classroom_id if student_profile else None
     
     context = {
         'student_profile': student_profile,
+        'timeline': get_student_timeline(request.user, classroom_id),
     }
     
     return render(request, 'users/student_dashboard.html', context)
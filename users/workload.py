@@ -0,0 +1,104 @@
+"""
+Teacher workload summary for the teacher dashboard.
+
+All of a teacher's classrooms are loaded in one query, with student,
+published assignment, ungraded submission and open feedback session
+counts as correlated subqueries (so the counts cannot multiply each other
+the way joined Counts would), and today's attendance sessions are
+prefetched in a second query. The summary is cached briefly per teacher.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, IntegerField, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from classroom.models import Classroom
+from .models import StudentProfile
+
+CACHE_KEY = 'users:teacher_workload:{}:{}'
+DEFAULT_TIMEOUT = 60
+
+
+def _count(queryset, classroom_field='classroom'):
+    """Per-classroom row count of `queryset` as a subquery"""
+    counted = queryset.filter(**{classroom_field: OuterRef('pk')}).order_by().values(classroom_field).annotate(
+        n=Count('pk'),
+    ).values('n')
+    return Coalesce(Subquery(counted, output_field=IntegerField()), 0)
+
+
+def workload_classrooms(teacher, today=None):
+    """The teacher's classrooms with workload annotations and `todays_sessions`"""
+    from assignments.models import Assignment, AssignmentSubmission
+    from attendance.models import AttendanceSession
+    from feedback.models import FeedbackSession
+
+    today = today or timezone.localdate()
+    # AttendanceSession already has present_count etc. as per-row properties
+    todays_sessions = AttendanceSession.objects.filter(start_time__date=today).annotate(
+        marked_count=Count('attendance_records'),
+        marked_present_count=Count('attendance_records', filter=Q(attendance_records__status__in=['present', 'late'])),
+    ).order_by('start_time')
+    return Classroom.objects.filter(teacher=teacher).annotate(
+        student_count=_count(StudentProfile.objects.all()),
+        assignment_count=_count(Assignment.objects.filter(status='published')),
+        ungraded_count=_count(
+            AssignmentSubmission.objects.filter(status='submitted'), 'assignment__classroom',
+        ),
+        open_feedback_count=_count(FeedbackSession.objects.filter(status='active')),
+    ).prefetch_related(
+        Prefetch('attendancesession_set', queryset=todays_sessions, to_attr='todays_sessions'),
+    ).order_by('name', 'id')
+
+
+def _session_state(sessions):
+    if not sessions:
+        return 'none'
+    if any(session.status == 'active' for session in sessions):
+        return 'active'
+    return 'completed'
+
+
+def compute_teacher_workload(teacher, today=None):
+    classrooms = []
+    for classroom in workload_classrooms(teacher, today):
+        classrooms.append({
+            'id': classroom.id,
+            'classroom_id': classroom.classroom_id,
+            'name': classroom.name,
+            'grade': classroom.grade,
+            'student_count': classroom.student_count,
+            'assignment_count': classroom.assignment_count,
+            'ungraded_count': classroom.ungraded_count,
+            'open_feedback_count': classroom.open_feedback_count,
+            'session_state': _session_state(classroom.todays_sessions),
+            'todays_sessions': [
+                {
+                    'id': session.id,
+                    'title': session.title,
+                    'status': session.status,
+                    'start_time': session.start_time,
+                    'record_count': session.marked_count,
+                    'present_count': session.marked_present_count,
+                }
+                for session in classroom.todays_sessions
+            ],
+        })
+    totals = {
+        key: sum(classroom[f'{key}_count'] for classroom in classrooms)
+        for key in ('student', 'assignment', 'ungraded', 'open_feedback')
+    }
+    totals['classroom'] = len(classrooms)
+    return {'classrooms': classrooms, 'totals': totals}
+
+
+def get_teacher_workload(teacher):
+    """The teacher's workload summary, cached for TEACHER_WORKLOAD_CACHE_TIMEOUT seconds"""
+    today = timezone.localdate()
+    key = CACHE_KEY.format(teacher.pk, today.isoformat())
+    workload = cache.get(key)
+    if workload is None:
+        workload = compute_teacher_workload(teacher, today)
+        cache.set(key, workload, getattr(settings, 'TEACHER_WORKLOAD_CACHE_TIMEOUT', DEFAULT_TIMEOUT))
+    return workload